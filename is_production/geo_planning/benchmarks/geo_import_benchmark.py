@@ -0,0 +1,172 @@
+"""
+Geo Import Batch point load benchmark.
+
+Writes a synthetic fixed-width grid file, parses it and loads it through the
+per-document path and the bulk path. Parse time is measured with the
+streaming chunk parser. Everything is rolled back afterwards.
+
+Run from the bench directory against a Geo Import Batch that already has a
+Geo Project, Version Tag and Geo Model Output:
+
+    bench --site <site> execute \\
+        is_production.geo_planning.benchmarks.geo_import_benchmark.run \\
+        --kwargs "{'import_batch': 'GIB-0001'}"
+
+The per-document path is timed on a sample because a full 250k-row run
+takes hours. Its rows/second figure is what matters for the comparison.
+"""
+
+import itertools
+import math
+import os
+import tempfile
+import time
+
+import frappe
+
+from is_production.geo_planning.doctype.geo_import_batch.geo_import_batch import (
+    _get_geo_model_output,
+    _get_point_insert_context,
+    _insert_geo_points_bulk,
+    _insert_geo_points_per_doc,
+    _iter_chunk_points,
+    _iter_selected_variable_chunks,
+)
+
+
+BENCHMARK_VARIABLE_CODE = "BENCH"
+
+
+def write_synthetic_fixed_width_file(file_path, point_count=250000, variable_code=BENCHMARK_VARIABLE_CODE):
+    columns = int(math.ceil(math.sqrt(point_count)))
+
+    with open(file_path, "w", encoding="utf-8") as f:
+        f.write("; origin 10000.000 -20000.000\n")
+        f.write("; mesh 10.000 10.000\n")
+        f.write("; x 1 14\n")
+        f.write("; y 15 14\n")
+        f.write(f"; {variable_code} 29 12\n")
+
+        for index in range(point_count):
+            row, column = divmod(index, columns)
+            x = 10000 + column * 10
+            y = -20000 + row * 10
+            z = 100 + (column % 50) * 0.1 + (row % 30) * 0.05
+            f.write(f"{x:14.3f}{y:14.3f}{z:12.3f}\n")
+
+
+def _rate(rows, seconds):
+    if not seconds:
+        return 0
+
+    return round(rows / seconds, 1)
+
+
+def run(
+    import_batch,
+    point_count=250000,
+    legacy_sample_size=5000,
+    target_doctype="Geo Model Points",
+):
+    point_count = int(point_count)
+    legacy_sample_size = min(int(legacy_sample_size), point_count)
+
+    batch = frappe.get_doc("Geo Import Batch", import_batch)
+    geo_model_output = _get_geo_model_output(batch)
+
+    if target_doctype == "Pit Outline Points":
+        batch_fieldname = "geo_import_batch"
+        remarks_fieldname = "remarks_comments"
+    else:
+        batch_fieldname = "import_batch"
+        remarks_fieldname = "remarks"
+
+    context = _get_point_insert_context(
+        batch=batch,
+        target_doctype=target_doctype,
+        target_label=f"{target_doctype} Benchmark",
+        batch_fieldname=batch_fieldname,
+        remarks_fieldname=remarks_fieldname,
+        geo_model_output=geo_model_output,
+        variable_code=BENCHMARK_VARIABLE_CODE,
+        full_name=f"{BENCHMARK_VARIABLE_CODE} - Benchmark",
+    )
+
+    handle, file_path = tempfile.mkstemp(suffix=".txt", prefix="geo_import_benchmark_")
+    os.close(handle)
+
+    try:
+        started = time.perf_counter()
+        write_synthetic_fixed_width_file(file_path, point_count)
+        write_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        parsed_rows = sum(
+            chunk.size
+            for chunk in _iter_selected_variable_chunks(file_path, BENCHMARK_VARIABLE_CODE)
+        )
+        parse_seconds = time.perf_counter() - started
+
+        frappe.db.rollback()
+
+        legacy_points = itertools.islice(
+            itertools.chain.from_iterable(
+                _iter_chunk_points(chunk)
+                for chunk in _iter_selected_variable_chunks(file_path, BENCHMARK_VARIABLE_CODE)
+            ),
+            legacy_sample_size,
+        )
+
+        started = time.perf_counter()
+        legacy_success, legacy_errors, _ = _insert_geo_points_per_doc(context, legacy_points)
+        legacy_seconds = time.perf_counter() - started
+        frappe.db.rollback()
+
+        bulk_success = 0
+        bulk_errors = 0
+        started = time.perf_counter()
+
+        for chunk in _iter_selected_variable_chunks(file_path, BENCHMARK_VARIABLE_CODE):
+            chunk_success, chunk_errors, _ = _insert_geo_points_bulk(
+                context,
+                _iter_chunk_points(chunk),
+                start_index=bulk_success + bulk_errors + 1,
+                commit=False,
+            )
+            bulk_success += chunk_success
+            bulk_errors += chunk_errors
+
+        bulk_seconds = time.perf_counter() - started
+        frappe.db.rollback()
+
+    finally:
+        frappe.db.rollback()
+
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+    legacy_rate = _rate(legacy_success, legacy_seconds)
+    bulk_rate = _rate(bulk_success, bulk_seconds)
+
+    result = {
+        "target_doctype": target_doctype,
+        "point_count": point_count,
+        "parsed_rows": parsed_rows,
+        "write_seconds": round(write_seconds, 3),
+        "parse_seconds": round(parse_seconds, 3),
+        "legacy_rows": legacy_success,
+        "legacy_errors": legacy_errors,
+        "legacy_seconds": round(legacy_seconds, 3),
+        "legacy_rows_per_second": legacy_rate,
+        "legacy_estimated_full_seconds": round(point_count / legacy_rate, 1) if legacy_rate else None,
+        "bulk_rows": bulk_success,
+        "bulk_errors": bulk_errors,
+        "bulk_seconds": round(bulk_seconds, 3),
+        "bulk_rows_per_second": bulk_rate,
+        "speedup": round(bulk_rate / legacy_rate, 1) if legacy_rate else None,
+    }
+
+    for key, value in result.items():
+        print(f"{key}: {value}")
+
+    return result
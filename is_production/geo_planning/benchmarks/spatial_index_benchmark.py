@@ -0,0 +1,125 @@
+"""
+Point-to-block assignment benchmark.
+
+Builds a rotated grid of blocks and a cloud of random points over it, then
+assigns the points with the STRtree engine used by preview block generation
+and with the old per-block scan. The per-block scan is timed on a sample of
+blocks because a full run over 2,000 blocks and 1M points takes hours.
+
+Nothing touches the database, so it can run from the bench directory:
+
+    bench --site <site> execute \\
+        is_production.geo_planning.benchmarks.spatial_index_benchmark.run
+
+or with any Python that has numpy and shapely installed.
+"""
+
+import math
+import time
+
+import numpy as np
+from shapely import affinity
+from shapely.geometry import Point, box
+
+from is_production.geo_planning.services.spatial_index_service import (
+    assign_points_to_polygons,
+    z_summary,
+)
+
+
+def build_blocks(block_count=2000, block_size_x=100, block_size_y=40, angle_degrees=15):
+    columns = int(math.ceil(math.sqrt(block_count)))
+    rows = int(math.ceil(block_count / columns))
+    origin = Point(columns * block_size_x / 2, rows * block_size_y / 2)
+    blocks = []
+
+    for index in range(block_count):
+        row, column = divmod(index, columns)
+        x = column * block_size_x
+        y = row * block_size_y
+        blocks.append(affinity.rotate(box(x, y, x + block_size_x, y + block_size_y), angle_degrees, origin=origin))
+
+    return blocks
+
+
+def build_points(blocks, point_count=1000000, seed=0):
+    minx = min(b.bounds[0] for b in blocks)
+    miny = min(b.bounds[1] for b in blocks)
+    maxx = max(b.bounds[2] for b in blocks)
+    maxy = max(b.bounds[3] for b in blocks)
+    rng = np.random.default_rng(seed)
+
+    return (
+        rng.uniform(minx, maxx, point_count),
+        rng.uniform(miny, maxy, point_count),
+        rng.uniform(50, 150, point_count),
+    )
+
+
+def _legacy_points_inside_polygon(x, y, polygon):
+    minx, miny, maxx, maxy = polygon.bounds
+    inside = []
+
+    for index in range(len(x)):
+        px = x[index]
+        py = y[index]
+
+        if px < minx or px > maxx or py < miny or py > maxy:
+            continue
+
+        pt = Point(px, py)
+
+        if polygon.contains(pt) or polygon.touches(pt):
+            inside.append(index)
+
+    return inside
+
+
+def run(block_count=2000, point_count=1000000, legacy_sample_blocks=5):
+    block_count = int(block_count)
+    point_count = int(point_count)
+    legacy_sample_blocks = min(int(legacy_sample_blocks), block_count)
+
+    blocks = build_blocks(block_count)
+    x, y, z = build_points(blocks, point_count)
+
+    started = time.perf_counter()
+    assigned = assign_points_to_polygons(x, y, blocks)
+    summaries = [z_summary(z, indices) for indices in assigned]
+    engine_seconds = time.perf_counter() - started
+
+    # The old scan walks the full point list once per block.
+    x_list = x.tolist()
+    y_list = y.tolist()
+    started = time.perf_counter()
+    legacy = [_legacy_points_inside_polygon(x_list, y_list, block) for block in blocks[:legacy_sample_blocks]]
+    legacy_seconds = time.perf_counter() - started
+
+    matches = all(
+        list(assigned[index]) == legacy[index]
+        for index in range(legacy_sample_blocks)
+    )
+    legacy_per_block = legacy_seconds / legacy_sample_blocks if legacy_sample_blocks else 0
+    legacy_estimated = legacy_per_block * block_count
+
+    result = {
+        "block_count": block_count,
+        "point_count": point_count,
+        "assigned_points": int(sum(len(indices) for indices in assigned)),
+        "non_empty_blocks": sum(1 for summary in summaries if summary != (0, 0, 0)),
+        "engine_seconds": round(engine_seconds, 3),
+        "legacy_sample_blocks": legacy_sample_blocks,
+        "legacy_sample_seconds": round(legacy_seconds, 3),
+        "legacy_estimated_full_seconds": round(legacy_estimated, 1),
+        "speedup": round(legacy_estimated / engine_seconds, 1) if engine_seconds else None,
+        "sample_matches_legacy": matches,
+    }
+
+    for key, value in result.items():
+        print(f"{key}: {value}")
+
+    return result
+
+
+if __name__ == "__main__":
+    run()
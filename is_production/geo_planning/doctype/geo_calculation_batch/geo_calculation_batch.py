@@ -8,8 +8,14 @@ from is_production.geo_planning.doctype.geo_import_batch.geo_import_batch import
     _get_file_path,
     _get_file_hash,
     _detect_variables_from_header,
-    _parse_selected_variable_file,
     _get_geo_model_output,
+    _purge_existing_points,
+)
+from is_production.geo_planning.services.grid_calculation_service import (
+    describe_rejected_rows,
+    difference_surfaces,
+    load_surface,
+    write_calculated_points,
 )
 
 
@@ -242,24 +248,6 @@ def _publish_complete(
     )
 
 
-def _coordinate_key(x, y, decimals):
-    decimals = _int(decimals, 2)
-    return f"{round(_float(x), decimals):.{decimals}f}|{round(_float(y), decimals):.{decimals}f}"
-
-
-def _calculate_value(reference_z, target_z, calculation_type):
-    reference_z = _float(reference_z)
-    target_z = _float(target_z)
-
-    if calculation_type == "Target Minus Reference":
-        return target_z - reference_z
-
-    if calculation_type == "Absolute Difference":
-        return abs(reference_z - target_z)
-
-    return reference_z - target_z
-
-
 def _resolve_geo_model_output(batch):
     if batch.geo_model_output:
         return batch.geo_model_output
@@ -277,23 +265,10 @@ def _delete_existing_points(batch):
     if not frappe.db.exists("DocType", "Geo Calculated Points"):
         return 0
 
-    existing = frappe.get_all(
+    return _purge_existing_points(
         "Geo Calculated Points",
-        filters={"calculation_batch": batch.name},
-        pluck="name",
-        limit_page_length=0,
-    )
-
-    for name in existing:
-        frappe.delete_doc(
-            "Geo Calculated Points",
-            name,
-            force=True,
-            ignore_permissions=True,
-        )
-
-    frappe.db.commit()
-    return len(existing)
+        {"calculation_batch": batch.name},
+    )["deleted_count"]
 
 
 def _set_batch_status(docname, values):
@@ -411,140 +386,72 @@ def create_calculated_points(docname, replace_existing=1):
         },
     )
 
-    reference_points = _parse_selected_variable_file(
-        reference_file_path,
-        batch.reference_variable_code,
-    )
+    reference = load_surface(reference_file_path, batch.reference_variable_code)
 
-    target_points = _parse_selected_variable_file(
-        target_file_path,
-        batch.target_variable_code,
-    )
-
-    reference_row_count = len(reference_points)
-    target_row_count = len(target_points)
-
-    if not reference_points:
+    if reference.empty:
         frappe.throw(f"No valid rows found for reference variable: {batch.reference_variable_code}")
 
-    if not target_points:
+    target = load_surface(target_file_path, batch.target_variable_code)
+
+    if target.empty:
         frappe.throw(f"No valid rows found for target variable: {batch.target_variable_code}")
 
+    result = difference_surfaces(
+        reference=reference,
+        target=target,
+        decimals=coordinate_rounding,
+        calculation_type=calculation_type,
+        allow_negative_values=batch.allow_negative_values,
+    )
+
+    reference_row_count = result.reference_row_count
+    target_row_count = result.target_row_count
+    matched_count = result.matched_count
+    missing_reference_count = result.missing_reference_count
+    missing_target_count = result.missing_target_count
+    error_count = len(result.rejected)
+    error_messages = describe_rejected_rows(result.rejected)
+
     deleted_existing_count = 0
 
     if int(replace_existing or 0):
         deleted_existing_count = _delete_existing_points(batch)
 
-    reference_lookup = {}
-
-    for point in reference_points:
-        key = _coordinate_key(point["x"], point["y"], coordinate_rounding)
-        reference_lookup[key] = point
-
-    target_keys = set()
-    success_count = 0
-    error_count = 0
-    matched_count = 0
-    missing_reference_count = 0
-    error_messages = []
-
-    for index, target_point in enumerate(target_points, start=1):
-        try:
-            key = _coordinate_key(target_point["x"], target_point["y"], coordinate_rounding)
-            target_keys.add(key)
-
-            reference_point = reference_lookup.get(key)
-
-            if not reference_point:
-                missing_reference_count += 1
-                continue
-
-            matched_count += 1
-
-            reference_z = _float(reference_point["z"])
-            target_z = _float(target_point["z"])
-            calculated_z = _calculate_value(reference_z, target_z, calculation_type)
-
-            if calculated_z < 0 and not batch.allow_negative_values:
-                error_count += 1
-                error_messages.append(
-                    f"Row {index}: negative calculated value at {target_point['x']}, {target_point['y']}. "
-                    f"Reference {reference_z}, target {target_z}, result {calculated_z}."
-                )
-                continue
-
-            doc = frappe.new_doc("Geo Calculated Points")
-
-            _set_if_field(doc, "geo_project", batch.geo_project)
-            _set_if_field(doc, "geo_model_output", geo_model_output)
-            _set_if_field(doc, "calculation_batch", batch.name)
-            _set_if_field(doc, "row_no", success_count + 1)
-
-            _set_if_field(doc, "x", _float(target_point["x"]))
-            _set_if_field(doc, "y", _float(target_point["y"]))
-
-            _set_if_field(doc, "z", calculated_z)
-            _set_if_field(doc, "calculated_z", calculated_z)
-            _set_if_field(doc, "reference_z", reference_z)
-            _set_if_field(doc, "target_z", target_z)
-
-            _set_if_field(doc, "reference_variable_code", batch.reference_variable_code)
-            _set_if_field(doc, "reference_variable_name", batch.reference_full_name)
-            _set_if_field(doc, "target_variable_code", batch.target_variable_code)
-            _set_if_field(doc, "target_variable_name", batch.target_full_name)
-
-            _set_if_field(doc, "variable_code", batch.calculated_variable_code)
-            _set_if_field(doc, "variable_name", batch.calculated_full_name)
-            _set_if_field(doc, "full_name", batch.calculated_full_name)
-
-            _set_if_field(doc, "calculation_type", calculation_type)
-            _set_if_field(doc, "match_status", "Matched")
-            _set_if_field(doc, "version_tag", batch.version_tag)
-            _set_if_field(doc, "status", "Draft")
-            _set_if_field(
-                doc,
-                "remarks",
-                (
-                    f"{batch.calculated_variable_code} calculated using {calculation_type}; "
-                    f"reference {batch.reference_variable_code}={reference_z}; "
-                    f"target {batch.target_variable_code}={target_z}; "
-                    f"calculated {calculated_z}; key {key}"
+    def report_progress(created_count, write_error_count):
+        _set_batch_status(
+            docname,
+            {
+                "geo_model_output": geo_model_output,
+                "reference_row_count": reference_row_count,
+                "target_row_count": target_row_count,
+                "matched_count": matched_count,
+                "missing_reference_count": missing_reference_count,
+                "success_count": created_count,
+                "error_count": error_count + write_error_count,
+                "processing_status": "Processing",
+                "calculation_log": (
+                    f"Calculation running at {now()}...\n"
+                    f"Calculated Variable: {batch.calculated_full_name}\n"
+                    f"Reference rows: {reference_row_count}\n"
+                    f"Target rows: {target_row_count}\n"
+                    f"Matched: {matched_count}\n"
+                    f"Created so far: {created_count}\n"
+                    f"Errors so far: {error_count + write_error_count}"
                 ),
-            )
-
-            doc.insert(ignore_permissions=True)
-            success_count += 1
-
-            if success_count % 1000 == 0:
-                _set_batch_status(
-                    docname,
-                    {
-                        "geo_model_output": geo_model_output,
-                        "reference_row_count": reference_row_count,
-                        "target_row_count": target_row_count,
-                        "matched_count": matched_count,
-                        "missing_reference_count": missing_reference_count,
-                        "success_count": success_count,
-                        "error_count": error_count,
-                        "processing_status": "Processing",
-                        "calculation_log": (
-                            f"Calculation running at {now()}...\n"
-                            f"Calculated Variable: {batch.calculated_full_name}\n"
-                            f"Reference rows: {reference_row_count}\n"
-                            f"Target rows: {target_row_count}\n"
-                            f"Matched so far: {matched_count}\n"
-                            f"Created so far: {success_count}\n"
-                            f"Errors so far: {error_count}"
-                        ),
-                    },
-                )
-
-        except Exception as e:
-            error_count += 1
-            error_messages.append(f"Target row {index}: {str(e)}")
-
-    reference_keys = set(reference_lookup.keys())
-    missing_target_count = len(reference_keys - target_keys)
+            },
+        )
+
+    success_count, write_error_count, write_error_messages = write_calculated_points(
+        batch=batch,
+        geo_model_output=geo_model_output,
+        calculation_type=calculation_type,
+        decimals=coordinate_rounding,
+        accepted=result.accepted,
+        on_progress=report_progress,
+    )
+
+    error_count += write_error_count
+    error_messages = (write_error_messages + error_messages)[:100]
 
     reference_file_hash = _get_file_hash(reference_file_path)
     target_file_hash = _get_file_hash(target_file_path)
@@ -2,10 +2,35 @@ import os
 import re
 import csv
 import hashlib
+import itertools
+import time
 
 import frappe
+import numpy as np
 from frappe.model.document import Document
-from frappe.utils import now
+from frappe.utils import now, now_datetime
+
+from is_production.geo_planning.services.surface_cache_service import (
+	POINTS_DOCTYPE as SURFACE_POINTS_DOCTYPE,
+	build_surface_cache,
+	invalidate_surface_cache,
+)
+
+
+GEO_POINT_BULK_CHUNK_SIZE = 5000
+
+GEO_POINT_PARSE_CHUNK_SIZE = GEO_POINT_BULK_CHUNK_SIZE
+
+HEADER_SCAN_BYTES = 64 * 1024
+
+GEO_POINT_STANDARD_FIELDS = [
+	"name",
+	"creation",
+	"modified",
+	"modified_by",
+	"owner",
+	"docstatus",
+]
 
 
 class GeoImportBatch(Document):
@@ -73,13 +98,15 @@ def detect_geo_model_variables(docname):
 
 
 @frappe.whitelist()
-def enqueue_create_geo_model_points(docname, replace_existing=1):
+def enqueue_create_geo_model_points(docname, replace_existing=1, bulk_insert=1, check_links=0):
 	job = frappe.enqueue(
 		"is_production.geo_planning.doctype.geo_import_batch.geo_import_batch.create_geo_model_points_background",
 		queue="long",
 		timeout=7200,
 		docname=docname,
 		replace_existing=int(replace_existing),
+		bulk_insert=int(bulk_insert),
+		check_links=int(check_links),
 		user=frappe.session.user,
 		job_name=f"Create Geo Model Points - {docname}",
 	)
@@ -99,13 +126,15 @@ def enqueue_create_geo_model_points(docname, replace_existing=1):
 
 
 @frappe.whitelist()
-def enqueue_create_pit_outline_points(docname, replace_existing=1):
+def enqueue_create_pit_outline_points(docname, replace_existing=1, bulk_insert=1, check_links=0):
 	job = frappe.enqueue(
 		"is_production.geo_planning.doctype.geo_import_batch.geo_import_batch.create_pit_outline_points_background",
 		queue="long",
 		timeout=7200,
 		docname=docname,
 		replace_existing=int(replace_existing),
+		bulk_insert=int(bulk_insert),
+		check_links=int(check_links),
 		user=frappe.session.user,
 		job_name=f"Create Pit Outline Points - {docname}",
 	)
@@ -125,13 +154,14 @@ def enqueue_create_pit_outline_points(docname, replace_existing=1):
 
 
 @frappe.whitelist()
-def enqueue_create_boundary_pit_outline_points(docname, replace_existing=1):
+def enqueue_create_boundary_pit_outline_points(docname, replace_existing=1, check_links=0):
 	job = frappe.enqueue(
 		"is_production.geo_planning.doctype.geo_import_batch.geo_import_batch.create_boundary_pit_outline_points_background",
 		queue="long",
 		timeout=7200,
 		docname=docname,
 		replace_existing=int(replace_existing),
+		check_links=int(check_links),
 		user=frappe.session.user,
 		job_name=f"Create Boundary Pit Outline Points - {docname}",
 	)
@@ -240,15 +270,25 @@ def _guess_delimiter(line):
 	return None
 
 
-def _read_csv_like_rows(file_path):
-	rows = []
-
+def _read_header_lines(file_path):
+	# Only the first HEADER_SCAN_BYTES are read, so header and delimiter
+	# detection cost the same whatever the size of the model file.
 	with open(file_path, "r", encoding="utf-8-sig", errors="ignore", newline="") as f:
-		lines = f.readlines()
+		head = f.read(HEADER_SCAN_BYTES)
+		truncated = bool(f.read(1))
 
+	lines = head.splitlines()
+
+	if truncated and lines and not head.endswith(("\n", "\r")):
+		lines = lines[:-1]
+
+	return lines
+
+
+def _iter_csv_like_rows(file_path):
 	delimiter = None
 
-	for line in lines:
+	for line in _read_header_lines(file_path):
 		clean = line.strip()
 
 		if not clean:
@@ -257,38 +297,27 @@ def _read_csv_like_rows(file_path):
 		delimiter = _guess_delimiter(clean)
 		break
 
-	if delimiter:
-		for line_no, line in enumerate(lines, start=1):
+	with open(file_path, "r", encoding="utf-8-sig", errors="ignore", newline="") as f:
+		for line_no, line in enumerate(f, start=1):
 			clean = line.strip()
 
 			if not clean:
 				continue
 
-			try:
-				reader = csv.reader([line], delimiter=delimiter)
-				parts = next(reader)
-			except Exception:
-				parts = clean.split(delimiter)
+			if delimiter:
+				try:
+					reader = csv.reader([line], delimiter=delimiter)
+					parts = [p.strip() for p in next(reader)]
+				except Exception:
+					parts = [p.strip() for p in clean.split(delimiter)]
+			else:
+				parts = _split_line(clean)
 
-			rows.append({
+			yield {
 				"line_no": line_no,
-				"parts": [p.strip() for p in parts],
+				"parts": parts,
 				"raw": line,
-			})
-	else:
-		for line_no, line in enumerate(lines, start=1):
-			clean = line.strip()
-
-			if not clean:
-				continue
-
-			rows.append({
-				"line_no": line_no,
-				"parts": _split_line(clean),
-				"raw": line,
-			})
-
-	return rows
+			}
 
 
 def _is_metadata_header_key(key):
@@ -312,32 +341,31 @@ def _is_system_column_key(key):
 def _read_grid_metadata(file_path):
 	metadata = {}
 
-	with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-		for line in f:
-			clean = line.strip()
+	for line in _read_header_lines(file_path):
+		clean = line.strip()
 
-			if not clean:
-				continue
+		if not clean:
+			continue
 
-			if not clean.startswith(";"):
-				break
+		if not clean.startswith(";"):
+			break
 
-			header = clean.replace(";", "", 1).strip()
-			parts = header.split()
+		header = clean.replace(";", "", 1).strip()
+		parts = header.split()
 
-			if not parts:
-				continue
+		if not parts:
+			continue
 
-			key = parts[0].lower()
+		key = parts[0].lower()
 
-			if key in {"origin", "extent", "mesh"} and len(parts) >= 3:
-				metadata[key] = {
-					"x": parts[1],
-					"y": parts[2],
-				}
+		if key in {"origin", "extent", "mesh"} and len(parts) >= 3:
+			metadata[key] = {
+				"x": parts[1],
+				"y": parts[2],
+			}
 
-			elif key == "rotation" and len(parts) >= 2:
-				metadata[key] = " ".join(parts[1:])
+		elif key == "rotation" and len(parts) >= 2:
+			metadata[key] = " ".join(parts[1:])
 
 	return metadata
 
@@ -345,42 +373,41 @@ def _read_grid_metadata(file_path):
 def _read_header_fields(file_path):
 	fields = []
 
-	with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-		for line in f:
-			clean = line.strip()
+	for line in _read_header_lines(file_path):
+		clean = line.strip()
 
-			if not clean:
-				continue
+		if not clean:
+			continue
 
-			if not clean.startswith(";"):
-				break
+		if not clean.startswith(";"):
+			break
 
-			header = clean.replace(";", "", 1).strip()
-			parts = header.split()
+		header = clean.replace(";", "", 1).strip()
+		parts = header.split()
 
-			if len(parts) < 3:
-				continue
+		if len(parts) < 3:
+			continue
 
-			code = parts[0].strip()
+		code = parts[0].strip()
 
-			if _is_metadata_header_key(code):
-				continue
+		if _is_metadata_header_key(code):
+			continue
 
-			if not (_is_number(parts[1]) and _is_number(parts[2])):
-				continue
+		if not (_is_number(parts[1]) and _is_number(parts[2])):
+			continue
 
-			start = int(float(parts[1]))
-			width = int(float(parts[2]))
+		start = int(float(parts[1]))
+		width = int(float(parts[2]))
 
-			if start <= 0 or width <= 0:
-				continue
+		if start <= 0 or width <= 0:
+			continue
 
-			fields.append({
-				"code": code,
-				"code_normalised": _normalise_code(code),
-				"start": start,
-				"width": width,
-			})
+		fields.append({
+			"code": code,
+			"code_normalised": _normalise_code(code),
+			"start": start,
+			"width": width,
+		})
 
 	return fields
 
@@ -428,7 +455,7 @@ def _read_fixed_width_value(line, field):
 	return line[start_index:end_index].strip()
 
 
-def _parse_selected_variable_file(file_path, selected_variable_code):
+def _iter_selected_variable_chunks(file_path, selected_variable_code, chunk_size=GEO_POINT_PARSE_CHUNK_SIZE):
 	selected_variable_code = (selected_variable_code or "").strip()
 
 	if not selected_variable_code:
@@ -437,14 +464,24 @@ def _parse_selected_variable_file(file_path, selected_variable_code):
 	fields = _read_header_fields(file_path)
 
 	if not fields:
-		return _parse_simple_xyz_file(file_path, selected_variable_code)
+		yield from _chunk_point_rows(
+			_iter_simple_xyz_rows(file_path),
+			selected_variable_code,
+			chunk_size,
+		)
+		return
 
 	x_field = _get_field_by_code(fields, "x")
 	y_field = _get_field_by_code(fields, "y")
 	selected_field = _get_selected_field(fields, selected_variable_code)
 
 	if not x_field or not y_field:
-		return _parse_simple_xyz_file(file_path, selected_variable_code)
+		yield from _chunk_point_rows(
+			_iter_simple_xyz_rows(file_path),
+			selected_variable_code,
+			chunk_size,
+		)
+		return
 
 	if not selected_field:
 		available = ", ".join([f["code"] for f in fields if not _is_system_column_key(f["code"])])
@@ -453,26 +490,72 @@ def _parse_selected_variable_file(file_path, selected_variable_code):
 			f"Available variables: {available}"
 		)
 
-	points = _parse_fixed_width_points(
-		file_path=file_path,
-		x_field=x_field,
-		y_field=y_field,
-		selected_field=selected_field,
-	)
+	found_fixed_width_rows = False
 
-	if points:
-		return points
+	for chunk in _chunk_point_rows(
+		_iter_fixed_width_rows(file_path, x_field, y_field, selected_field),
+		selected_field["code"],
+		chunk_size,
+	):
+		found_fixed_width_rows = True
+		yield chunk
 
-	return _parse_split_points_from_header(
-		file_path=file_path,
-		fields=fields,
-		selected_variable_code=selected_field["code"],
+	if found_fixed_width_rows:
+		return
+
+	yield from _chunk_point_rows(
+		_iter_split_rows_from_header(file_path, fields, selected_field["code"]),
+		selected_field["code"],
+		chunk_size,
 	)
 
 
-def _parse_fixed_width_points(file_path, x_field, y_field, selected_field):
-	points = []
+def _chunk_point_rows(rows, variable_code, chunk_size):
+	# Packs (source_line_no, x, y, z) tuples into fixed-size NumPy chunks so
+	# callers never hold more than one chunk of a model file in memory.
+	buffer = []
 
+	for row in rows:
+		buffer.append(row)
+
+		if len(buffer) >= chunk_size:
+			yield _make_point_chunk(buffer, variable_code)
+			buffer = []
+
+	if buffer:
+		yield _make_point_chunk(buffer, variable_code)
+
+
+def _make_point_chunk(rows, variable_code):
+	array = np.array(rows, dtype=np.float64)
+
+	return frappe._dict({
+		"source_line_no": array[:, 0].astype(np.int64),
+		"x": array[:, 1],
+		"y": array[:, 2],
+		"z": array[:, 3],
+		"variable_code": variable_code,
+		"size": len(rows),
+	})
+
+
+def _iter_chunk_points(chunk):
+	for source_line_no, x, y, z in zip(
+		chunk.source_line_no.tolist(),
+		chunk.x.tolist(),
+		chunk.y.tolist(),
+		chunk.z.tolist(),
+	):
+		yield {
+			"source_line_no": source_line_no,
+			"x": x,
+			"y": y,
+			"z": z,
+			"variable_code": chunk.variable_code,
+		}
+
+
+def _iter_fixed_width_rows(file_path, x_field, y_field, selected_field):
 	with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
 		for physical_line_no, line in enumerate(f, start=1):
 			clean = line.strip()
@@ -491,38 +574,28 @@ def _parse_fixed_width_points(file_path, x_field, y_field, selected_field):
 				if not (_is_number(x_raw) and _is_number(y_raw) and _is_number(z_raw)):
 					continue
 
-				points.append({
-					"source_line_no": physical_line_no,
-					"x": _to_float(x_raw),
-					"y": _to_float(y_raw),
-					"z": _to_float(z_raw),
-					"variable_code": selected_field["code"],
-				})
+				yield (physical_line_no, _to_float(x_raw), _to_float(y_raw), _to_float(z_raw))
 
 			except Exception:
 				continue
 
-	return points
-
 
-def _parse_split_points_from_header(file_path, fields, selected_variable_code):
+def _iter_split_rows_from_header(file_path, fields, selected_variable_code):
 	field_codes = [f["code"] for f in fields]
 	lower_codes = [c.lower() for c in field_codes]
 
 	if "x" not in lower_codes or "y" not in lower_codes:
-		return []
+		return
 
 	selected_field = _get_selected_field(fields, selected_variable_code)
 
 	if not selected_field:
-		return []
+		return
 
 	x_index = lower_codes.index("x")
 	y_index = lower_codes.index("y")
 	value_index = field_codes.index(selected_field["code"])
 
-	points = []
-
 	with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
 		for physical_line_no, line in enumerate(f, start=1):
 			clean = line.strip()
@@ -543,23 +616,13 @@ def _parse_split_points_from_header(file_path, fields, selected_variable_code):
 				if not (_is_number(x_raw) and _is_number(y_raw) and _is_number(z_raw)):
 					continue
 
-				points.append({
-					"source_line_no": physical_line_no,
-					"x": _to_float(x_raw),
-					"y": _to_float(y_raw),
-					"z": _to_float(z_raw),
-					"variable_code": selected_field["code"],
-				})
+				yield (physical_line_no, _to_float(x_raw), _to_float(y_raw), _to_float(z_raw))
 
 			except Exception:
 				continue
 
-	return points
-
-
-def _parse_simple_xyz_file(file_path, selected_variable_code):
-	points = []
 
+def _iter_simple_xyz_rows(file_path):
 	with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
 		for physical_line_no, line in enumerate(f, start=1):
 			clean = line.strip()
@@ -574,18 +637,15 @@ def _parse_simple_xyz_file(file_path, selected_variable_code):
 				continue
 
 			try:
-				points.append({
-					"source_line_no": physical_line_no,
-					"x": _to_float(numeric_parts[0]),
-					"y": _to_float(numeric_parts[1]),
-					"z": _to_float(numeric_parts[2]),
-					"variable_code": selected_variable_code,
-				})
+				yield (
+					physical_line_no,
+					_to_float(numeric_parts[0]),
+					_to_float(numeric_parts[1]),
+					_to_float(numeric_parts[2]),
+				)
 			except Exception:
 				continue
 
-	return points
-
 
 def _find_header_row(rows, required_terms):
 	for row in rows:
@@ -635,10 +695,8 @@ def _apply_boundary_transform(raw_x, raw_y, coordinate_transform):
 
 
 def _parse_permit_csv_boundary(file_path, coordinate_transform):
-	rows = _read_csv_like_rows(file_path)
-
 	header_row = _find_header_row(
-		rows,
+		_iter_csv_like_rows(file_path),
 		required_terms=[
 			["y co ord", "x co ord"],
 			["latitude", "longitude"],
@@ -662,7 +720,7 @@ def _parse_permit_csv_boundary(file_path, coordinate_transform):
 	points = []
 	start_collecting = False
 
-	for row in rows:
+	for row in _iter_csv_like_rows(file_path):
 		if row["line_no"] == header_row["line_no"]:
 			start_collecting = True
 			continue
@@ -719,12 +777,11 @@ def _parse_permit_csv_boundary(file_path, coordinate_transform):
 
 
 def _parse_simple_boundary_file(file_path, boundary_format, coordinate_transform):
-	rows = _read_csv_like_rows(file_path)
 	points = []
 
 	header_row = None
 
-	for row in rows:
+	for row in _iter_csv_like_rows(file_path):
 		parts = row["parts"]
 		numeric_count = len([p for p in parts if _is_number(p)])
 
@@ -740,7 +797,7 @@ def _parse_simple_boundary_file(file_path, boundary_format, coordinate_transform
 		z_index = _find_column_index(headers, ["z", "value", "elevation"])
 
 		if x_index is not None and y_index is not None:
-			for row in rows:
+			for row in _iter_csv_like_rows(file_path):
 				if row["line_no"] <= header_row["line_no"]:
 					continue
 
@@ -779,7 +836,7 @@ def _parse_simple_boundary_file(file_path, boundary_format, coordinate_transform
 
 			return points
 
-	for row in rows:
+	for row in _iter_csv_like_rows(file_path):
 		numeric_parts = [p for p in row["parts"] if _is_number(p)]
 
 		if len(numeric_parts) < 2:
@@ -900,7 +957,7 @@ def _publish_complete(
 	)
 
 
-def create_geo_model_points_background(docname, replace_existing=1, user=None):
+def create_geo_model_points_background(docname, replace_existing=1, user=None, bulk_insert=1, check_links=0):
 	try:
 		result = _create_geo_points_for_target(
 			docname=docname,
@@ -909,6 +966,8 @@ def create_geo_model_points_background(docname, replace_existing=1, user=None):
 			target_label="Geo Model Points",
 			batch_fieldname="import_batch",
 			remarks_fieldname="remarks",
+			bulk_insert=bulk_insert,
+			check_links=check_links,
 		)
 
 		_publish_complete(
@@ -950,7 +1009,7 @@ def create_geo_model_points_background(docname, replace_existing=1, user=None):
 		raise
 
 
-def create_pit_outline_points_background(docname, replace_existing=1, user=None):
+def create_pit_outline_points_background(docname, replace_existing=1, user=None, bulk_insert=1, check_links=0):
 	try:
 		result = _create_geo_points_for_target(
 			docname=docname,
@@ -959,6 +1018,8 @@ def create_pit_outline_points_background(docname, replace_existing=1, user=None)
 			target_label="Pit Outline Points",
 			batch_fieldname="geo_import_batch",
 			remarks_fieldname="remarks_comments",
+			bulk_insert=bulk_insert,
+			check_links=check_links,
 		)
 
 		_publish_complete(
@@ -1000,11 +1061,12 @@ def create_pit_outline_points_background(docname, replace_existing=1, user=None)
 		raise
 
 
-def create_boundary_pit_outline_points_background(docname, replace_existing=1, user=None):
+def create_boundary_pit_outline_points_background(docname, replace_existing=1, user=None, check_links=0):
 	try:
 		result = create_boundary_pit_outline_points(
 			docname=docname,
 			replace_existing=replace_existing,
+			check_links=check_links,
 		)
 
 		_publish_complete(
@@ -1047,7 +1109,7 @@ def create_boundary_pit_outline_points_background(docname, replace_existing=1, u
 
 
 @frappe.whitelist()
-def create_geo_model_points(docname, replace_existing=1):
+def create_geo_model_points(docname, replace_existing=1, bulk_insert=1, check_links=0):
 	return _create_geo_points_for_target(
 		docname=docname,
 		replace_existing=replace_existing,
@@ -1055,11 +1117,13 @@ def create_geo_model_points(docname, replace_existing=1):
 		target_label="Geo Model Points",
 		batch_fieldname="import_batch",
 		remarks_fieldname="remarks",
+		bulk_insert=bulk_insert,
+		check_links=check_links,
 	)
 
 
 @frappe.whitelist()
-def create_pit_outline_points(docname, replace_existing=1):
+def create_pit_outline_points(docname, replace_existing=1, bulk_insert=1, check_links=0):
 	return _create_geo_points_for_target(
 		docname=docname,
 		replace_existing=replace_existing,
@@ -1067,11 +1131,13 @@ def create_pit_outline_points(docname, replace_existing=1):
 		target_label="Pit Outline Points",
 		batch_fieldname="geo_import_batch",
 		remarks_fieldname="remarks_comments",
+		bulk_insert=bulk_insert,
+		check_links=check_links,
 	)
 
 
 @frappe.whitelist()
-def create_boundary_pit_outline_points(docname, replace_existing=1):
+def create_boundary_pit_outline_points(docname, replace_existing=1, check_links=0):
 	batch = frappe.get_doc("Geo Import Batch", docname)
 
 	if not batch.raw_file_attachment:
@@ -1147,33 +1213,21 @@ def create_boundary_pit_outline_points(docname, replace_existing=1):
 	batch_fieldname = "geo_import_batch"
 	remarks_fieldname = "remarks_comments"
 
-	if replace_existing:
-		existing_filters = {}
-
-		if _doctype_has_field(target_doctype, batch_fieldname):
-			existing_filters[batch_fieldname] = docname
+	purge_result = {"deleted_count": 0, "seconds": 0}
 
-		if _doctype_has_field(target_doctype, "variable_code"):
-			existing_filters["variable_code"] = variable_code
-		elif _doctype_has_field(target_doctype, "variable_name"):
-			existing_filters["variable_name"] = full_name
-
-		existing_points = frappe.get_all(
+	if int(replace_existing or 0):
+		purge_result = _purge_existing_points(
 			target_doctype,
-			filters=existing_filters,
-			pluck="name",
+			_get_existing_point_filters(
+				target_doctype=target_doctype,
+				batch_fieldname=batch_fieldname,
+				docname=docname,
+				variable_code=variable_code,
+				full_name=full_name,
+			),
+			check_links=check_links,
 		)
 
-		for point_name in existing_points:
-			frappe.delete_doc(
-				target_doctype,
-				point_name,
-				force=True,
-				ignore_permissions=True,
-			)
-
-		frappe.db.commit()
-
 	success_count = 0
 	error_count = 0
 	error_messages = []
@@ -1271,6 +1325,7 @@ def create_boundary_pit_outline_points(docname, replace_existing=1):
 				f"Full Name: {full_name}",
 				f"Version Tag: {batch.version_tag}",
 				f"Geo Model Output: {geo_model_output}",
+				f"Existing rows removed: {purge_result['deleted_count']} in {purge_result['seconds']}s",
 				"",
 				"Bounds:",
 				f"Min X: {min_x}",
@@ -1300,6 +1355,234 @@ def create_boundary_pit_outline_points(docname, replace_existing=1):
 	}
 
 
+def _get_existing_point_filters(target_doctype, batch_fieldname, docname, variable_code, full_name):
+	existing_filters = {}
+
+	if _doctype_has_field(target_doctype, batch_fieldname):
+		existing_filters[batch_fieldname] = docname
+
+	if _doctype_has_field(target_doctype, "variable_code"):
+		existing_filters["variable_code"] = variable_code
+	elif _doctype_has_field(target_doctype, "variable_name"):
+		existing_filters["variable_name"] = full_name
+
+	return existing_filters
+
+
+def _get_linked_point_references(target_doctype, filters):
+	link_fields = frappe.get_all(
+		"DocField",
+		filters={"fieldtype": "Link", "options": target_doctype},
+		fields=["parent", "fieldname"],
+	)
+	link_fields += frappe.get_all(
+		"Custom Field",
+		filters={"fieldtype": "Link", "options": target_doctype},
+		fields=["dt as parent", "fieldname"],
+	)
+
+	conditions = " AND ".join([f"`{fieldname}` = %({fieldname})s" for fieldname in filters]) or "1=1"
+	references = []
+
+	for link in link_fields:
+		linked_count = frappe.db.sql(
+			f"""
+			SELECT COUNT(*)
+			FROM `tab{link.parent}`
+			WHERE `{link.fieldname}` IN (
+				SELECT name
+				FROM `tab{target_doctype}`
+				WHERE {conditions}
+			)
+			""",
+			filters,
+		)[0][0]
+
+		if linked_count:
+			references.append(f"{link.parent}.{link.fieldname}: {linked_count}")
+
+	return references
+
+
+def _purge_existing_points(target_doctype, filters, check_links=0):
+	# One filtered DELETE instead of frappe.delete_doc per point. Point
+	# doctypes have no child tables or delete hooks, so nothing is skipped
+	# unless another doctype links to them; check_links guards that case.
+	started = time.perf_counter()
+
+	if int(check_links or 0):
+		references = _get_linked_point_references(target_doctype, filters)
+
+		if references:
+			frappe.throw(
+				f"Cannot replace existing {target_doctype}: other records still link to them.<br>"
+				+ "<br>".join(references)
+			)
+
+	deleted_count = frappe.db.count(target_doctype, filters=filters)
+
+	if deleted_count:
+		frappe.db.delete(target_doctype, filters)
+
+	frappe.db.commit()
+
+	return {
+		"deleted_count": deleted_count,
+		"seconds": round(time.perf_counter() - started, 3),
+	}
+
+
+def _get_point_insert_context(
+	batch,
+	target_doctype,
+	target_label,
+	batch_fieldname,
+	remarks_fieldname,
+	geo_model_output,
+	variable_code,
+	full_name,
+):
+	return frappe._dict({
+		"docname": batch.name,
+		"geo_project": batch.geo_project,
+		"version_tag": batch.version_tag,
+		"raw_file_attachment": batch.raw_file_attachment,
+		"geo_model_output": geo_model_output,
+		"variable_code": variable_code,
+		"full_name": full_name,
+		"target_doctype": target_doctype,
+		"target_label": target_label,
+		"batch_fieldname": batch_fieldname,
+		"remarks_fieldname": remarks_fieldname,
+		"has_variable_code": _doctype_has_field(target_doctype, "variable_code"),
+		"has_full_name": _doctype_has_field(target_doctype, "full_name"),
+		"has_batch_field": _doctype_has_field(target_doctype, batch_fieldname),
+		"has_remarks_field": _doctype_has_field(target_doctype, remarks_fieldname),
+	})
+
+
+def _build_geo_point_values(context, index, point):
+	values = {
+		"geo_project": context.geo_project,
+		"geo_model_output": context.geo_model_output,
+		"row_no": index,
+		"x": float(point["x"]),
+		"y": float(point["y"]),
+		"z": float(point["z"]),
+		"variable_name": context.full_name,
+		"version_tag": context.version_tag,
+		"status": "Draft",
+	}
+
+	if context.has_batch_field:
+		values[context.batch_fieldname] = context.docname
+
+	if context.has_variable_code:
+		values["variable_code"] = context.variable_code
+
+	if context.has_full_name:
+		values["full_name"] = context.full_name
+
+	if context.has_remarks_field:
+		values[context.remarks_fieldname] = (
+			f"Imported from {context.raw_file_attachment}; "
+			f"source line {point['source_line_no']}; "
+			f"variable code {context.variable_code}; "
+			f"target {context.target_label}"
+		)
+
+	return values
+
+
+def _insert_geo_points_per_doc(context, points, start_index=1):
+	success_count = 0
+	error_count = 0
+	error_messages = []
+
+	for index, point in enumerate(points, start=start_index):
+		try:
+			point_data = _build_geo_point_values(context, index, point)
+			point_data["doctype"] = context.target_doctype
+
+			point_doc = frappe.get_doc(point_data)
+			point_doc.insert(ignore_permissions=True)
+			success_count += 1
+
+		except Exception as e:
+			error_count += 1
+			error_messages.append(
+				f"Row {index}, source line {point.get('source_line_no')}: {str(e)}"
+			)
+
+	return success_count, error_count, error_messages
+
+
+def _generate_point_names(count):
+	names = set()
+
+	while len(names) < count:
+		names.add(frappe.generate_hash(length=10))
+
+	return list(names)
+
+
+def _insert_geo_points_bulk(context, points, start_index=1, commit=True):
+	# Writes one chunk straight to the table in a multi-row INSERT. This skips
+	# per-document validation and hooks, so values are typed here instead.
+	success_count = 0
+	error_count = 0
+	error_messages = []
+	timestamp = now_datetime()
+	user = frappe.session.user or "Administrator"
+	fieldnames = None
+	rows = []
+	index = start_index - 1
+
+	for index, point in enumerate(points, start=start_index):
+		try:
+			point_values = _build_geo_point_values(context, index, point)
+		except Exception as e:
+			error_count += 1
+			error_messages.append(
+				f"Row {index}, source line {point.get('source_line_no')}: {str(e)}"
+			)
+			continue
+
+		if fieldnames is None:
+			fieldnames = list(point_values)
+
+		rows.append([point_values[fieldname] for fieldname in fieldnames])
+
+	if not rows:
+		return success_count, error_count, error_messages
+
+	names = _generate_point_names(len(rows))
+	values = [
+		(name, timestamp, timestamp, user, user, 0, *row)
+		for name, row in zip(names, rows)
+	]
+
+	try:
+		frappe.db.bulk_insert(
+			context.target_doctype,
+			fields=[*GEO_POINT_STANDARD_FIELDS, *fieldnames],
+			values=values,
+			chunk_size=GEO_POINT_BULK_CHUNK_SIZE,
+		)
+	except Exception as e:
+		if commit:
+			frappe.db.rollback()
+
+		error_count += len(rows)
+		error_messages.append(f"Rows {start_index} to {index}: {str(e)}")
+		return 0, error_count, error_messages
+
+	if commit:
+		frappe.db.commit()
+
+	return len(rows), error_count, error_messages
+
+
 def _create_geo_points_for_target(
 	docname,
 	replace_existing=1,
@@ -1307,6 +1590,8 @@ def _create_geo_points_for_target(
 	target_label=None,
 	batch_fieldname=None,
 	remarks_fieldname=None,
+	bulk_insert=1,
+	check_links=0,
 ):
 	batch = frappe.get_doc("Geo Import Batch", docname)
 
@@ -1344,10 +1629,10 @@ def _create_geo_points_for_target(
 	)
 	frappe.db.commit()
 
-	points = _parse_selected_variable_file(file_path, variable_code)
-	row_count = len(points)
+	chunks = _iter_selected_variable_chunks(file_path, variable_code)
+	first_chunk = next(chunks, None)
 
-	if row_count == 0:
+	if first_chunk is None:
 		available_variables = _detect_variables_from_header(file_path)
 
 		_set_batch_status(
@@ -1380,102 +1665,75 @@ def _create_geo_points_for_target(
 	geo_model_output = _get_geo_model_output(batch)
 	file_hash = _get_file_hash(file_path)
 
-	if replace_existing:
-		existing_filters = {}
+	if target_doctype == SURFACE_POINTS_DOCTYPE:
+		invalidate_surface_cache(docname)
 
-		if _doctype_has_field(target_doctype, batch_fieldname):
-			existing_filters[batch_fieldname] = docname
+	purge_result = {"deleted_count": 0, "seconds": 0}
 
-		if _doctype_has_field(target_doctype, "variable_code"):
-			existing_filters["variable_code"] = variable_code
-		elif _doctype_has_field(target_doctype, "variable_name"):
-			existing_filters["variable_name"] = full_name
-
-		existing_points = frappe.get_all(
+	if int(replace_existing or 0):
+		purge_result = _purge_existing_points(
 			target_doctype,
-			filters=existing_filters,
-			pluck="name",
+			_get_existing_point_filters(
+				target_doctype=target_doctype,
+				batch_fieldname=batch_fieldname,
+				docname=docname,
+				variable_code=variable_code,
+				full_name=full_name,
+			),
+			check_links=check_links,
 		)
 
-		for point_name in existing_points:
-			frappe.delete_doc(
-				target_doctype,
-				point_name,
-				force=True,
-				ignore_permissions=True,
-			)
-
-		frappe.db.commit()
+	context = _get_point_insert_context(
+		batch=batch,
+		target_doctype=target_doctype,
+		target_label=target_label,
+		batch_fieldname=batch_fieldname,
+		remarks_fieldname=remarks_fieldname,
+		geo_model_output=geo_model_output,
+		variable_code=variable_code,
+		full_name=full_name,
+	)
 
-	target_has_variable_code = _doctype_has_field(target_doctype, "variable_code")
-	target_has_full_name = _doctype_has_field(target_doctype, "full_name")
-	target_has_batch_field = _doctype_has_field(target_doctype, batch_fieldname)
-	target_has_remarks_field = _doctype_has_field(target_doctype, remarks_fieldname)
+	load_mode = "Bulk" if int(bulk_insert or 0) else "Per Document"
+	insert_points = _insert_geo_points_bulk if load_mode == "Bulk" else _insert_geo_points_per_doc
 
+	row_count = 0
 	success_count = 0
 	error_count = 0
 	error_messages = []
 
-	for index, point in enumerate(points, start=1):
-		try:
-			point_data = {
-				"doctype": target_doctype,
-				"geo_project": batch.geo_project,
-				"geo_model_output": geo_model_output,
-				"row_no": index,
-				"x": point["x"],
-				"y": point["y"],
-				"z": point["z"],
-				"variable_name": full_name,
-				"version_tag": batch.version_tag,
-				"status": "Draft",
-			}
-
-			if target_has_batch_field:
-				point_data[batch_fieldname] = docname
-
-			if target_has_variable_code:
-				point_data["variable_code"] = variable_code
-
-			if target_has_full_name:
-				point_data["full_name"] = full_name
-
-			if target_has_remarks_field:
-				point_data[remarks_fieldname] = (
-					f"Imported from {batch.raw_file_attachment}; "
-					f"source line {point['source_line_no']}; "
-					f"variable code {variable_code}; "
-					f"target {target_label}"
-				)
+	for chunk in itertools.chain([first_chunk], chunks):
+		chunk_success, chunk_errors, chunk_messages = insert_points(
+			context,
+			_iter_chunk_points(chunk),
+			start_index=row_count + 1,
+		)
 
-			point_doc = frappe.get_doc(point_data)
-			point_doc.insert(ignore_permissions=True)
-			success_count += 1
+		row_count += chunk.size
+		success_count += chunk_success
+		error_count += chunk_errors
 
-			if success_count % 1000 == 0:
-				_set_batch_status(
-					docname,
-					{
-						"row_count": row_count,
-						"success_count": success_count,
-						"error_count": error_count,
-						"processing_status": "Validated",
-						"import_log": (
-							f"{target_label} import running at {now()}...\n"
-							f"Variable Code: {variable_code}\n"
-							f"Full Name: {full_name}\n"
-							f"Rows found: {row_count}\n"
-							f"Rows created so far: {success_count}\n"
-							f"Rows failed so far: {error_count}"
-						),
-					},
-				)
+		if len(error_messages) < 100:
+			error_messages.extend(chunk_messages[:100 - len(error_messages)])
 
-		except Exception as e:
-			error_count += 1
-			error_messages.append(
-				f"Row {index}, source line {point.get('source_line_no')}: {str(e)}"
-			)
+		_set_batch_status(
+			docname,
+			{
+				"row_count": row_count,
+				"success_count": success_count,
+				"error_count": error_count,
+				"processing_status": "Validated",
+				"import_log": (
+					f"{target_label} import running at {now()}...\n"
+					f"Load Mode: {load_mode}\n"
+					f"Variable Code: {variable_code}\n"
+					f"Full Name: {full_name}\n"
+					f"Rows read so far: {row_count}\n"
+					f"Rows created so far: {success_count}\n"
+					f"Rows failed so far: {error_count}"
+				),
+			},
+		)
 
 	metadata_lines = []
 
@@ -1516,6 +1774,7 @@ def _create_geo_points_for_target(
 				f"Full Name: {full_name}",
 				f"Version Tag: {batch.version_tag}",
 				f"Geo Model Output: {geo_model_output}",
+				f"Existing rows removed: {purge_result['deleted_count']} in {purge_result['seconds']}s",
 				"",
 				"Grid Metadata:",
 				"\n".join(metadata_lines) if metadata_lines else "None",
@@ -1530,6 +1789,15 @@ def _create_geo_points_for_target(
 		},
 	)
 
+	if target_doctype == SURFACE_POINTS_DOCTYPE and success_count:
+		try:
+			build_surface_cache(docname)
+		except Exception:
+			frappe.log_error(
+				frappe.get_traceback(),
+				f"Geo surface cache build failed for {docname}",
+			)
+
 	return {
 		"row_count": row_count,
 		"success_count": success_count,
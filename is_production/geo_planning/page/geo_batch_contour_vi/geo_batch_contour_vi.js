@@ -6,6 +6,8 @@ frappe.pages["geo-batch-contour-vi"].on_page_load = function(wrapper) {
 	});
 
 	let points = [];
+	let pointsLevel = 0;
+	let loadToken = 0;
 	let pitOutlinePoints = [];
 	let generatedBlocks = [];
 	let contourLines = [];
@@ -19,6 +21,10 @@ frappe.pages["geo-batch-contour-vi"].on_page_load = function(wrapper) {
 	let autoNumberBlocks = false;
 	let rotateViewMode = false;
 
+	// Batch surfaces paint first from a coarse pyramid level, then full
+	// resolution replaces them once it arrives.
+	const FIRST_PAINT_MAX_POINTS = 5000;
+
 	let outlineEdgesCache = null;
 	let pitCellSizeCache = null;
 	let blockCacheKey = "";
@@ -632,6 +638,8 @@ frappe.pages["geo-batch-contour-vi"].on_page_load = function(wrapper) {
 		filters.variable_name.set_value("");
 
 		points = [];
+		pointsLevel = 0;
+		loadToken++;
 		hoverPoint = null;
 		hoverBlock = null;
 		selectedBlock = null;
@@ -651,6 +659,8 @@ frappe.pages["geo-batch-contour-vi"].on_page_load = function(wrapper) {
 		filters.version_tag.set_value("");
 
 		points = [];
+		pointsLevel = 0;
+		loadToken++;
 		pitOutlinePoints = [];
 		hoverPoint = null;
 		hoverBlock = null;
@@ -851,6 +861,8 @@ frappe.pages["geo-batch-contour-vi"].on_page_load = function(wrapper) {
 
 	function load_all_data() {
 		points = [];
+		pointsLevel = 0;
+		loadToken++;
 		pitOutlinePoints = [];
 		hoverPoint = null;
 		hoverBlock = null;
@@ -916,6 +928,10 @@ frappe.pages["geo-batch-contour-vi"].on_page_load = function(wrapper) {
 			fit_view();
 			draw();
 
+			if (pointsLevel > 0) {
+				load_full_resolution_points(loadToken);
+			}
+
 			if (!points.length && pitOutlinePoints.length) {
 				frappe.show_alert({
 					message: "Pit outline loaded. No model/depth points matched the selected filters.",
@@ -925,7 +941,98 @@ frappe.pages["geo-batch-contour-vi"].on_page_load = function(wrapper) {
 		});
 	}
 
+	function decode_surface_buffer(surface) {
+		// Server sends float32 x/y/z offsets from surface.origin as base64.
+		if (!surface || !surface.buffer) return [];
+
+		const binary = atob(surface.buffer);
+		const bytes = new Uint8Array(binary.length);
+
+		for (let i = 0; i < binary.length; i++) {
+			bytes[i] = binary.charCodeAt(i);
+		}
+
+		const values = new Float32Array(bytes.buffer);
+		const origin = surface.origin || { x: 0, y: 0, z: 0 };
+		const decoded = new Array(values.length / 3);
+
+		for (let i = 0, j = 0; i < values.length; i += 3, j++) {
+			decoded[j] = {
+				x: values[i] + origin.x,
+				y: values[i + 1] + origin.y,
+				z: values[i + 2] + origin.z,
+				calculated_z: null,
+				reference_z: null,
+				target_z: null,
+				reference_variable_code: "",
+				target_variable_code: "",
+				variable_name: surface.label || "",
+				variable_code: "",
+				full_name: "",
+				version_tag: surface.version_tag || "",
+				import_batch: surface.batch || "",
+				calculation_batch: "",
+				geo_model_output: surface.geo_model_output || "",
+				data_source: "Geo Model"
+			};
+		}
+
+		return decoded;
+	}
+
+	function load_full_resolution_points(token) {
+		load_batch_surface_buffer_promise({ level: 0 }, token).then(() => {
+			if (token !== loadToken) return;
+
+			hoverPoint = null;
+			invalidate_geometry_cache();
+			draw();
+		}).catch((err) => {
+			console.error("Full resolution load failed:", err);
+			frappe.show_alert({
+				message: "Full resolution points could not load. Showing reduced detail.",
+				indicator: "orange"
+			});
+		});
+	}
+
+	function load_batch_surface_buffer_promise(lod, token) {
+		const requestToken = token === undefined ? loadToken : token;
+
+		return new Promise((resolve, reject) => {
+			frappe.call({
+				method: "is_production.geo_planning.page.geo_batch_contour_vi.geo_batch_contour_vi.get_batch_surface_buffer",
+				args: Object.assign({
+					import_batch: filters.import_batch.get_value(),
+					geo_project: filters.geo_project.get_value(),
+					geo_model_output: filters.geo_model_output.get_value(),
+					version_tag: filters.version_tag.get_value(),
+					variable_name: filters.variable_name.get_value(),
+					z_filter_enabled: is_z_filter_enabled() ? 1 : 0,
+					z_filter_mode: filters.z_filter_mode.get_value(),
+					z_filter_value: filters.z_filter_value.get_value(),
+					z_filter_value_to: filters.z_filter_value_to.get_value()
+				}, lod || {}),
+				callback(r) {
+					if (requestToken === loadToken) {
+						points = decode_surface_buffer(r.message);
+						pointsLevel = (r.message && r.message.level) || 0;
+					}
+
+					resolve();
+				},
+				error(err) {
+					reject(err);
+				}
+			});
+		});
+	}
+
 	function load_geo_model_points_promise() {
+		if (get_data_source() === "Geo Model" && filters.import_batch.get_value()) {
+			return load_batch_surface_buffer_promise({ max_points: FIRST_PAINT_MAX_POINTS });
+		}
+
 		return new Promise((resolve, reject) => {
 			frappe.call({
 				method: "is_production.geo_planning.page.geo_batch_contour_vi.geo_batch_contour_vi.get_geo_points",
@@ -1384,6 +1491,11 @@ frappe.pages["geo-batch-contour-vi"].on_page_load = function(wrapper) {
 			return;
 		}
 
+		if (pointsLevel > 0) {
+			frappe.msgprint("Full resolution points are still loading. Please try again in a moment.");
+			return;
+		}
+
 		if (!blockSize.x || !blockSize.y) {
 			frappe.msgprint("Please enter a valid Mining Block Size, for example 100 x 40.");
 			return;
@@ -2175,7 +2287,7 @@ frappe.pages["geo-batch-contour-vi"].on_page_load = function(wrapper) {
 		infoParts.push(`<b>Contours:</b> ${showContours ? `${get_contour_interval()} interval (${contourLines.length.toLocaleString()} segments)` : "Off"}`);
 
 		if (modelBounds) {
-			infoParts.push(`<b>Points:</b> ${points.length.toLocaleString()}`);
+			infoParts.push(`<b>Points:</b> ${points.length.toLocaleString()}${pointsLevel > 0 ? " (reduced detail, loading full resolution...)" : ""}`);
 			infoParts.push(`<b>X:</b> ${modelBounds.minX.toFixed(2)} - ${modelBounds.maxX.toFixed(2)}`);
 			infoParts.push(`<b>Y:</b> ${modelBounds.minY.toFixed(2)} - ${modelBounds.maxY.toFixed(2)}`);
 			infoParts.push(`<b>${get_z_label()}:</b> ${modelBounds.minZ.toFixed(2)} - ${modelBounds.maxZ.toFixed(2)}`);
@@ -1,6 +1,14 @@
 import json
 import frappe
 
+from is_production.geo_planning.services.surface_cache_service import (
+	decode_points,
+	encode_surface,
+	get_surface_level,
+	matches_filters,
+	z_filter_mask,
+)
+
 
 def _doctype_has_field(doctype, fieldname):
 	return fieldname in [df.fieldname for df in frappe.get_meta(doctype).fields]
@@ -120,7 +128,10 @@ def get_geo_points(
 	z_filter_enabled=None,
 	z_filter_mode=None,
 	z_filter_value=None,
-	z_filter_value_to=None
+	z_filter_value_to=None,
+	level=None,
+	max_points=None,
+	bbox=None
 ):
 	data_source = data_source or "Geo Model"
 
@@ -139,6 +150,34 @@ def get_geo_points(
 
 	doctype = "Geo Model Points"
 
+	if import_batch and (level not in (None, "") or max_points or bbox):
+		surface_meta, offsets, mask = _get_filtered_surface(
+			import_batch,
+			geo_project=geo_project,
+			version_tag=version_tag,
+			variable_name=variable_name,
+			geo_model_output=geo_model_output,
+			z_filter_enabled=z_filter_enabled,
+			z_filter_mode=z_filter_mode,
+			z_filter_value=z_filter_value,
+			z_filter_value_to=z_filter_value_to,
+			level=level,
+			max_points=max_points,
+			bbox=bbox,
+		)[:3]
+
+		return [
+			dict(
+				point,
+				variable_name=surface_meta.get("label"),
+				version_tag=surface_meta.get("point_version_tag"),
+				geo_project=surface_meta.get("geo_project"),
+				geo_model_output=surface_meta.get("geo_model_output"),
+				import_batch=import_batch,
+			)
+			for point in decode_points(surface_meta, offsets, mask=mask)
+		]
+
 	raw_filters = {
 		"geo_project": geo_project,
 		"version_tag": version_tag,
@@ -689,3 +728,85 @@ def get_batch_elevation_points(
 		z_filter_value=z_filter_value,
 		z_filter_value_to=z_filter_value_to,
 	)
+
+
+@frappe.whitelist()
+def get_batch_surface_buffer(
+	import_batch,
+	geo_project=None,
+	version_tag=None,
+	variable_name=None,
+	geo_model_output=None,
+	z_filter_enabled=None,
+	z_filter_mode=None,
+	z_filter_value=None,
+	z_filter_value_to=None,
+	level=None,
+	max_points=None,
+	bbox=None
+):
+	"""Binary variant of get_batch_elevation_points for a single import batch.
+
+	Served from the cached float32 surface artifact. Points are x/y/z offsets
+	from the returned origin, base64 encoded. level, max_points and bbox pick a
+	level-of-detail tile; without them the full surface is returned.
+	"""
+	meta, offsets, mask, resolved_level = _get_filtered_surface(
+		import_batch,
+		geo_project=geo_project,
+		version_tag=version_tag,
+		variable_name=variable_name,
+		geo_model_output=geo_model_output,
+		z_filter_enabled=z_filter_enabled,
+		z_filter_mode=z_filter_mode,
+		z_filter_value=z_filter_value,
+		z_filter_value_to=z_filter_value_to,
+		level=level,
+		max_points=max_points,
+		bbox=bbox,
+	)
+
+	return encode_surface(meta, offsets, mask=mask, level=resolved_level)
+
+
+def _get_filtered_surface(
+	import_batch,
+	geo_project=None,
+	version_tag=None,
+	variable_name=None,
+	geo_model_output=None,
+	z_filter_enabled=None,
+	z_filter_mode=None,
+	z_filter_value=None,
+	z_filter_value_to=None,
+	level=None,
+	max_points=None,
+	bbox=None
+):
+	meta, offsets, mask, resolved_level = get_surface_level(
+		import_batch,
+		level=level,
+		max_points=max_points,
+		bbox=bbox,
+	)
+
+	if not matches_filters(
+		meta,
+		geo_project=geo_project,
+		geo_model_output=geo_model_output,
+		version_tag=version_tag,
+		variable_name=variable_name,
+	):
+		return meta, offsets, slice(0, 0), resolved_level
+
+	if _is_enabled(z_filter_enabled):
+		z = offsets[:, 2].astype("float64") + meta["origin"]["z"]
+		z_mask = z_filter_mask(
+			z,
+			mode=z_filter_mode,
+			value=_float(z_filter_value, None),
+			value_to=_float(z_filter_value_to, None),
+		)
+		mask = z_mask if mask is None else (mask & z_mask)
+
+	return meta, offsets, mask, resolved_level
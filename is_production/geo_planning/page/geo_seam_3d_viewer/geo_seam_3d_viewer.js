@@ -19,6 +19,11 @@ frappe.pages["geo-seam-3d-viewer"].on_page_load = function(wrapper) {
 	let THREE = null;
 	let OrbitControls = null;
 	let STLExporter = null;
+	let loadToken = 0;
+
+	// First paint asks the server for a coarse pyramid level per surface;
+	// full resolution is fetched straight after and swapped in.
+	const FIRST_PAINT_MAX_POINTS = 5000;
 
 	const state = {
 		showPoints: true,
@@ -596,35 +601,95 @@ frappe.pages["geo-seam-3d-viewer"].on_page_load = function(wrapper) {
 
 		show_loading("Loading selected batches...");
 
+		const token = ++loadToken;
+
+		fetch_surface_buffers(batches, { max_points: FIRST_PAINT_MAX_POINTS }, function(loaded) {
+			if (token !== loadToken) return;
+
+			hide_loading();
+			surfaces = loaded;
+
+			if (!surfaces.length) {
+				frappe.msgprint("No points were found for the selected batches.");
+			}
+
+			render_surfaces();
+			reset_camera();
+			update_info_box();
+			update_legend();
+
+			if (surfaces.some(surface => surface.level > 0)) {
+				load_full_resolution(batches, token);
+			}
+		}, function(err) {
+			hide_loading();
+			console.error(err);
+			frappe.msgprint("Could not load 3D surface data. Please check the server error log.");
+		});
+	}
+
+	function load_full_resolution(batches, token) {
+		fetch_surface_buffers(batches, { level: 0 }, function(loaded) {
+			if (token !== loadToken) return;
+
+			surfaces = loaded;
+			render_surfaces();
+			update_info_box();
+			update_legend();
+		}, function(err) {
+			console.error(err);
+			frappe.show_alert({
+				message: "Full resolution surfaces could not load. Showing reduced detail.",
+				indicator: "orange"
+			});
+		});
+	}
+
+	function fetch_surface_buffers(batches, lod, on_success, on_error) {
 		frappe.call({
-			method: method_path("get_multi_batch_surfaces"),
-			args: {
+			method: method_path("get_multi_batch_surface_buffers"),
+			args: Object.assign({
 				geo_project: filters.geo_project.get_value(),
 				geo_model_output: filters.geo_model_output.get_value(),
 				version_tag: filters.version_tag.get_value(),
 				model_batches: JSON.stringify(batches)
-			},
+			}, lod),
 			callback: function(r) {
-				hide_loading();
-				surfaces = r.message || [];
-
-				if (!surfaces.length) {
-					frappe.msgprint("No points were found for the selected batches.");
-				}
-
-				render_surfaces();
-				reset_camera();
-				update_info_box();
-				update_legend();
+				on_success((r.message || []).map(surface => Object.assign(surface, {
+					points: decode_surface_buffer(surface)
+				})));
 			},
-			error: function(err) {
-				hide_loading();
-				console.error(err);
-				frappe.msgprint("Could not load 3D surface data. Please check the server error log.");
-			}
+			error: on_error
 		});
 	}
 
+	function decode_surface_buffer(surface) {
+		// Server sends float32 x/y/z offsets from surface.origin as base64.
+		if (!surface.buffer) return [];
+
+		const binary = atob(surface.buffer);
+		const bytes = new Uint8Array(binary.length);
+
+		for (let i = 0; i < binary.length; i++) {
+			bytes[i] = binary.charCodeAt(i);
+		}
+
+		const values = new Float32Array(bytes.buffer);
+		const origin = surface.origin || { x: 0, y: 0, z: 0 };
+		const points = new Array(values.length / 3);
+
+		for (let i = 0, j = 0; i < values.length; i += 3, j++) {
+			points[j] = {
+				x: values[i] + origin.x,
+				y: values[i + 1] + origin.y,
+				z: values[i + 2] + origin.z
+			};
+		}
+
+		delete surface.buffer;
+		return points;
+	}
+
 	function get_all_points() {
 		const all = [];
 
@@ -1021,6 +1086,11 @@ frappe.pages["geo-seam-3d-viewer"].on_page_load = function(wrapper) {
 		const info = [];
 		info.push(`<b>Surfaces:</b> ${surfaces.length}`);
 		info.push(`<b>Total Points:</b> ${totalPoints.toLocaleString()}`);
+
+		if (surfaces.some(s => s.level > 0)) {
+			info.push(`<b>Detail:</b> reduced, loading full resolution...`);
+		}
+
 		info.push(`<b>X:</b> ${Math.min(...xs).toFixed(2)} - ${Math.max(...xs).toFixed(2)}`);
 		info.push(`<b>Y:</b> ${Math.min(...ys).toFixed(2)} - ${Math.max(...ys).toFixed(2)}`);
 		info.push(`<b>Elevation Z:</b> ${Math.min(...zs).toFixed(2)} - ${Math.max(...zs).toFixed(2)}`);
@@ -1,6 +1,13 @@
 import json
 import frappe
 
+from is_production.geo_planning.services.surface_cache_service import (
+	decode_points,
+	encode_surface,
+	get_surface_level,
+	matches_filters,
+)
+
 
 def _doctype_has_field(doctype, fieldname):
 	return fieldname in [df.fieldname for df in frappe.get_meta(doctype).fields]
@@ -134,7 +141,10 @@ def get_multi_batch_surfaces(
 	geo_project=None,
 	geo_model_output=None,
 	version_tag=None,
-	model_batches=None
+	model_batches=None,
+	level=None,
+	max_points=None,
+	bbox=None
 ):
 	"""
 	Load X/Y/Z points for multiple selected model/import batches.
@@ -148,6 +158,9 @@ def get_multi_batch_surfaces(
 			"stats": {...}
 		}
 	]
+
+	Passing level, max_points or bbox serves the points from the surface
+	cache pyramid instead (see get_surface_tile).
 	"""
 	doctype = "Geo Model Points"
 
@@ -159,6 +172,32 @@ def get_multi_batch_surfaces(
 	if not batches:
 		return []
 
+	if _wants_lod(level, max_points, bbox):
+		surfaces = []
+
+		for batch in batches:
+			meta, offsets, mask, resolved_level = get_surface_level(batch, level=level, max_points=max_points, bbox=bbox)
+
+			if not matches_filters(
+				meta,
+				geo_project=geo_project,
+				geo_model_output=geo_model_output,
+				version_tag=version_tag,
+			):
+				points = []
+			else:
+				points = decode_points(meta, offsets, mask=mask)
+
+			surfaces.append({
+				"batch": batch,
+				"label": meta.get("label") if points else batch,
+				"level": resolved_level,
+				"points": points,
+				"stats": meta.get("stats") if points else _get_point_stats([])
+			})
+
+		return surfaces
+
 	batch_field = _get_batch_field(doctype)
 
 	if not batch_field:
@@ -245,6 +284,87 @@ def get_multi_batch_surfaces(
 	return surfaces
 
 
+@frappe.whitelist()
+def get_multi_batch_surface_buffers(
+	geo_project=None,
+	geo_model_output=None,
+	version_tag=None,
+	model_batches=None,
+	level=None,
+	max_points=None,
+	bbox=None
+):
+	"""
+	Binary variant of get_multi_batch_surfaces.
+
+	Each surface is served from its cached float32 artifact instead of the
+	Geo Model Points table:
+	[
+		{
+			"batch": "...",
+			"label": "...",
+			"origin": {"x": ..., "y": ..., "z": ...},
+			"count": 1234,
+			"buffer": "<base64 float32 x/y/z offsets>",
+			"level": 0,
+			"stats": {...}
+		}
+	]
+
+	max_points applies per surface.
+	"""
+	if not _doctype_exists("Geo Model Points"):
+		return []
+
+	return [
+		get_surface_tile(
+			batch,
+			level=level,
+			max_points=max_points,
+			bbox=bbox,
+			geo_project=geo_project,
+			geo_model_output=geo_model_output,
+			version_tag=version_tag,
+		)
+		for batch in _parse_batches(model_batches)
+	]
+
+
+@frappe.whitelist()
+def get_surface_tile(
+	batch,
+	level=None,
+	max_points=None,
+	bbox=None,
+	geo_project=None,
+	geo_model_output=None,
+	version_tag=None
+):
+	"""
+	One surface from the level-of-detail pyramid.
+
+	level 0 is full resolution and levels 1-3 average 2x2, 4x4 and 8x8 mesh
+	cells. Without a level, the finest level that fits max_points inside the
+	bbox is used. bbox is [min_x, min_y, max_x, max_y] in model coordinates.
+	"""
+	meta, offsets, mask, resolved_level = get_surface_level(batch, level=level, max_points=max_points, bbox=bbox)
+
+	if not matches_filters(
+		meta,
+		geo_project=geo_project,
+		geo_model_output=geo_model_output,
+		version_tag=version_tag,
+	):
+		meta = dict(meta, label=batch, stats=_get_point_stats([]))
+		mask = slice(0, 0)
+
+	return encode_surface(meta, offsets, mask=mask, level=resolved_level)
+
+
+def _wants_lod(level=None, max_points=None, bbox=None):
+	return level not in (None, "") or bool(max_points) or bool(bbox)
+
+
 def _get_point_stats(points):
 	if not points:
 		return {
@@ -1,9 +1,11 @@
 import json
+import math
 
 import numpy as np
-from shapely.geometry import Polygon, Point, box, LineString, mapping
+import shapely
+from shapely.geometry import Polygon, Point, LineString, mapping
 from shapely.ops import polygonize, unary_union
-from shapely import affinity
+from shapely import STRtree
 
 
 def _float(value, default=0.0):
@@ -165,6 +167,42 @@ def _geometry_to_geojson(geom):
     return json.dumps(mapping(geom))
 
 
+def _rotated_cell_grid(x_values, y_values, block_size_x, block_size_y, angle_degrees, origin):
+    """
+    All grid cells as one shapely array in row-major order (row by row, then
+    column), rotated about origin the same way affinity.rotate would.
+    """
+    cell_x, cell_y = np.meshgrid(x_values, y_values)
+    cell_x = cell_x.ravel()
+    cell_y = cell_y.ravel()
+
+    cells = shapely.box(cell_x, cell_y, cell_x + block_size_x, cell_y + block_size_y)
+
+    if not angle_degrees:
+        return cells
+
+    angle = angle_degrees * math.pi / 180.0
+    cosp = math.cos(angle)
+    sinp = math.sin(angle)
+
+    if abs(cosp) < 2.5e-16:
+        cosp = 0.0
+    if abs(sinp) < 2.5e-16:
+        sinp = 0.0
+
+    x0 = origin.x
+    y0 = origin.y
+    xoff = x0 - x0 * cosp + y0 * sinp
+    yoff = y0 - x0 * sinp - y0 * cosp
+
+    def rotate(coords):
+        x = coords[:, 0]
+        y = coords[:, 1]
+        return np.column_stack((cosp * x - sinp * y + xoff, sinp * x + cosp * y + yoff))
+
+    return shapely.transform(cells, rotate)
+
+
 def generate_layout_blocks_from_pit(
     pit_points,
     block_size_x=100,
@@ -197,53 +235,86 @@ def generate_layout_blocks_from_pit(
     maxx += pad
     maxy += pad
 
-    blocks = []
-    block_no = 0
-
     y_values = np.arange(miny, maxy + block_size_y, block_size_y)
     x_values = np.arange(minx, maxx + block_size_x, block_size_x)
+    column_count = len(x_values)
+
+    cells = _rotated_cell_grid(x_values, y_values, block_size_x, block_size_y, angle_degrees, origin)
+
+    # Only cells whose footprint touches the pit are intersected. Sorting the
+    # hits keeps row-major order so block numbers match the cell walk.
+    candidates = np.sort(STRtree(cells).query(pit_geom, predicate="intersects"))
+
+    shapely.prepare(pit_geom)
+    raw_areas = shapely.area(cells[candidates])
+    clipped = shapely.intersection(cells[candidates], pit_geom)
+
+    effective = clipped.copy()
+    not_polygon = shapely.get_type_id(clipped) != shapely.GeometryType.POLYGON
+    effective[not_polygon] = [_largest_polygon(geom) for geom in clipped[not_polygon]]
 
-    for row_no, y in enumerate(y_values, start=1):
-        for column_no, x in enumerate(x_values, start=1):
-            raw_block = box(x, y, x + block_size_x, y + block_size_y)
-
-            if angle_degrees:
-                raw_block = affinity.rotate(raw_block, angle_degrees, origin=origin, use_radians=False)
-
-            effective = raw_block.intersection(pit_geom)
-            effective = _largest_polygon(effective)
-
-            if effective is None or effective.is_empty or effective.area <= 0:
-                continue
-
-            inside_percent = (effective.area / raw_block.area) * 100.0 if raw_block.area else 0
-            if inside_percent < minimum_inside_percent:
-                continue
-
-            block_no += 1
-
-            if numbering_style == "Row Column":
-                block_code = f"R{row_no}C{column_no}"
-            else:
-                block_code = f"C{cut_no}B{block_no}"
-
-            blocks.append({
-                "block_code": block_code,
-                "cut_no": cut_no,
-                "block_no": block_no,
-                "row_no": row_no,
-                "column_no": column_no,
-                "centroid_x": float(effective.centroid.x),
-                "centroid_y": float(effective.centroid.y),
-                "block_size_x": block_size_x,
-                "block_size_y": block_size_y,
-                "angle_degrees": angle_degrees,
-                "area": float(raw_block.area),
-                "effective_area": float(effective.area),
-                "inside_percent": float(inside_percent),
-                "polygon_geojson": _geometry_to_geojson(effective),
-                "corners_json": json.dumps(_polygon_corners(effective)),
-                "block_status": "Draft",
-            })
+    effective_areas = np.zeros(len(effective))
+    has_polygon = ~shapely.is_missing(effective)
+    effective_areas[has_polygon] = shapely.area(effective[has_polygon])
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        inside_percents = np.where(raw_areas > 0, effective_areas / raw_areas * 100.0, 0)
+
+    keep = (effective_areas > 0) & (inside_percents >= minimum_inside_percent)
+
+    kept = effective[keep]
+    kept_cells = candidates[keep].tolist()
+    kept_raw_areas = raw_areas[keep].tolist()
+    kept_areas = effective_areas[keep].tolist()
+    kept_inside = inside_percents[keep].tolist()
+
+    centroids = shapely.centroid(kept)
+    centroid_x = shapely.get_x(centroids).tolist()
+    centroid_y = shapely.get_y(centroids).tolist()
+
+    ring_coords, ring_index = shapely.get_coordinates(shapely.get_exterior_ring(kept), return_index=True)
+    rings = np.split(ring_coords, np.searchsorted(ring_index, np.arange(1, len(kept))))
+    interior_counts = shapely.get_num_interior_rings(kept).tolist()
+
+    blocks = []
+
+    for position, cell_index in enumerate(kept_cells):
+        row_no = cell_index // column_count + 1
+        column_no = cell_index % column_count + 1
+        block_no = position + 1
+
+        if numbering_style == "Row Column":
+            block_code = f"R{row_no}C{column_no}"
+        else:
+            block_code = f"C{cut_no}B{block_no}"
+
+        ring = rings[position].tolist()
+
+        if interior_counts[position]:
+            polygon_geojson = _geometry_to_geojson(kept[position])
+        else:
+            polygon_geojson = json.dumps({"type": "Polygon", "coordinates": [ring]})
+
+        if len(ring) > 1 and ring[0] == ring[-1]:
+            ring = ring[:-1]
+
+        blocks.append({
+            "block_code": block_code,
+            "cut_no": cut_no,
+            "block_no": block_no,
+            "row_no": row_no,
+            "column_no": column_no,
+            "centroid_x": centroid_x[position],
+            "centroid_y": centroid_y[position],
+            "block_size_x": block_size_x,
+            "block_size_y": block_size_y,
+            "angle_degrees": angle_degrees,
+            "area": kept_raw_areas[position],
+            "effective_area": kept_areas[position],
+            "inside_percent": kept_inside[position],
+            "polygon_geojson": polygon_geojson,
+            "corners_json": json.dumps([{"x": x, "y": y} for x, y in ring]),
+            "block_status": "Draft",
+        })
 
     return blocks
@@ -0,0 +1,234 @@
+import frappe
+import numpy as np
+import pandas as pd
+from frappe.utils import now_datetime
+
+from is_production.geo_planning.doctype.geo_import_batch.geo_import_batch import (
+    GEO_POINT_BULK_CHUNK_SIZE,
+    GEO_POINT_STANDARD_FIELDS,
+    _generate_point_names,
+    _iter_selected_variable_chunks,
+)
+
+
+CALCULATED_POINTS_DOCTYPE = "Geo Calculated Points"
+
+
+def _has_field(doctype, fieldname):
+    try:
+        return frappe.get_meta(doctype).has_field(fieldname)
+    except Exception:
+        return False
+
+
+def load_surface(file_path, variable_code):
+    """Read one model variable into an x/y/z frame, chunk by chunk."""
+    xs = []
+    ys = []
+    zs = []
+
+    for chunk in _iter_selected_variable_chunks(file_path, variable_code):
+        xs.append(chunk.x)
+        ys.append(chunk.y)
+        zs.append(chunk.z)
+
+    if not xs:
+        return pd.DataFrame({"x": [], "y": [], "z": []}, dtype=np.float64)
+
+    return pd.DataFrame({
+        "x": np.concatenate(xs),
+        "y": np.concatenate(ys),
+        "z": np.concatenate(zs),
+    })
+
+
+def snap_to_cells(frame, decimals):
+    """Add integer ix/iy cell indices equal to the coordinate rounded to `decimals`."""
+    scale = 10 ** decimals
+    frame["ix"] = np.rint(frame["x"].to_numpy() * scale).astype(np.int64)
+    frame["iy"] = np.rint(frame["y"].to_numpy() * scale).astype(np.int64)
+    return frame
+
+
+def calculate_values(reference_z, target_z, calculation_type):
+    if calculation_type == "Target Minus Reference":
+        return target_z - reference_z
+
+    if calculation_type == "Absolute Difference":
+        return np.abs(reference_z - target_z)
+
+    return reference_z - target_z
+
+
+def difference_surfaces(reference, target, decimals, calculation_type, allow_negative_values=0):
+    """
+    Join target nodes to reference nodes on snapped cell indices and compute
+    the calculated value for every match.
+
+    Target rows keep file order and duplicates, as in the row-by-row loop.
+    When the reference has repeated cells the last one wins.
+    """
+    reference_row_count = len(reference)
+    target_row_count = len(target)
+
+    reference = snap_to_cells(reference, decimals)
+    reference = reference.drop_duplicates(subset=["ix", "iy"], keep="last")
+
+    target = snap_to_cells(target, decimals)
+    target["target_index"] = np.arange(1, target_row_count + 1, dtype=np.int64)
+
+    merged = target.merge(
+        reference[["ix", "iy", "z"]].rename(columns={"z": "reference_z"}),
+        on=["ix", "iy"],
+        how="left",
+        sort=False,
+    ).rename(columns={"z": "target_z"})
+
+    has_reference = merged["reference_z"].notna().to_numpy()
+    matched = merged[has_reference].reset_index(drop=True)
+
+    target_cells = target[["ix", "iy"]].drop_duplicates()
+    reference_cells_in_target = len(reference[["ix", "iy"]].merge(target_cells, on=["ix", "iy"], how="inner"))
+
+    matched["calculated_z"] = calculate_values(
+        matched["reference_z"].to_numpy(),
+        matched["target_z"].to_numpy(),
+        calculation_type,
+    )
+
+    if int(allow_negative_values or 0):
+        negative = np.zeros(len(matched), dtype=bool)
+    else:
+        negative = matched["calculated_z"].to_numpy() < 0
+
+    return frappe._dict({
+        "reference_row_count": reference_row_count,
+        "target_row_count": target_row_count,
+        "matched_count": len(matched),
+        "missing_reference_count": int((~has_reference).sum()),
+        "missing_target_count": len(reference) - reference_cells_in_target,
+        "accepted": matched[~negative].reset_index(drop=True),
+        "rejected": matched[negative].reset_index(drop=True),
+    })
+
+
+def describe_rejected_rows(rejected, limit=100):
+    return [
+        f"Row {int(row.target_index)}: negative calculated value at {row.x}, {row.y}. "
+        f"Reference {row.reference_z}, target {row.target_z}, result {row.calculated_z}."
+        for row in rejected.head(limit).itertuples(index=False)
+    ]
+
+
+def _coordinate_keys(frame, decimals):
+    scale = 10 ** decimals
+    return [
+        f"{ix / scale:.{decimals}f}|{iy / scale:.{decimals}f}"
+        for ix, iy in zip(frame["ix"].tolist(), frame["iy"].tolist())
+    ]
+
+
+def _build_chunk_columns(batch, geo_model_output, calculation_type, decimals, chunk, row_no_start):
+    calculated = chunk["calculated_z"].tolist()
+    reference_z = chunk["reference_z"].tolist()
+    target_z = chunk["target_z"].tolist()
+    keys = _coordinate_keys(chunk, decimals)
+
+    columns = {
+        "geo_project": batch.geo_project,
+        "geo_model_output": geo_model_output,
+        "calculation_batch": batch.name,
+        "row_no": list(range(row_no_start, row_no_start + len(chunk))),
+        "x": chunk["x"].tolist(),
+        "y": chunk["y"].tolist(),
+        "z": calculated,
+        "calculated_z": calculated,
+        "reference_z": reference_z,
+        "target_z": target_z,
+        "reference_variable_code": batch.reference_variable_code,
+        "reference_variable_name": batch.reference_full_name,
+        "target_variable_code": batch.target_variable_code,
+        "target_variable_name": batch.target_full_name,
+        "variable_code": batch.calculated_variable_code,
+        "variable_name": batch.calculated_full_name,
+        "full_name": batch.calculated_full_name,
+        "calculation_type": calculation_type,
+        "match_status": "Matched",
+        "version_tag": batch.version_tag,
+        "status": "Draft",
+        "remarks": [
+            f"{batch.calculated_variable_code} calculated using {calculation_type}; "
+            f"reference {batch.reference_variable_code}={ref}; "
+            f"target {batch.target_variable_code}={tgt}; "
+            f"calculated {calc}; key {key}"
+            for ref, tgt, calc, key in zip(reference_z, target_z, calculated, keys)
+        ],
+    }
+
+    return {
+        fieldname: value
+        for fieldname, value in columns.items()
+        if _has_field(CALCULATED_POINTS_DOCTYPE, fieldname)
+    }
+
+
+def write_calculated_points(
+    batch,
+    geo_model_output,
+    calculation_type,
+    decimals,
+    accepted,
+    chunk_size=GEO_POINT_BULK_CHUNK_SIZE,
+    on_progress=None,
+):
+    """Bulk insert accepted rows in chunks, committing after each chunk."""
+    success_count = 0
+    error_count = 0
+    error_messages = []
+    user = frappe.session.user or "Administrator"
+
+    for chunk_start in range(0, len(accepted), chunk_size):
+        chunk = accepted.iloc[chunk_start:chunk_start + chunk_size]
+        columns = _build_chunk_columns(
+            batch=batch,
+            geo_model_output=geo_model_output,
+            calculation_type=calculation_type,
+            decimals=decimals,
+            chunk=chunk,
+            row_no_start=chunk_start + 1,
+        )
+
+        fieldnames = list(columns)
+        series = [
+            columns[fieldname] if isinstance(columns[fieldname], list) else [columns[fieldname]] * len(chunk)
+            for fieldname in fieldnames
+        ]
+        timestamp = now_datetime()
+        names = _generate_point_names(len(chunk))
+        values = [
+            (name, timestamp, timestamp, user, user, 0, *row)
+            for name, row in zip(names, zip(*series))
+        ]
+
+        try:
+            frappe.db.bulk_insert(
+                CALCULATED_POINTS_DOCTYPE,
+                fields=[*GEO_POINT_STANDARD_FIELDS, *fieldnames],
+                values=values,
+                chunk_size=chunk_size,
+            )
+        except Exception as e:
+            frappe.db.rollback()
+            error_count += len(chunk)
+            error_messages.append(
+                f"Rows {chunk_start + 1} to {chunk_start + len(chunk)}: {str(e)}"
+            )
+            continue
+
+        frappe.db.commit()
+        success_count += len(chunk)
+
+        if on_progress:
+            on_progress(success_count, error_count)
+
+    return success_count, error_count, error_messages
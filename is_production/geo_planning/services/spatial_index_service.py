@@ -0,0 +1,49 @@
+import numpy as np
+import shapely
+from shapely import STRtree
+
+
+def coordinate_arrays(points):
+    """x, y and z NumPy arrays from cleaned point dicts ({"x", "y", "z"})."""
+    count = len(points)
+
+    return (
+        np.fromiter((p["x"] for p in points), dtype=np.float64, count=count),
+        np.fromiter((p["y"] for p in points), dtype=np.float64, count=count),
+        np.fromiter((p.get("z", 0) for p in points), dtype=np.float64, count=count),
+    )
+
+
+def assign_points_to_polygons(x, y, polygons):
+    """
+    Return one array of point indices per polygon, in point order.
+
+    A point belongs to a polygon when it is inside it or on its boundary, so a
+    point on an edge shared by two blocks is counted in both. Polygons are
+    indexed in an STRtree and every point is tested in a single bulk query.
+    """
+    empty = np.empty(0, dtype=np.int64)
+
+    if not len(polygons) or not len(x):
+        return [empty for _ in polygons]
+
+    tree = STRtree(polygons)
+    point_index, polygon_index = tree.query(shapely.points(x, y), predicate="intersects")
+
+    order = np.lexsort((point_index, polygon_index))
+    point_index = point_index[order]
+    polygon_index = polygon_index[order]
+
+    splits = np.searchsorted(polygon_index, np.arange(1, len(polygons)))
+
+    return np.split(point_index.astype(np.int64), splits)
+
+
+def z_summary(z, indices):
+    """(avg, min, max) of z over the given point indices; zeros when empty."""
+    if not len(indices):
+        return 0, 0, 0
+
+    values = z[indices]
+
+    return float(values.mean()), float(values.min()), float(values.max())
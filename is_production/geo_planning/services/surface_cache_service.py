@@ -0,0 +1,456 @@
+import base64
+import hashlib
+import json
+import os
+import tempfile
+
+import frappe
+import numpy as np
+from frappe.utils import now
+
+
+SURFACE_CACHE_FOLDER = "geo_surface_cache"
+SURFACE_CACHE_FORMAT = "float32-xyz-offset"
+SURFACE_CACHE_VERSION = 2
+SURFACE_LOD_LEVELS = (1, 2, 3)
+POINTS_DOCTYPE = "Geo Model Points"
+
+
+def _has_field(doctype, fieldname):
+    try:
+        return frappe.get_meta(doctype).has_field(fieldname)
+    except Exception:
+        return False
+
+
+def _get_batch_field():
+    if _has_field(POINTS_DOCTYPE, "import_batch"):
+        return "import_batch"
+
+    if _has_field(POINTS_DOCTYPE, "geo_import_batch"):
+        return "geo_import_batch"
+
+    return None
+
+
+def _get_cache_paths(batch):
+    folder = frappe.get_site_path("private", SURFACE_CACHE_FOLDER)
+    os.makedirs(folder, exist_ok=True)
+
+    key = hashlib.md5(str(batch).encode("utf-8")).hexdigest()
+
+    return (
+        os.path.join(folder, f"{key}.json"),
+        os.path.join(folder, f"{key}.bin"),
+    )
+
+
+def _get_lod_path(batch, level):
+    _meta_path, data_path = _get_cache_paths(batch)
+
+    if not level:
+        return data_path
+
+    return data_path[:-len(".bin")] + f".lod{int(level)}.bin"
+
+
+def _get_batch_signature(batch):
+    return frappe.db.get_value(
+        "Geo Import Batch",
+        batch,
+        ["file_hash", "version_tag"],
+        as_dict=True,
+    ) or frappe._dict()
+
+
+def _write_atomic(path, content, mode="wb"):
+    # A temp file per call, so concurrent rebuilds of one batch never share it.
+    fd, temp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path),
+        prefix=f"{os.path.basename(path)}.",
+        suffix=".tmp",
+    )
+
+    try:
+        with os.fdopen(fd, mode) as f:
+            f.write(content)
+
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def _empty_stats():
+    return {
+        "count": 0,
+        "min_x": None,
+        "max_x": None,
+        "min_y": None,
+        "max_y": None,
+        "min_z": None,
+        "max_z": None,
+    }
+
+
+def estimate_mesh_spacing(offsets):
+    """Median positive gap between distinct x and y offsets (the model mesh)."""
+    if len(offsets) < 2:
+        return 1.0
+
+    gaps = []
+
+    for axis in (0, 1):
+        values = np.unique(offsets[:, axis])
+        diffs = np.diff(values)
+        diffs = diffs[diffs > 0.001]
+
+        if len(diffs):
+            gaps.append(float(np.median(diffs)))
+
+    if not gaps:
+        return 1.0
+
+    return round(min(gaps), 4)
+
+
+def build_lod_level(offsets, cell_size):
+    """
+    Average every point falling in the same cell_size x cell_size cell into
+    one vertex. Offsets are already relative to the surface minimum, so cell
+    indices start at zero.
+    """
+    if not len(offsets):
+        return offsets[:0]
+
+    ix = np.floor(offsets[:, 0] / cell_size).astype(np.int64)
+    iy = np.floor(offsets[:, 1] / cell_size).astype(np.int64)
+
+    _cells, inverse, counts = np.unique(
+        ix * (int(iy.max()) + 1) + iy,
+        return_inverse=True,
+        return_counts=True,
+    )
+
+    averaged = np.empty((len(counts), 3), dtype=np.float64)
+
+    for axis in range(3):
+        averaged[:, axis] = np.bincount(inverse, weights=offsets[:, axis], minlength=len(counts)) / counts
+
+    return averaged.astype("<f4")
+
+
+def build_surface_cache(batch):
+    """
+    Write the per-batch surface artifact: x/y/z as float32 offsets from the
+    surface minimum (keeps mine-grid coordinates precise in 32 bits), plus a
+    JSON sidecar with bounds, stats and the batch signature it was built for.
+    """
+    batch_field = _get_batch_field()
+
+    if not batch_field:
+        frappe.throw("Geo Model Points must have either import_batch or geo_import_batch field.")
+
+    signature = _get_batch_signature(batch)
+
+    rows = frappe.db.sql(
+        f"""
+        SELECT x, y, z
+        FROM `tab{POINTS_DOCTYPE}`
+        WHERE `{batch_field}` = %s
+            AND x IS NOT NULL
+            AND y IS NOT NULL
+            AND z IS NOT NULL
+        ORDER BY row_no ASC
+        """,
+        (batch,),
+    )
+
+    xyz = np.array(rows, dtype=np.float64).reshape(-1, 3)
+    xyz = xyz[np.isfinite(xyz).all(axis=1)]
+
+    first = frappe.db.get_value(
+        POINTS_DOCTYPE,
+        {batch_field: batch},
+        ["geo_project", "geo_model_output", "version_tag", "variable_name"],
+        as_dict=True,
+        order_by="row_no asc",
+    ) or frappe._dict()
+
+    if len(xyz):
+        origin = xyz.min(axis=0)
+        maximum = xyz.max(axis=0)
+        stats = {
+            "count": int(len(xyz)),
+            "min_x": float(origin[0]),
+            "max_x": float(maximum[0]),
+            "min_y": float(origin[1]),
+            "max_y": float(maximum[1]),
+            "min_z": float(origin[2]),
+            "max_z": float(maximum[2]),
+        }
+    else:
+        origin = np.zeros(3)
+        stats = _empty_stats()
+
+    meta = {
+        "batch": batch,
+        "cache_version": SURFACE_CACHE_VERSION,
+        "format": SURFACE_CACHE_FORMAT,
+        "file_hash": signature.get("file_hash"),
+        "version_tag": signature.get("version_tag"),
+        "geo_project": first.get("geo_project"),
+        "geo_model_output": first.get("geo_model_output"),
+        "point_version_tag": first.get("version_tag"),
+        "label": first.get("variable_name") or batch,
+        "origin": {
+            "x": float(origin[0]),
+            "y": float(origin[1]),
+            "z": float(origin[2]),
+        },
+        "stats": stats,
+        "built_on": now(),
+    }
+
+    offsets = (xyz - origin).astype("<f4")
+    spacing = estimate_mesh_spacing(offsets)
+    meta["levels"] = [{"level": 0, "cell_size": spacing, "count": int(len(offsets))}]
+
+    meta_path, data_path = _get_cache_paths(batch)
+    _write_atomic(data_path, offsets.tobytes())
+
+    for level in SURFACE_LOD_LEVELS:
+        cell_size = spacing * (2 ** level)
+        level_offsets = build_lod_level(offsets, cell_size)
+        _write_atomic(_get_lod_path(batch, level), level_offsets.tobytes())
+        meta["levels"].append({"level": level, "cell_size": cell_size, "count": int(len(level_offsets))})
+
+    _write_atomic(meta_path, json.dumps(meta), mode="w")
+
+    return meta
+
+
+def invalidate_surface_cache(batch):
+    paths = [*_get_cache_paths(batch), *(_get_lod_path(batch, level) for level in SURFACE_LOD_LEVELS)]
+
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _is_current(meta, signature):
+    return (
+        meta.get("cache_version") == SURFACE_CACHE_VERSION
+        and meta.get("file_hash") == signature.get("file_hash")
+        and meta.get("version_tag") == signature.get("version_tag")
+    )
+
+
+def get_surface_meta(batch, level=0):
+    """Return the sidecar for a batch, rebuilding the cache when missing or stale."""
+    meta_path, _data_path = _get_cache_paths(batch)
+    meta = None
+
+    if os.path.exists(meta_path) and os.path.exists(_get_lod_path(batch, level)):
+        try:
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+        except Exception:
+            meta = None
+
+    if not meta or not _is_current(meta, _get_batch_signature(batch)):
+        meta = build_surface_cache(batch)
+
+    return meta
+
+
+def get_surface_cache(batch, level=0):
+    """
+    Return (meta, float32 offsets array) for a pyramid level. Level 0 is full
+    resolution; level n averages 2^n x 2^n mesh cells.
+    """
+    level = int(level or 0)
+
+    if level and level not in SURFACE_LOD_LEVELS:
+        frappe.throw(f"Surface level must be between 0 and {SURFACE_LOD_LEVELS[-1]}.")
+
+    meta = get_surface_meta(batch, level)
+    offsets = np.fromfile(_get_lod_path(batch, level), dtype="<f4").reshape(-1, 3)
+
+    return meta, offsets
+
+
+def choose_level(meta, max_points=None, bbox=None):
+    """
+    Finest pyramid level whose point count inside bbox fits in max_points.
+    The bbox share is estimated from the surface extent, so no data is read.
+    """
+    levels = meta.get("levels") or [{"level": 0, "count": (meta.get("stats") or {}).get("count") or 0}]
+
+    if not max_points:
+        return 0
+
+    share = _bbox_share(meta, bbox)
+
+    for entry in levels:
+        if entry["count"] * share <= int(max_points):
+            return entry["level"]
+
+    return levels[-1]["level"]
+
+
+def _bbox_share(meta, bbox):
+    stats = meta.get("stats") or {}
+
+    if not bbox or stats.get("min_x") is None:
+        return 1.0
+
+    width = (stats["max_x"] - stats["min_x"]) or 1.0
+    height = (stats["max_y"] - stats["min_y"]) or 1.0
+    overlap_x = max(0.0, min(bbox[2], stats["max_x"]) - max(bbox[0], stats["min_x"]))
+    overlap_y = max(0.0, min(bbox[3], stats["max_y"]) - max(bbox[1], stats["min_y"]))
+
+    return min(1.0, (overlap_x / width) * (overlap_y / height))
+
+
+def parse_bbox(bbox):
+    """Accept [min_x, min_y, max_x, max_y] as a list, JSON string or comma string."""
+    if not bbox:
+        return None
+
+    if isinstance(bbox, str):
+        try:
+            bbox = json.loads(bbox)
+        except Exception:
+            bbox = bbox.split(",")
+
+    if isinstance(bbox, dict):
+        bbox = [bbox.get("min_x"), bbox.get("min_y"), bbox.get("max_x"), bbox.get("max_y")]
+
+    try:
+        values = [float(v) for v in bbox]
+    except Exception:
+        frappe.throw("Bounding box must be min_x, min_y, max_x, max_y.")
+
+    if len(values) != 4:
+        frappe.throw("Bounding box must be min_x, min_y, max_x, max_y.")
+
+    return [
+        min(values[0], values[2]),
+        min(values[1], values[3]),
+        max(values[0], values[2]),
+        max(values[1], values[3]),
+    ]
+
+
+def bbox_mask(meta, offsets, bbox):
+    origin = meta["origin"]
+    x = offsets[:, 0].astype("float64") + origin["x"]
+    y = offsets[:, 1].astype("float64") + origin["y"]
+
+    return (x >= bbox[0]) & (x <= bbox[2]) & (y >= bbox[1]) & (y <= bbox[3])
+
+
+def get_surface_level(batch, level=None, max_points=None, bbox=None):
+    """
+    Resolve the requested pyramid level (explicit, or picked from max_points)
+    and return (meta, offsets, mask, level) with the bbox tile applied.
+    """
+    bbox = parse_bbox(bbox)
+
+    if level in (None, ""):
+        level = choose_level(get_surface_meta(batch), max_points=max_points, bbox=bbox)
+
+    meta, offsets = get_surface_cache(batch, level=level)
+    mask = bbox_mask(meta, offsets, bbox) if bbox else None
+
+    return meta, offsets, mask, int(level or 0)
+
+
+def matches_filters(meta, geo_project=None, geo_model_output=None, version_tag=None, variable_name=None):
+    if geo_project and meta.get("geo_project") != geo_project:
+        return False
+
+    if geo_model_output and meta.get("geo_model_output") != geo_model_output:
+        return False
+
+    if version_tag and meta.get("point_version_tag") != version_tag:
+        return False
+
+    if variable_name and meta.get("label") != variable_name:
+        return False
+
+    return True
+
+
+def z_filter_mask(z, mode=None, value=None, value_to=None):
+    mode = mode or "Less Than"
+
+    if value is None:
+        return np.ones(len(z), dtype=bool)
+
+    if mode == "Less Than":
+        return z < value
+
+    if mode == "Less Than Or Equal":
+        return z <= value
+
+    if mode == "Greater Than":
+        return z > value
+
+    if mode == "Greater Than Or Equal":
+        return z >= value
+
+    if mode == "Equal":
+        return z == value
+
+    if mode in {"Between", "Outside"}:
+        if value_to is None:
+            return np.ones(len(z), dtype=bool)
+
+        low = min(value, value_to)
+        high = max(value, value_to)
+
+        if mode == "Between":
+            return (z >= low) & (z <= high)
+
+        return (z < low) | (z > high)
+
+    return np.ones(len(z), dtype=bool)
+
+
+def decode_points(meta, offsets, mask=None):
+    """Plain x/y/z dicts for the JSON endpoints."""
+    if mask is not None:
+        offsets = offsets[mask]
+
+    origin = meta["origin"]
+    xyz = offsets.astype("float64") + np.array([origin["x"], origin["y"], origin["z"]])
+
+    return [{"x": x, "y": y, "z": z} for x, y, z in xyz.tolist()]
+
+
+def encode_surface(meta, offsets, mask=None, level=0):
+    """Payload for the viewers: base64 float32 triples plus origin and stats."""
+    if mask is not None:
+        offsets = offsets[mask]
+
+    levels = meta.get("levels") or []
+    cell_size = next((entry.get("cell_size") for entry in levels if entry.get("level") == level), None)
+
+    return {
+        "batch": meta.get("batch"),
+        "label": meta.get("label"),
+        "format": meta.get("format"),
+        "origin": meta.get("origin"),
+        "count": int(len(offsets)),
+        "stats": meta.get("stats"),
+        "geo_project": meta.get("geo_project"),
+        "geo_model_output": meta.get("geo_model_output"),
+        "version_tag": meta.get("point_version_tag"),
+        "level": level,
+        "cell_size": cell_size,
+        "levels": levels,
+        "buffer": base64.b64encode(np.ascontiguousarray(offsets, dtype="<f4").tobytes()).decode("ascii"),
+    }
@@ -3,6 +3,12 @@ from shapely.geometry import Polygon, Point, box, LineString, mapping
 from shapely import affinity
 from shapely.ops import polygonize, unary_union
 
+from is_production.geo_planning.services.spatial_index_service import (
+	assign_points_to_polygons,
+	coordinate_arrays,
+	z_summary,
+)
+
 
 DEFAULT_BLOCK_SIZE_X = 100
 DEFAULT_BLOCK_SIZE_Y = 40
@@ -218,34 +224,6 @@ def _polygon_corners_for_viewer(polygon):
 	return [{"x": float(x), "y": float(y)} for x, y in coords]
 
 
-def _points_inside_polygon(points, polygon):
-	"""
-	Simple bounded point-in-polygon lookup.
-
-	This is intentionally dependency-light. It first filters by polygon bounds so
-	it is much faster than testing every point against every block blindly.
-	"""
-	minx, miny, maxx, maxy = polygon.bounds
-	inside = []
-
-	for p in points:
-		x = p["x"]
-		y = p["y"]
-
-		if x < minx or x > maxx or y < miny or y > maxy:
-			continue
-
-		try:
-			pt = Point(x, y)
-
-			if polygon.contains(pt) or polygon.touches(pt):
-				inside.append(p)
-		except Exception:
-			continue
-
-	return inside
-
-
 def _get_generation_bounds(clean_points, clean_pit_points, block_size_x, block_size_y):
 	pit_polygon = points_to_pit_polygon(clean_pit_points)
 
@@ -266,19 +244,6 @@ def _get_generation_bounds(clean_points, clean_pit_points, block_size_x, block_s
 	return (minx - pad, miny - pad, maxx + pad, maxy + pad), (pit_polygon, origin)
 
 
-def _z_summary(block_points):
-	z_values = [p["z"] for p in block_points]
-
-	if not z_values:
-		return 0, 0, 0
-
-	return (
-		float(sum(z_values) / len(z_values)),
-		float(min(z_values)),
-		float(max(z_values)),
-	)
-
-
 def generate_preview_blocks(
 	points,
 	pit_points=None,
@@ -338,8 +303,7 @@ def generate_preview_blocks(
 	minx, miny, maxx, maxy = bounds
 	pit_polygon, origin = geometry_info
 
-	blocks = []
-	block_no = 0
+	candidates = []
 
 	y_values = np.arange(miny, maxy + block_size_y, block_size_y)
 	x_values = np.arange(minx, maxx + block_size_x, block_size_x)
@@ -367,45 +331,58 @@ def generate_preview_blocks(
 			if inside_percent < minimum_inside_percent:
 				continue
 
-			block_points = _points_inside_polygon(clean_points, effective)
+			candidates.append((row_no, col_no, raw_block, effective, inside_percent))
 
-			# Without a pit outline, do not create empty model blocks.
-			if not pit_polygon and not block_points:
-				continue
+	# Assign every point to its blocks in one spatial-index pass instead of
+	# scanning all points for each block.
+	x_array, y_array, z_array = coordinate_arrays(clean_points)
+	block_point_indices = assign_points_to_polygons(
+		x_array,
+		y_array,
+		[candidate[3] for candidate in candidates],
+	)
+
+	blocks = []
+	block_no = 0
+
+	for (row_no, col_no, raw_block, effective, inside_percent), point_indices in zip(candidates, block_point_indices):
+		# Without a pit outline, do not create empty model blocks.
+		if not pit_polygon and not len(point_indices):
+			continue
 
-			block_no += 1
-
-			label = f"C{cut_no}B{block_no}" if auto_number_blocks else ""
-			avg_z, min_z, max_z = _z_summary(block_points)
-			corners = _polygon_corners_for_viewer(effective)
-
-			blocks.append({
-				"cut_no": cut_no,
-				"block_no": block_no if auto_number_blocks else 0,
-				"label": label,
-				"key": f"{col_no}|{row_no}",
-				"row": row_no,
-				"col": col_no,
-				"x": float(effective.centroid.x),
-				"y": float(effective.centroid.y),
-				"width": block_size_x,
-				"height": block_size_y,
-				"angle_degrees": angle_degrees,
-				"area": float(raw_block.area),
-				"effective_area": float(effective.area),
-				"inside_percent": float(inside_percent),
-				"point_count": len(block_points),
-				"expected_point_count": expected_point_count,
-				"avg_z": avg_z,
-				"min_z": min_z,
-				"max_z": max_z,
-				"status": "Full Block" if inside_percent >= 99 else "Partial Block",
-				"polygon_geojson": mapping(effective),
-				"corners": corners,
-				"anchor": {
-					"x": float(origin.x),
-					"y": float(origin.y),
-				},
-			})
+		block_no += 1
+
+		label = f"C{cut_no}B{block_no}" if auto_number_blocks else ""
+		avg_z, min_z, max_z = z_summary(z_array, point_indices)
+		corners = _polygon_corners_for_viewer(effective)
+
+		blocks.append({
+			"cut_no": cut_no,
+			"block_no": block_no if auto_number_blocks else 0,
+			"label": label,
+			"key": f"{col_no}|{row_no}",
+			"row": row_no,
+			"col": col_no,
+			"x": float(effective.centroid.x),
+			"y": float(effective.centroid.y),
+			"width": block_size_x,
+			"height": block_size_y,
+			"angle_degrees": angle_degrees,
+			"area": float(raw_block.area),
+			"effective_area": float(effective.area),
+			"inside_percent": float(inside_percent),
+			"point_count": int(len(point_indices)),
+			"expected_point_count": expected_point_count,
+			"avg_z": avg_z,
+			"min_z": min_z,
+			"max_z": max_z,
+			"status": "Full Block" if inside_percent >= 99 else "Partial Block",
+			"polygon_geojson": mapping(effective),
+			"corners": corners,
+			"anchor": {
+				"x": float(origin.x),
+				"y": float(origin.y),
+			},
+		})
 
 	return blocks
@@ -62,6 +62,23 @@ scheduler_events = {
             "is_production.production.controllers.notifications.send_ceo_dashboard_daily_emails",
         ],
 
+        # EVERY MINUTE - Raven report outbox retries (backoff elapsed / dead workers)
+        # and dirty MTD plans whose refresh interval has passed
+        "* * * * *": [
+            "is_production.production.doctype.raven_notification_outbox.raven_notification_outbox.retry_due_notifications",
+            "is_production.production.doctype.monthly_production_planning.monthly_production_planning.process_pending_mtd_refreshes",
+        ],
+
+        # EVERY 15 MINUTES - resolve MPP day refs / hour slots on changed Hourly Production
+        "*/15 * * * *": [
+            "is_production.production.doctype.hourly_production.hourly_production.sync_hourly_references",
+        ],
+
+        # HOURLY :15 - full Month-to-Date rebuild (saves only apply deltas)
+        "15 * * * *": [
+            "is_production.production.doctype.monthly_production_planning.monthly_production_planning.reconcile_mtd_production",
+        ],
+
         # Monday 04:00 - create new week
         "0 4 * * MON": [
             "is_production.production.doctype.production_efficiency.production_efficiency.create_weekly_records"
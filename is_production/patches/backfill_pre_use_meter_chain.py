@@ -0,0 +1,19 @@
+import frappe
+
+
+def execute():
+    """Fill Pre-use Assets shift_date / shift_order from their Pre-Use Hours for the meter chain index."""
+    frappe.db.sql("""
+        UPDATE `tabPre-use Assets` pa
+        INNER JOIN `tabPre-Use Hours` puh ON puh.name = pa.parent
+        SET
+            pa.shift_date = puh.shift_date,
+            pa.shift_order = CASE puh.shift
+                WHEN 'Morning' THEN 1
+                WHEN 'Day' THEN 1
+                WHEN 'Afternoon' THEN 2
+                WHEN 'Night' THEN 3
+                ELSE 0
+            END
+        WHERE pa.parenttype = 'Pre-Use Hours'
+    """)
@@ -1136,7 +1136,7 @@ frappe.ui.form.on('Hourly Production', {
                     frm.reload_doc();
                 },
                 error: function(error) {
-                    frappe.msgprint(__('Failed to send Raven production report'), 'red');
+                    frappe.msgprint(__('Failed to queue Raven production report'), 'red');
                 }
             });
         },
@@ -2506,3 +2506,79 @@ function calculate_exc_total_hours(frm, cdt, cdn) {
 
     frappe.model.set_value(cdt, cdn, 'exc_total_hours', total);
 }
+
+// ---------------------------------------------------------------------
+// Month-to-Date background refresh and Raven outbox indicators
+// ---------------------------------------------------------------------
+frappe.ui.form.on('Hourly Production', {
+    refresh(frm) {
+        show_mtd_refresh_status(frm);
+        show_raven_outbox_status(frm);
+    },
+    after_save(frm) {
+        show_mtd_refresh_status(frm);
+    }
+});
+
+function show_raven_outbox_status(frm) {
+    if (frm.is_new()) return;
+
+    frappe.call({
+        method: 'is_production.production.doctype.raven_notification_outbox.raven_notification_outbox.get_notification_status',
+        args: { hourly_production: frm.doc.name },
+        callback(r) {
+            const entries = r.message || [];
+            if (!entries.length) return;
+
+            const colours = { Queued: 'blue', Sending: 'orange', Sent: 'green', Failed: 'red' };
+            const parts = entries.map(entry => {
+                let detail = '';
+
+                if (entry.status === 'Sent' && entry.sent_at) {
+                    detail = ` ${frappe.datetime.str_to_user(entry.sent_at)}`;
+                } else if (entry.status === 'Queued' && entry.attempts) {
+                    detail = ` (${__('retry {0}', [entry.attempts])})`;
+                }
+
+                return `<span class="indicator ${colours[entry.status] || 'gray'}">${__(entry.report_type)}: ${__(entry.status)}${detail}</span>`;
+            });
+
+            frm.dashboard.add_comment(
+                `${__('Raven')}: ${parts.join(' &nbsp; ')}`,
+                entries.some(entry => entry.status === 'Failed') ? 'red' : 'blue'
+            );
+
+            // Poll while anything is still in flight.
+            if (entries.some(entry => ['Queued', 'Sending'].includes(entry.status))) {
+                clearTimeout(frm._raven_outbox_poll);
+                frm._raven_outbox_poll = setTimeout(() => {
+                    if (cur_frm === frm && !frm.is_dirty()) {
+                        frm.dashboard.clear_comment();
+                        show_raven_outbox_status(frm);
+                    }
+                }, 5000);
+            }
+        }
+    });
+}
+
+function show_mtd_refresh_status(frm) {
+    if (frm.is_new() || !frm.doc.month_prod_planning) return;
+
+    frappe.call({
+        method: 'is_production.production.doctype.monthly_production_planning.monthly_production_planning.get_mtd_refresh_status',
+        args: { name: frm.doc.month_prod_planning },
+        callback(r) {
+            const status = r.message || {};
+            const last = status.last_refreshed
+                ? frappe.datetime.str_to_user(status.last_refreshed)
+                : __('not yet');
+
+            frm.dashboard.set_headline(
+                status.pending
+                    ? `<span class="indicator orange">${__('Month-to-Date refresh pending')}</span> <span class="text-muted">${__('Last refreshed: {0}', [last])}</span>`
+                    : `<span class="indicator green">${__('Month-to-Date up to date')}</span> <span class="text-muted">${__('Last refreshed: {0}', [last])}</span>`
+            );
+        }
+    });
+}
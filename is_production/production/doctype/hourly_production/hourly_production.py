@@ -3,9 +3,17 @@
 
 from frappe.model.document import Document
 import frappe
+import hashlib
+import pickle
 from frappe import _
 from html import escape
-from frappe.utils import getdate, add_to_date, nowdate, formatdate
+from frappe.utils import getdate, add_to_date, nowdate, formatdate, now_datetime
+
+from is_production.production.doctype.production_fact.production_fact import (
+    refresh_hour_columns,
+    remove_hourly_production,
+    sync_hourly_production,
+)
 
 
 class HourlyProduction(Document):
@@ -132,29 +140,14 @@ class HourlyProduction(Document):
         Populate Truck Load material types from the selected Geo Material
         Layer before Tub Factor validation runs.
         """
-        if not self.month_prod_planning:
-            return
+        plan = get_plan_context(self.month_prod_planning)
 
-        if not frappe.db.exists(
-            "Monthly Production Planning",
-            self.month_prod_planning,
-        ):
+        if not plan:
             return
 
-        mpp = frappe.get_doc(
-            "Monthly Production Planning",
-            self.month_prod_planning,
-        )
-
-        material_map = {
-            row.geo_ref_description: row.custom_material_type
-            for row in (mpp.get("geo_mat_layer") or [])
-            if row.geo_ref_description
-        }
-
         for row in getattr(self, "truck_loads", []) or []:
             if row.geo_mat_layer_truck and not row.mat_type:
-                row.mat_type = material_map.get(
+                row.mat_type = plan.material_map.get(
                     row.geo_mat_layer_truck
                 )
 
@@ -167,52 +160,15 @@ class HourlyProduction(Document):
         Matching trims truck model and material type values so legacy
         Asset records containing extra spaces still match planning.
         """
-        if not self.month_prod_planning:
-            return
+        plan = get_plan_context(self.month_prod_planning)
 
-        if not frappe.db.exists(
-            "Monthly Production Planning",
-            self.month_prod_planning,
-        ):
+        if not plan:
             return
 
-        plan = frappe.get_doc(
-            "Monthly Production Planning",
-            self.month_prod_planning,
-        )
-
-        factor_map = {}
-
-        for factor_row in plan.get("tub_factors") or []:
-            item_name = str(
-                factor_row.item_name or ""
-            ).strip()
-
-            mat_type = str(
-                factor_row.mat_type or ""
-            ).strip()
-
-            if not item_name or not mat_type:
-                continue
-
-            factor_map[(item_name, mat_type)] = {
-                "link": factor_row.tub_factor,
-                "value": float(
-                    factor_row.factor_value or 0
-                ),
-            }
-
         for row in self.get("truck_loads") or []:
-            item_name = str(
-                row.item_name or ""
-            ).strip()
-
-            mat_type = str(
-                row.mat_type or ""
-            ).strip()
-
-            factor = factor_map.get(
-                (item_name, mat_type)
+            factor = plan.planning_factor(
+                row.item_name,
+                row.mat_type,
             )
 
             if not factor:
@@ -271,49 +227,16 @@ class HourlyProduction(Document):
                 )
             )
 
-        if not frappe.db.exists(
-            "Monthly Production Planning",
-            self.month_prod_planning,
-        ):
+        plan = get_plan_context(self.month_prod_planning)
+
+        if not plan:
             frappe.throw(
                 _("Monthly Production Plan {0} does not exist.").format(
                     self.month_prod_planning
                 )
             )
 
-        mpp = frappe.get_doc(
-            "Monthly Production Planning",
-            self.month_prod_planning,
-        )
-
-        approved_factor_names = {
-            row.tub_factor
-            for row in (mpp.get("tub_factors") or [])
-            if row.tub_factor
-        }
-
-        approved_factors = {}
-
-        if approved_factor_names:
-            factor_rows = frappe.get_all(
-                "Tub Factor",
-                filters={
-                    "name": ["in", list(approved_factor_names)],
-                    "docstatus": 1,
-                },
-                fields=[
-                    "name",
-                    "item_name",
-                    "mat_type",
-                    "tub_factor",
-                ],
-                limit_page_length=500,
-            )
-
-            approved_factors = {
-                factor.name: factor
-                for factor in factor_rows
-            }
+        approved_factors = plan.approved_factors
 
         for row in truck_rows:
             loads = float(row.loads or 0)
@@ -322,12 +245,10 @@ class HourlyProduction(Document):
                 row.bcms = 0
                 continue
 
-            matching_factors = [
-                factor
-                for factor in approved_factors.values()
-                if factor.item_name == row.item_name
-                and factor.mat_type == row.mat_type
-            ]
+            matching_factors = plan.approved_factors_for(
+                row.item_name,
+                row.mat_type,
+            )
 
             selected_factor = None
 
@@ -880,24 +801,95 @@ class HourlyProduction(Document):
         </div>
         """
 
-    def get_raven_shift_docs(self):
-        if not self.location or not self.prod_date or not self.shift:
-            return []
+    def get_raven_day_snapshot(self):
+        """
+        All Hourly Production records for this location and date with their
+        truck_loads / dozer_production rows, as lightweight dicts.
+
+        Three queries regardless of how many hours are captured. Cached on the
+        document so the shift and end-of-day reports share one load.
+        """
+        cached = getattr(self, "_raven_day_snapshot", None)
+        if cached is not None:
+            return cached
+
+        if not self.location or not self.prod_date:
+            self._raven_day_snapshot = []
+            return self._raven_day_snapshot
 
-        rows = frappe.get_all(
+        docs = frappe.get_all(
             "Hourly Production",
             filters={
                 "location": self.location,
                 "prod_date": self.prod_date,
-                "shift": self.shift,
                 "docstatus": ["<", 2],
             },
-            fields=["name"],
-            order_by="hour_sort_key asc, creation asc",
-            limit_page_length=500,
+            fields=[
+                "name", "shift", "hour_sort_key", "hour_slot", "creation",
+                "total_ts_bcm", "total_dozing_bcm", "diesel_used", "water_used",
+            ],
+            order_by="shift asc, hour_slot asc, creation asc",
         )
 
-        return [frappe.get_doc("Hourly Production", row.name) for row in rows]
+        names = [doc.name for doc in docs]
+        by_name = {}
+
+        for doc in docs:
+            doc.truck_loads = []
+            doc.dozer_production = []
+            by_name[doc.name] = doc
+
+        if names:
+            for row in frappe.get_all(
+                "Truck Loads",
+                filters={
+                    "parent": ["in", names],
+                    "parenttype": "Hourly Production",
+                    "parentfield": "truck_loads",
+                },
+                fields=[
+                    "parent", "bcms", "loads", "excavator_plant_no", "asset_name_shoval",
+                    "mining_areas_trucks", "geo_mat_layer_truck", "exc_start_hours",
+                    "exc_stop_hours", "truck_plant_no", "asset_name_truck",
+                ],
+                order_by="idx asc",
+                limit_page_length=0,
+            ):
+                by_name[row.parent].truck_loads.append(row)
+
+            for row in frappe.get_all(
+                "Dozer Production",
+                filters={
+                    "parent": ["in", names],
+                    "parenttype": "Hourly Production",
+                    "parentfield": "dozer_production",
+                },
+                fields=[
+                    "parent", "bcm_hour", "dozer_plant_no", "asset_name",
+                    "mining_areas_dozer_child", "dozer_geo_mat_layer",
+                ],
+                order_by="idx asc",
+                limit_page_length=0,
+            ):
+                by_name[row.parent].dozer_production.append(row)
+
+        self._raven_day_snapshot = docs
+        return docs
+
+    def get_raven_shift_docs(self):
+        if not self.location or not self.prod_date or not self.shift:
+            return []
+
+        docs = [doc for doc in self.get_raven_day_snapshot() if doc.shift == self.shift]
+
+        # Same order as the old per-shift query (NULL sort keys first).
+        docs.sort(key=lambda doc: (
+            doc.hour_sort_key is not None,
+            doc.hour_sort_key or 0,
+            doc.creation,
+        ))
+
+        return docs[:500]
 
     def get_raven_shift_summary_html(self):
         docs = self.get_raven_shift_docs()
@@ -1154,23 +1146,10 @@ class HourlyProduction(Document):
 
 
     def get_raven_end_of_day_report_html(self):
-        docs = []
-        day_rows = frappe.get_all(
-            "Hourly Production",
-            filters={
-                "location": self.location,
-                "prod_date": self.prod_date,
-                "docstatus": ["<", 2],
-            },
-            fields=["name", "shift"],
-            order_by="shift asc, hour_slot asc, creation asc",
-        )
-
+        docs = self.get_raven_day_snapshot()
         shifts_included = []
 
-        for row in day_rows:
-            doc = frappe.get_doc("Hourly Production", row.name)
-            docs.append(doc)
+        for doc in docs:
             if doc.shift and doc.shift not in shifts_included:
                 shifts_included.append(doc.shift)
 
@@ -1469,65 +1448,112 @@ class HourlyProduction(Document):
 
     @frappe.whitelist()
     def send_raven_notification(self, report_type="both"):
-        try:
-            channel = self.get_raven_channel_for_production()
-            self.refresh_raven_monthly_statistics()
-            report_type = (report_type or "both").lower()
+        """
+        Queue the selected Raven reports in the Raven Notification Outbox.
+        Rendering and posting happen in a background worker with retries.
+        """
+        result = frappe.get_attr(
+            "is_production.production.doctype.raven_notification_outbox."
+            "raven_notification_outbox.queue_raven_reports"
+        )(self.name, report_type)
 
-            sent_reports = []
+        if result["queued"]:
+            frappe.msgprint(
+                _("{0} queued for Raven.").format(" and ".join(result["queued"])),
+                alert=True,
+                indicator="blue"
+            )
+        else:
+            frappe.msgprint(
+                _("{0} already queued for Raven.").format(
+                    " and ".join(result["skipped"])
+                ),
+                alert=True,
+                indicator="orange"
+            )
 
-            if report_type in ["hour", "both"]:
-                self.insert_raven_message(channel, self.get_raven_hour_report_html())
-                sent_reports.append("Hour Report")
+        return result
 
-            if report_type in ["shift"]:
-                self.insert_raven_message(channel, self.get_raven_shift_summary_html())
-                sent_reports.append("Shift Summary")
+    # -------------------------------------------------------------------------
+    # Month-to-Date ledger
+    # Saves push only their own delta into Monthly Production Planning and
+    # queue a coalesced background rebuild (request_mtd_refresh).
+    # -------------------------------------------------------------------------
 
-            if report_type in ["both"]:
-                self.insert_raven_message(channel, self.get_raven_end_of_day_report_html())
-                sent_reports.append("End of Day Production Report")
+    @staticmethod
+    def get_mtd_ledger_values(doc):
+        if not doc or not doc.get("month_prod_planning"):
+            return None
+
+        coal_bcm = 0.0
+        for row in doc.get("truck_loads") or []:
+            if "coal" in (row.get("mat_type") or "").lower():
+                coal_bcm += float(row.get("bcms") or 0)
+
+        return {
+            "month_prod_planning": doc.get("month_prod_planning"),
+            "monthly_production_child_ref": doc.get("monthly_production_child_ref"),
+            "total_ts_bcm": doc.get("total_ts_bcm") or 0,
+            "total_dozing_bcm": doc.get("total_dozing_bcm") or 0,
+            "coal_bcm": coal_bcm,
+            "prod_date": doc.get("prod_date"),
+            "location": doc.get("location"),
+        }
 
-            if not sent_reports:
-                frappe.throw(_("Please select a valid Raven report type."))
+    def apply_mtd_ledger(self, before, after):
+        module = (
+            "is_production.production.doctype.monthly_production_planning."
+            "monthly_production_planning"
+        )
 
-            frappe.msgprint(
-                _("{0} sent to Raven channel {1}.").format(
-                    " and ".join(sent_reports),
-                    channel
-                ),
-                alert=True,
-                indicator="green"
+        try:
+            applied = frappe.get_attr(f"{module}.apply_hourly_production_delta")(
+                before=before,
+                after=after
             )
 
+            # Full rebuild (survey variance, coal, day counts) runs in the
+            # background, coalesced per plan.
+            for plan in {values["month_prod_planning"] for values in (before, after) if values}:
+                frappe.get_attr(f"{module}.request_mtd_refresh")(plan)
+
+            return applied
+
         except Exception as e:
-            frappe.log_error(frappe.get_traceback(), "Hourly Production Raven Report Error")
-            frappe.msgprint(
-                _("Failed to send Raven production report: {0}").format(str(e)),
-                indicator="red"
+            frappe.log_error(
+                message=f"Auto MTD update failed for Hourly Production {self.name}: {e}",
+                title="Hourly Production Auto MTD Update"
             )
 
     def on_update(self):
-        if not self.month_prod_planning:
-            return
+        sync_hourly_production(self)
 
-        try:
-            frappe.get_attr(
-                "is_production.production.doctype.monthly_production_planning."
-                "monthly_production_planning.update_mtd_production"
-            )(name=self.month_prod_planning)
+        doc_before_save = self.get_doc_before_save()
+        frappe.db.after_commit.add(
+            lambda: update_hour_state_cache(self, doc_before_save)
+        )
+
+        before = self.get_mtd_ledger_values(doc_before_save)
+        after = self.get_mtd_ledger_values(self)
+
+        if not before and not after:
+            return
 
+        if self.apply_mtd_ledger(before, after):
             frappe.msgprint(
                 _("Month-to-Date Production updated automatically."),
                 alert=True,
                 indicator="green"
             )
 
-        except Exception as e:
-            frappe.log_error(
-                message=f"Auto MTD update failed for Hourly Production {self.name}: {e}",
-                title="Hourly Production Auto MTD Update"
-            )
+    def on_trash(self):
+        remove_hourly_production(self.name)
+
+        frappe.db.after_commit.add(
+            lambda: remove_hour_state_cache(self.name, self.location, self.prod_date)
+        )
+
+        self.apply_mtd_ledger(self.get_mtd_ledger_values(self), None)
 
 
 @frappe.whitelist()
@@ -1541,6 +1567,183 @@ def get_user_whatsapp_number(user):
         return None
 
 
+# -----------------------------------------------------------------------------
+# Hour state cache
+# get_previous_hour_defaults is called every time a clerk opens a new hour.
+# The setup of every hour of a site/day (shift times and truck assignments)
+# is kept in one Redis hash per site/day, one field per record, so the form
+# needs one cache read. Saves and deletes write only their own field after
+# commit (a delete leaves a None tombstone). A day without the complete marker
+# is filled from the database with HSETNX, so a fill never overwrites a
+# fresher write from a save that committed while it was reading.
+# -----------------------------------------------------------------------------
+
+HOUR_STATE_CACHE_PREFIX = "is_production:hour_state"
+HOUR_STATE_CACHE_SECONDS = 2 * 24 * 60 * 60
+HOUR_STATE_COMPLETE_FIELD = "__complete__"
+
+HOUR_STATE_FIELDS = [
+    "name",
+    "modified",
+    "shift",
+    "shift_num_hour",
+    "hour_slot",
+    "hour_sort_key",
+    "day_shift_start",
+    "day_shift_end",
+    "total_working_hours",
+    "night_shift_start",
+    "night_shift_end",
+    "total_working_hour",
+]
+
+
+def _hour_state_cache_key(location, prod_date):
+    return f"{HOUR_STATE_CACHE_PREFIX}:{location}:{getdate(prod_date)}"
+
+
+def _hour_state(values, truck_rows):
+    """Cached setup of one hour: header fields plus truck assignments."""
+    state = {field: values.get(field) for field in HOUR_STATE_FIELDS}
+    state["assignments"] = {}
+
+    for row in truck_rows or []:
+        if not row.get("asset_name_truck"):
+            continue
+
+        state["assignments"][row.get("asset_name_truck")] = {
+            "excavator": row.get("asset_name_shoval") or None,
+            "mining_area": row.get("mining_areas_trucks") or None,
+            "geo_layer": row.get("geo_mat_layer_truck") or None,
+            "mat_type": row.get("mat_type") or None,
+        }
+
+    return state
+
+
+def _load_hour_states(location, prod_date, names=None):
+    """Hour states for a site/day (optionally only some records) straight from the database, keyed by name."""
+    filters = [
+        ["location", "=", location],
+        ["prod_date", "=", prod_date],
+        ["docstatus", "<", 2],
+    ]
+    if names is not None:
+        filters.append(["name", "in", list(names)])
+
+    parents = frappe.get_all(
+        "Hourly Production",
+        filters=filters,
+        fields=HOUR_STATE_FIELDS,
+    )
+
+    if not parents:
+        return {}
+
+    truck_rows = {}
+    for row in frappe.get_all(
+        "Truck Loads",
+        filters={
+            "parent": ["in", [p.name for p in parents]],
+            "parenttype": "Hourly Production",
+            "parentfield": "truck_loads",
+        },
+        fields=[
+            "parent",
+            "asset_name_truck",
+            "asset_name_shoval",
+            "mining_areas_trucks",
+            "geo_mat_layer_truck",
+            "mat_type",
+        ],
+        order_by="idx asc",
+    ):
+        truck_rows.setdefault(row.parent, []).append(row)
+
+    return {
+        p.name: _hour_state(p, truck_rows.get(p.name))
+        for p in parents
+    }
+
+
+def _set_hour_state(location, prod_date, name, state):
+    """Write one record's field (None marks it deleted) into its cached day."""
+    key = _hour_state_cache_key(location, prod_date)
+    frappe.cache.hset(key, name, state)
+    frappe.cache.expire(frappe.cache.make_key(key), HOUR_STATE_CACHE_SECONDS)
+
+
+def _read_hour_states(key):
+    return {
+        frappe.safe_decode(name): state
+        for name, state in (frappe.cache.hgetall(key) or {}).items()
+    }
+
+
+def get_hour_states(location, prod_date):
+    key = _hour_state_cache_key(location, prod_date)
+    cached = _read_hour_states(key)
+
+    if not cached.get(HOUR_STATE_COMPLETE_FIELD):
+        redis_key = frappe.cache.make_key(key)
+
+        for name, state in _load_hour_states(location, prod_date).items():
+            frappe.cache.hsetnx(redis_key, name, pickle.dumps(state))
+
+        frappe.cache.hset(key, HOUR_STATE_COMPLETE_FIELD, True)
+        frappe.cache.expire(redis_key, HOUR_STATE_CACHE_SECONDS)
+
+        cached = _read_hour_states(key)
+
+    return {
+        name: state
+        for name, state in cached.items()
+        if name != HOUR_STATE_COMPLETE_FIELD and state is not None
+    }
+
+
+def update_hour_state_cache(doc, doc_before_save=None):
+    """
+    Write a saved record into its cached day. A record moved to another
+    site/day is dropped from its old one.
+    """
+    if doc_before_save and (
+        doc_before_save.location != doc.location
+        or getdate(doc_before_save.prod_date) != getdate(doc.prod_date)
+    ):
+        remove_hour_state_cache(doc.name, doc_before_save.location, doc_before_save.prod_date)
+
+    if not doc.location or not doc.prod_date:
+        return
+
+    state = _hour_state(doc.as_dict(), doc.get("truck_loads")) if doc.docstatus < 2 else None
+    _set_hour_state(doc.location, doc.prod_date, doc.name, state)
+
+
+def remove_hour_state_cache(name, location, prod_date):
+    if not location or not prod_date:
+        return
+
+    _set_hour_state(location, prod_date, name, None)
+
+
+def refresh_hour_state_cache(records):
+    """
+    Re-read the cached state of records changed without a save (records:
+    dicts with name, location and prod_date), e.g. by update_hourly_references.
+    """
+    days = {}
+    for r in records:
+        if r.get("location") and r.get("prod_date"):
+            days.setdefault((r.get("location"), getdate(r.get("prod_date"))), set()).add(r.get("name"))
+
+    for (location, prod_date), names in days.items():
+        states = _load_hour_states(location, prod_date, names)
+
+        for name in names:
+            _set_hour_state(location, prod_date, name, states.get(name))
+
+
 @frappe.whitelist()
 def get_previous_hour_defaults(location, prod_date, current_hour_sort_key=None, current_name=None):
     """
@@ -1551,140 +1754,311 @@ def get_previous_hour_defaults(location, prod_date, current_hour_sort_key=None,
     if not location or not prod_date:
         return None
 
-    filters = [
-        ["location", "=", location],
-        ["prod_date", "=", prod_date],
-        ["docstatus", "<", 2],
+    try:
+        before_hour = int(float(current_hour_sort_key)) if current_hour_sort_key else None
+    except Exception:
+        before_hour = None
+
+    candidates = [
+        state
+        for name, state in get_hour_states(location, prod_date).items()
+        if not (current_name and not str(current_name).startswith("new-") and name == current_name)
+        and (
+            before_hour is None
+            or (state["hour_sort_key"] is not None and state["hour_sort_key"] < before_hour)
+        )
     ]
 
-    if current_name and not str(current_name).startswith("new-"):
-        filters.append(["name", "!=", current_name])
-
-    if current_hour_sort_key:
-        try:
-            filters.append(["hour_sort_key", "<", int(float(current_hour_sort_key))])
-        except Exception:
-            pass
+    if not candidates:
+        return None
 
-    previous = frappe.get_all(
-        "Hourly Production",
-        filters=filters,
-        fields=[
-            "name",
-            "shift",
-            "shift_num_hour",
-            "hour_slot",
-            "hour_sort_key",
-            "day_shift_start",
-            "day_shift_end",
-            "total_working_hours",
-            "night_shift_start",
-            "night_shift_end",
-            "total_working_hour",
-        ],
-        order_by="hour_sort_key desc, modified desc",
-        limit=1,
+    # Same order as the old query: hour_sort_key desc, modified desc.
+    previous = max(
+        candidates,
+        key=lambda state: (
+            state["hour_sort_key"] is not None,
+            state["hour_sort_key"] or 0,
+            str(state["modified"] or ""),
+        ),
     )
 
-    if not previous:
+    return {
+        "previous_name": previous["name"],
+        "previous_shift_num_hour": previous["shift_num_hour"],
+        "previous_hour_slot": previous["hour_slot"],
+        "day_shift_start": previous["day_shift_start"],
+        "day_shift_end": previous["day_shift_end"],
+        "total_working_hours": previous["total_working_hours"],
+        "night_shift_start": previous["night_shift_start"],
+        "night_shift_end": previous["night_shift_end"],
+        "total_working_hour": previous["total_working_hour"],
+        "assignments": previous["assignments"],
+    }
+
+
+HOURLY_REFERENCES_LOOKBACK_DAYS = 30
+HOURLY_REFERENCES_WATERMARK_KEY = "is_production:hourly_references_watermark"
+# Plan name -> hash of what references depend on (site, month dates and day
+# rows). MTD refreshes save plans all the time, so `modified` alone would
+# mark every active plan as changed on every run.
+HOURLY_REFERENCES_PLAN_SIGNATURES_KEY = "is_production:hourly_references_plan_signatures"
+
+
+def _hour_slot_values(shift, shift_system, shift_num_hour):
+    """(hour_sort_key, hour_slot) for a shift hour label, or None if it can't be parsed."""
+    try:
+        _, idx_str = shift_num_hour.split("-")
+        idx = int(idx_str)
+    except Exception:
         return None
 
-    prev_doc = frappe.get_doc("Hourly Production", previous[0].name)
+    base = (
+        6 if shift in ("Day", "Morning") else
+        14 if shift == "Afternoon" else
+        18 if shift == "Night" and shift_system == "2x12Hour" else
+        22
+    )
+    start = (base + (idx - 1)) % 24
+    end = (start + 1) % 24
 
-    assignments = {}
+    return idx, f"{start}:00-{end}:00"
 
-    for row in prev_doc.truck_loads or []:
-        if not row.asset_name_truck:
-            continue
 
-        assignments[row.asset_name_truck] = {
-            "excavator": row.asset_name_shoval or None,
-            "mining_area": row.mining_areas_trucks or None,
-            "geo_layer": row.geo_mat_layer_truck or None,
-            "mat_type": row.mat_type or None,
-        }
+def _get_plan_reference_signatures(plans):
+    """Plan name -> hash of its location, month dates and Monthly Production Days rows."""
+    if not plans:
+        return {}
+
+    day_rows = {}
+    for row in frappe.db.sql(
+        """
+        SELECT parent, shift_start_date, hourly_production_reference
+        FROM `tabMonthly Production Days`
+        WHERE parenttype = 'Monthly Production Planning'
+          AND parentfield = 'month_prod_days'
+          AND parent IN %(plans)s
+        ORDER BY idx ASC
+        """,
+        {"plans": [p.name for p in plans]},
+        as_dict=True,
+    ):
+        day_rows.setdefault(row.parent, []).append(
+            f"{row.shift_start_date}={row.hourly_production_reference}"
+        )
 
     return {
-        "previous_name": prev_doc.name,
-        "previous_shift_num_hour": prev_doc.shift_num_hour,
-        "previous_hour_slot": prev_doc.hour_slot,
-        "day_shift_start": prev_doc.day_shift_start,
-        "day_shift_end": prev_doc.day_shift_end,
-        "total_working_hours": prev_doc.total_working_hours,
-        "night_shift_start": prev_doc.night_shift_start,
-        "night_shift_end": prev_doc.night_shift_end,
-        "total_working_hour": prev_doc.total_working_hour,
-        "assignments": assignments,
+        p.name: hashlib.sha1(
+            "|".join([
+                str(p.location),
+                str(p.prod_month_start_date),
+                str(p.prod_month_end_date),
+                *day_rows.get(p.name, []),
+            ]).encode("utf-8")
+        ).hexdigest()
+        for p in plans
     }
 
 
-@frappe.whitelist()
-def update_hourly_references():
-    threshold = add_to_date(nowdate(), days=-30)
-    recs = frappe.get_all(
-        'Hourly Production',
-        filters={'prod_date': ['>=', threshold]},
-        fields=['name', 'prod_date', 'location', 'shift', 'shift_system', 'shift_num_hour']
+def _get_reference_candidates(threshold, since=None):
+    """
+    Hourly Production rows to resolve, and the current signatures of the
+    plans looked at (to store once the run has committed). With a watermark,
+    only rows modified since then, plus rows falling in a plan whose
+    references changed since the last run.
+    """
+    fields = [
+        "name", "prod_date", "location", "shift", "shift_system", "shift_num_hour",
+        "monthly_production_child_ref", "hour_sort_key", "hour_slot",
+    ]
+    plan_filters = {"prod_month_end_date": [">=", threshold]}
+
+    if since:
+        plan_filters["modified"] = [">", since]
+
+    plans = frappe.get_all(
+        "Monthly Production Planning",
+        filters=plan_filters,
+        fields=["name", "location", "prod_month_start_date", "prod_month_end_date"],
     )
+    signatures = _get_plan_reference_signatures(plans)
 
-    updated_entries = []
-    for r in recs:
-        pd = getdate(r.prod_date)
-        plans = frappe.get_all(
-            'Monthly Production Planning',
+    if not since:
+        recs = frappe.get_all(
+            "Hourly Production",
+            filters={"prod_date": [">=", threshold]},
+            fields=fields,
+        )
+        return recs, signatures
+
+    recs = {
+        r.name: r
+        for r in frappe.get_all(
+            "Hourly Production",
+            filters={"prod_date": [">=", threshold], "modified": [">", since]},
+            fields=fields,
+        )
+    }
+
+    changed_plans = [
+        plan for plan in plans
+        if frappe.cache.hget(HOURLY_REFERENCES_PLAN_SIGNATURES_KEY, plan.name) != signatures[plan.name]
+    ]
+
+    for plan in changed_plans:
+        for r in frappe.get_all(
+            "Hourly Production",
             filters=[
-                ['location', '=', r.location],
-                ['prod_month_start_date', '<=', pd],
-                ['prod_month_end_date', '>=', pd]
+                ["location", "=", plan.location],
+                ["prod_date", ">=", max(getdate(plan.prod_month_start_date), getdate(threshold))],
+                ["prod_date", "<=", plan.prod_month_end_date],
             ],
-            fields=['name'],
-            order_by='prod_month_start_date asc',
-            limit_page_length=1
-        )
-        if not plans:
+            fields=fields,
+        ):
+            recs.setdefault(r.name, r)
+
+    return list(recs.values()), signatures
+
+
+def _build_reference_map(recs):
+    """
+    (location, date) -> Monthly Production Days reference for every pair in
+    recs. As before, the earliest-starting plan covering a date owns it, even
+    when that plan has no row for the date.
+    """
+    locations = {r.location for r in recs if r.location}
+    dates = [getdate(r.prod_date) for r in recs if r.prod_date]
+
+    if not locations or not dates:
+        return {}
+
+    plans = frappe.get_all(
+        "Monthly Production Planning",
+        filters=[
+            ["location", "in", list(locations)],
+            ["prod_month_start_date", "<=", max(dates)],
+            ["prod_month_end_date", ">=", min(dates)],
+        ],
+        fields=["name", "location", "prod_month_start_date", "prod_month_end_date"],
+        order_by="prod_month_start_date asc",
+    )
+
+    if not plans:
+        return {}
+
+    day_refs = {}
+    for row in frappe.db.sql(
+        """
+        SELECT parent, shift_start_date, hourly_production_reference
+        FROM `tabMonthly Production Days`
+        WHERE parenttype = 'Monthly Production Planning'
+          AND parentfield = 'month_prod_days'
+          AND parent IN %(plans)s
+        ORDER BY idx ASC
+        """,
+        {"plans": [p.name for p in plans]},
+        as_dict=True,
+    ):
+        day_refs.setdefault((row.parent, getdate(row.shift_start_date)), row.hourly_production_reference)
+
+    plans_by_location = {}
+    for plan in plans:
+        plans_by_location.setdefault(plan.location, []).append(plan)
+
+    ref_map = {}
+    for r in recs:
+        if not r.prod_date:
             continue
 
-        mpp = frappe.get_doc('Monthly Production Planning', plans[0].name)
-        ref = next(
-            (row.hourly_production_reference for row in mpp.month_prod_days if row.shift_start_date == pd),
-            None
+        key = (r.location, getdate(r.prod_date))
+        if key in ref_map:
+            continue
+
+        pd = key[1]
+        plan = next(
+            (
+                p for p in plans_by_location.get(r.location, [])
+                if getdate(p.prod_month_start_date) <= pd <= getdate(p.prod_month_end_date)
+            ),
+            None,
         )
+        ref_map[key] = day_refs.get((plan.name, pd)) if plan else None
+
+    return ref_map
+
 
+@frappe.whitelist()
+def update_hourly_references(since=None):
+    """
+    Sync monthly_production_child_ref, hour_sort_key and hour_slot on recent
+    Hourly Production records. Plans and their day rows are loaded once, the
+    values are resolved in memory and only rows that actually change are
+    written, in one bulk update that leaves `modified` alone.
+
+    `since` is a watermark: when given, only records modified after it, and
+    records in plans whose site, month dates or day rows changed, are considered.
+    """
+    threshold = add_to_date(nowdate(), days=-HOURLY_REFERENCES_LOOKBACK_DAYS)
+    recs, plan_signatures = _get_reference_candidates(threshold, since)
+    ref_map = _build_reference_map(recs)
+
+    updates = {}
+    for r in recs:
         values = {}
-        if ref:
-            values['monthly_production_child_ref'] = ref
-        try:
-            _, idx_str = r.shift_num_hour.split("-")
-            idx = int(idx_str)
-            base = (
-                6 if r.shift in ("Day","Morning") else
-                14 if r.shift == "Afternoon" else
-                18 if r.shift == "Night" and r.shift_system == "2x12Hour" else
-                22
-            )
-            start = (base + (idx - 1)) % 24
-            end = (start + 1) % 24
-            values['hour_sort_key'] = idx
-            values['hour_slot'] = f"{start}:00-{end}:00"
-        except Exception:
-            pass
+
+        ref = ref_map.get((r.location, getdate(r.prod_date))) if r.prod_date else None
+        if ref and ref != r.monthly_production_child_ref:
+            values["monthly_production_child_ref"] = ref
+
+        slot = _hour_slot_values(r.shift, r.shift_system, r.shift_num_hour)
+        if slot:
+            idx, hour_slot = slot
+            if r.hour_sort_key != idx:
+                values["hour_sort_key"] = idx
+            if r.hour_slot != hour_slot:
+                values["hour_slot"] = hour_slot
 
         if values:
-            frappe.db.set_value('Hourly Production', r.name, values)
-            updated_entries.append(f"{r.name} → {values}")
+            updates[r.name] = values
+
+    if updates:
+        frappe.db.bulk_update("Hourly Production", updates, update_modified=False)
+
+        changed = [r for r in recs if r.name in updates]
+        frappe.db.after_commit.add(lambda: refresh_hour_state_cache(changed))
+        refresh_hour_columns(list(updates))
 
     frappe.db.commit()
 
-    if updated_entries:
+    for plan_name, signature in plan_signatures.items():
+        frappe.cache.hset(HOURLY_REFERENCES_PLAN_SIGNATURES_KEY, plan_name, signature)
+
+    if updates:
         frappe.log_error(
             message=(
                 f"update_hourly_references synced the following Hourly Production records\n"
-                f"(prod_date ≥ {threshold}):\n\n" + "\n".join(updated_entries)
+                f"(prod_date ≥ {threshold}"
+                + (f", modified > {since}" if since else "")
+                + "):\n\n"
+                + "\n".join(f"{name} → {values}" for name, values in updates.items())
             ),
             title="update_hourly_references"
         )
 
-    return {'updated': len(updated_entries)}
+    return {'updated': len(updates), 'checked': len(recs)}
+
+
+def sync_hourly_references():
+    """
+    Scheduler: incremental update_hourly_references from the last watermark.
+    If the watermark is missing (first run or cache flush) the full lookback
+    window is resolved instead.
+    """
+    started = now_datetime()
+    since = frappe.cache.get_value(HOURLY_REFERENCES_WATERMARK_KEY)
+
+    update_hourly_references(since=since)
+
+    frappe.cache.set_value(HOURLY_REFERENCES_WATERMARK_KEY, started)
 
 @frappe.whitelist()
 def get_day_total_bcm(location, prod_date, exclude_name=None):
@@ -1714,6 +2088,126 @@ def get_day_total_bcm(location, prod_date, exclude_name=None):
 
 
 
+# -----------------------------------------------------------------------------
+# Monthly Production Planning context
+# Validation and the Tub Factor lookups all read the same plan child tables.
+# They are loaded once per request and shared, keyed by plan name and
+# modified so an edit to the plan made in the same request is picked up.
+# -----------------------------------------------------------------------------
+
+def _factor_key(value):
+    """
+    Comparison form of a truck model / material type: trimmed and casefolded,
+    as the database's _ci collation compared them in the original queries.
+    """
+    return str(value or "").strip().casefold()
+
+
+class PlanContext:
+    """Material layers and Tub Factors of one Monthly Production Planning."""
+
+    def __init__(self, name, modified):
+        self.name = name
+        self.modified = modified
+
+        self.material_map = {
+            row.geo_ref_description: row.custom_material_type
+            for row in frappe.get_all(
+                "Geo_mat_layer",
+                filters={
+                    "parent": name,
+                    "parenttype": "Monthly Production Planning",
+                    "parentfield": "geo_mat_layer",
+                },
+                fields=["geo_ref_description", "custom_material_type"],
+                order_by="idx asc",
+            )
+            if row.geo_ref_description
+        }
+
+        self.tub_factor_rows = frappe.get_all(
+            "Monthly Production Tub Factor",
+            filters={
+                "parent": name,
+                "parenttype": "Monthly Production Planning",
+                "parentfield": "tub_factors",
+            },
+            fields=["tub_factor", "item_name", "mat_type", "factor_value"],
+            order_by="idx asc",
+        )
+
+        approved_factor_names = {row.tub_factor for row in self.tub_factor_rows if row.tub_factor}
+
+        self.approved_factors = {}
+
+        if approved_factor_names:
+            self.approved_factors = {
+                factor.name: factor
+                for factor in frappe.get_all(
+                    "Tub Factor",
+                    filters={
+                        "name": ["in", list(approved_factor_names)],
+                        "docstatus": 1,
+                    },
+                    fields=["name", "item_name", "mat_type", "tub_factor"],
+                    limit_page_length=500,
+                )
+            }
+
+    def planning_factor(self, item_name, mat_type, first=False):
+        """
+        Planning factor row for a (truck model, material type) pair, ignoring
+        case and padding, as {"link", "value"}. The first matching row wins
+        when first is set, otherwise the last, matching the two original lookups.
+        """
+        key = (_factor_key(item_name), _factor_key(mat_type))
+        match = None
+
+        for row in self.tub_factor_rows:
+            if (_factor_key(row.item_name), _factor_key(row.mat_type)) != key:
+                continue
+
+            match = row
+            if first:
+                break
+
+        if not match or not key[0] or not key[1]:
+            return None
+
+        return {"link": match.tub_factor, "value": float(match.factor_value or 0)}
+
+    def approved_factors_for(self, item_name, mat_type):
+        key = (_factor_key(item_name), _factor_key(mat_type))
+
+        return [
+            factor
+            for factor in self.approved_factors.values()
+            if (_factor_key(factor.item_name), _factor_key(factor.mat_type)) == key
+        ]
+
+
+def get_plan_context(plan_name):
+    """Request-scoped PlanContext for a plan, or None if it does not exist."""
+    if not plan_name:
+        return None
+
+    modified = frappe.db.get_value("Monthly Production Planning", plan_name, "modified")
+
+    if not modified:
+        return None
+
+    if not hasattr(frappe.local, "hourly_production_plan_contexts"):
+        frappe.local.hourly_production_plan_contexts = {}
+
+    contexts = frappe.local.hourly_production_plan_contexts
+    key = (plan_name, str(modified))
+
+    if key not in contexts:
+        contexts[key] = PlanContext(plan_name, modified)
+
+    return contexts[key]
+
+
 @frappe.whitelist()
 def get_planning_tub_factor(
     monthly_production_plan,
@@ -1728,29 +2222,16 @@ def get_planning_tub_factor(
     ):
         return {}
 
-    result = frappe.db.sql(
-        """
-        SELECT
-            mptf.tub_factor AS tub_factor_doc_link,
-            mptf.factor_value AS factor_value
-        FROM `tabMonthly Production Tub Factor` mptf
-        WHERE mptf.parent = %(monthly_production_plan)s
-          AND mptf.parenttype = 'Monthly Production Planning'
-          AND mptf.parentfield = 'tub_factors'
-          AND TRIM(mptf.item_name) = TRIM(%(item_name)s)
-          AND TRIM(mptf.mat_type) = TRIM(%(mat_type)s)
-        ORDER BY mptf.idx ASC
-        LIMIT 1
-        """,
-        {
-            "monthly_production_plan": monthly_production_plan,
-            "item_name": item_name,
-            "mat_type": mat_type,
-        },
-        as_dict=True,
-    )
+    plan = get_plan_context(monthly_production_plan)
+    factor = plan.planning_factor(item_name, mat_type, first=True) if plan else None
 
-    return result[0] if result else {}
+    if not factor:
+        return {}
+
+    return {
+        "tub_factor_doc_link": factor["link"],
+        "factor_value": factor["value"],
+    }
 
 
 @frappe.whitelist()
@@ -1782,40 +2263,30 @@ def get_mpp_tub_factor_options(
     if not monthly_production_plan or not item_name or not mat_type:
         return []
 
-    return frappe.db.sql(
-        """
-        SELECT
-            tf.name,
-            CONCAT(
-                tf.item_name,
-                ' | ',
-                tf.mat_type,
-                ' | Factor ',
-                tf.tub_factor
-            ) AS description
-        FROM `tabMonthly Production Tub Factor` mptf
-        INNER JOIN `tabTub Factor` tf
-            ON tf.name = mptf.tub_factor
-        WHERE mptf.parent = %(monthly_production_plan)s
-          AND mptf.parenttype = 'Monthly Production Planning'
-          AND mptf.parentfield = 'tub_factors'
-          AND tf.docstatus = 1
-          AND tf.item_name = %(item_name)s
-          AND tf.mat_type = %(mat_type)s
-          AND (
-                tf.name LIKE %(txt)s
-                OR tf.item_name LIKE %(txt)s
-                OR tf.mat_type LIKE %(txt)s
-              )
-        ORDER BY tf.tub_factor ASC, tf.name ASC
-        LIMIT %(start)s, %(page_len)s
-        """,
-        {
-            "monthly_production_plan": monthly_production_plan,
-            "item_name": item_name,
-            "mat_type": mat_type,
-            "txt": f"%{txt or ''}%",
-            "start": int(start or 0),
-            "page_len": int(page_len or 20),
-        },
-    )
\ No newline at end of file
+    plan = get_plan_context(monthly_production_plan)
+
+    if not plan:
+        return []
+
+    txt = (txt or "").lower()
+    factors = sorted(
+        (
+            factor
+            for factor in plan.approved_factors_for(item_name, mat_type)
+            if txt in (factor.name or "").lower()
+            or txt in (factor.item_name or "").lower()
+            or txt in (factor.mat_type or "").lower()
+        ),
+        key=lambda factor: (factor.tub_factor or 0, factor.name),
+    )
+
+    start = int(start or 0)
+    page_len = int(page_len or 20)
+
+    return [
+        (
+            factor.name,
+            f"{factor.item_name} | {factor.mat_type} | Factor {factor.tub_factor}",
+        )
+        for factor in factors[start:start + page_len]
+    ]
@@ -2165,3 +2165,29 @@ function renderMonthProdDaysHTML(frm) {
 }
 
 
+
+// ─────────────────────────────────────────────
+// Month-to-Date background refresh indicator
+// ─────────────────────────────────────────────
+frappe.ui.form.on('Monthly Production Planning', {
+  refresh(frm) {
+    if (frm.is_new()) return;
+
+    frappe.call({
+      method: 'is_production.production.doctype.monthly_production_planning.monthly_production_planning.get_mtd_refresh_status',
+      args: { name: frm.doc.name },
+      callback(r) {
+        const status = r.message || {};
+        const last = status.last_refreshed
+          ? frappe.datetime.str_to_user(status.last_refreshed)
+          : __('not yet');
+
+        frm.dashboard.set_headline(
+          status.pending
+            ? `<span class="indicator orange">${__('Month-to-Date refresh pending')}</span> <span class="text-muted">${__('Last refreshed: {0}', [last])}</span>`
+            : `<span class="indicator green">${__('Month-to-Date up to date')}</span> <span class="text-muted">${__('Last refreshed: {0}', [last])}</span>`
+        );
+      }
+    });
+  }
+});
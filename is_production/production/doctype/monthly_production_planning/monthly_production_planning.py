@@ -7,9 +7,20 @@ import frappe
 from frappe.model.document import Document
 import datetime
 from frappe.exceptions import TimestampMismatchError
-from frappe.utils import add_days, flt, get_datetime, getdate
+from frappe.utils import add_days, flt, get_datetime, getdate, now_datetime
 
 
+COAL_CONVERSION = 1.5
+MTD_RECONCILE_LOOKBACK_DAYS = 7
+
+# Background MTD refresh: saves mark a plan dirty; one job per plan rebuilds
+# it at most once every MTD_REFRESH_INTERVAL_SECONDS. Plans still dirty after
+# that (throttled or saved during a rebuild) are picked up by the per-minute
+# process_pending_mtd_refreshes sweep.
+MTD_REFRESH_INTERVAL_SECONDS = 30
+MTD_REFRESH_PENDING_KEY = "is_production:mtd_refresh_pending"
+MTD_REFRESH_LAST_KEY = "is_production:mtd_refresh_last"
+
 class MonthlyProductionPlanning(Document):
     def before_insert(self):
         """
@@ -326,7 +337,6 @@ class MonthlyProductionPlanning(Document):
         # MONTH ACTUAL COAL (MATCHES PRODUCTION SUMMARY)
         # ─────────────────────────────────────────────
 
-        COAL_CONVERSION = 1.5
         month_actual_coal = 0
 
         start_dt = get_datetime(self.prod_month_start_date)
@@ -502,6 +512,349 @@ def update_mtd_production(name):
         )
         return {"status": "error", "message": str(e)}
 
+def apply_hourly_production_delta(before=None, after=None):
+    """
+    Apply one Hourly Production change to the MTD ledger.
+
+    before / after are the tracked values of the record before and after the
+    save (None on insert / delete): month_prod_planning,
+    monthly_production_child_ref, total_ts_bcm, total_dozing_bcm, coal_bcm,
+    prod_date and location. A record that moved plan or day is removed from
+    the old day row and added to the new one.
+    """
+    entries = {}
+
+    for sign, values in ((-1, before), (1, after)):
+        if not values or not values.get("month_prod_planning") or not values.get("monthly_production_child_ref"):
+            continue
+
+        key = (
+            values.get("month_prod_planning"),
+            values.get("monthly_production_child_ref"),
+            getdate(values.get("prod_date")) if values.get("prod_date") else None,
+            values.get("location"),
+        )
+        entry = entries.setdefault(key, [0.0, 0.0, 0.0])
+        entry[0] += sign * flt(values.get("total_ts_bcm"))
+        entry[1] += sign * flt(values.get("total_dozing_bcm"))
+        entry[2] += sign * flt(values.get("coal_bcm"))
+
+    applied = False
+
+    for (name, child_ref, prod_date, location), (ts_delta, dozing_delta, coal_delta) in entries.items():
+        if not (ts_delta or dozing_delta or coal_delta):
+            continue
+
+        applied = apply_mtd_delta(
+            name,
+            child_ref,
+            ts_delta=ts_delta,
+            dozing_delta=dozing_delta,
+            coal_delta=coal_delta,
+            prod_date=prod_date,
+            location=location,
+        ) or applied
+
+    return applied
+
+
+def apply_mtd_delta(name, child_ref, ts_delta=0, dozing_delta=0, coal_delta=0, prod_date=None, location=None):
+    """
+    O(1) Month-to-Date update for one day row.
+
+    Shifts the day totals, the running cumulatives from that day on, the
+    survey variance row (when the day is on or before the latest survey) and
+    the parent totals by the given deltas, without reloading the plan or
+    re-querying the month. Completed days/hours are taken as stored;
+    reconcile_mtd_production() rebuilds everything from source.
+    """
+    plan = frappe.db.get_value(
+        "Monthly Production Planning",
+        name,
+        [
+            "name",
+            "location",
+            "prod_month_start_date",
+            "prod_month_end_date",
+            "month_act_ts_bcm_tallies",
+            "month_act_dozing_bcm_tallies",
+            "monthly_act_tally_survey_variance",
+            "month_actual_coal",
+            "prod_days_completed",
+            "month_prod_hours_completed",
+            "total_month_prod_hours",
+        ],
+        as_dict=True,
+        for_update=True,
+    )
+
+    if not plan:
+        return False
+
+    row = frappe.db.get_value(
+        "Monthly Production Days",
+        {
+            "parent": name,
+            "parenttype": "Monthly Production Planning",
+            "parentfield": "month_prod_days",
+            "hourly_production_reference": child_ref,
+        },
+        ["name", "idx", "shift_start_date"],
+        as_dict=True,
+    )
+
+    # Hourly records that do not map to a day row never counted towards MTD.
+    if not row or not row.shift_start_date:
+        return False
+
+    ts_delta = flt(ts_delta)
+    dozing_delta = flt(dozing_delta)
+
+    frappe.db.sql("""
+        UPDATE `tabMonthly Production Days`
+        SET total_ts_bcms = COALESCE(total_ts_bcms, 0) + %(ts)s,
+            total_dozing_bcms = COALESCE(total_dozing_bcms, 0) + %(dz)s
+        WHERE name = %(row)s
+    """, {"ts": ts_delta, "dz": dozing_delta, "row": row.name})
+
+    # Same ordering as the full rebuild: shift_start_date, then table order.
+    frappe.db.sql("""
+        UPDATE `tabMonthly Production Days`
+        SET cum_ts_bcms = COALESCE(cum_ts_bcms, 0) + %(ts)s,
+            tot_cumulative_dozing_bcms = COALESCE(tot_cumulative_dozing_bcms, 0) + %(dz)s
+        WHERE parent = %(plan)s
+          AND parenttype = 'Monthly Production Planning'
+          AND parentfield = 'month_prod_days'
+          AND (
+              shift_start_date > %(date)s
+              OR (shift_start_date = %(date)s AND idx >= %(idx)s)
+          )
+    """, {"ts": ts_delta, "dz": dozing_delta, "plan": name, "date": row.shift_start_date, "idx": row.idx})
+
+    survey_var = flt(plan.monthly_act_tally_survey_variance)
+    survey_row = _get_latest_survey_row(name)
+
+    if survey_row and (
+        survey_row.shift_start_date > row.shift_start_date
+        or (survey_row.shift_start_date == row.shift_start_date and survey_row.idx >= row.idx)
+    ):
+        frappe.db.sql("""
+            UPDATE `tabMonthly Production Days`
+            SET cum_ts_variance = COALESCE(cum_ts_variance, 0) - %(ts)s,
+                cum_dozing_variance = COALESCE(cum_dozing_variance, 0) - %(dz)s
+            WHERE name = %(row)s
+        """, {"ts": ts_delta, "dz": dozing_delta, "row": survey_row.name})
+
+        survey_var -= ts_delta + dozing_delta
+
+    month_actual_coal = flt(plan.month_actual_coal)
+
+    if coal_delta and (not location or location == plan.location) and _counts_towards_month_coal(plan, prod_date):
+        month_actual_coal += flt(coal_delta) * COAL_CONVERSION
+
+    total_ts = flt(plan.month_act_ts_bcm_tallies) + ts_delta
+    total_dz = flt(plan.month_act_dozing_bcm_tallies) + dozing_delta
+    actual = total_ts + total_dz + survey_var
+
+    done_days = flt(plan.prod_days_completed)
+    done_hours = flt(plan.month_prod_hours_completed)
+    mtd_day = actual / done_days if done_days else 0
+    mtd_hour = actual / done_hours if done_hours else 0
+
+    if month_actual_coal:
+        split_ratio = (actual - (month_actual_coal / COAL_CONVERSION)) / month_actual_coal
+    else:
+        split_ratio = 0
+
+    frappe.db.set_value(
+        "Monthly Production Planning",
+        name,
+        {
+            "month_act_ts_bcm_tallies": total_ts,
+            "month_act_dozing_bcm_tallies": total_dz,
+            "monthly_act_tally_survey_variance": survey_var,
+            "month_actual_bcm": actual,
+            "month_actual_coal": month_actual_coal,
+            "split_ratio": split_ratio,
+            "mtd_bcm_day": mtd_day,
+            "mtd_bcm_hour": mtd_hour,
+            "month_forecated_bcm": mtd_hour * flt(plan.total_month_prod_hours),
+        },
+        update_modified=False,
+    )
+
+    return True
+
+
+def _get_latest_survey_row(name):
+    """Day row carrying the latest submitted Survey, as picked by update_mtd_production."""
+    rows = frappe.db.sql("""
+        SELECT d.name, d.idx, d.shift_start_date
+        FROM `tabMonthly Production Days` d
+        WHERE d.parent = %s
+          AND d.parenttype = 'Monthly Production Planning'
+          AND d.parentfield = 'month_prod_days'
+          AND d.shift_start_date IS NOT NULL
+          AND EXISTS (
+              SELECT 1 FROM `tabSurvey` s
+              WHERE s.hourly_prod_ref = d.hourly_production_reference
+                AND s.docstatus = 1
+          )
+        ORDER BY d.shift_start_date DESC, d.idx ASC
+        LIMIT 1
+    """, (name,), as_dict=True)
+
+    return rows[0] if rows else None
+
+
+def _counts_towards_month_coal(plan, prod_date):
+    """Mirror the month coal window: after the in-month survey, else the whole month."""
+    if not prod_date or not plan.prod_month_start_date or not plan.prod_month_end_date:
+        return False
+
+    prod_date = getdate(prod_date)
+    start_date = getdate(plan.prod_month_start_date)
+    end_date = getdate(plan.prod_month_end_date)
+
+    survey_date = frappe.db.get_value(
+        "Survey",
+        {
+            "location": plan.location,
+            "last_production_shift_start_date": ["<=", get_datetime(f"{end_date} 23:59:59")],
+            "docstatus": 1,
+        },
+        "last_production_shift_start_date",
+        order_by="last_production_shift_start_date desc",
+    )
+
+    if survey_date:
+        survey_date = getdate(survey_date)
+
+        if start_date <= survey_date <= end_date:
+            return survey_date < prod_date <= end_date
+
+    return start_date <= prod_date <= end_date
+
+
+def request_mtd_refresh(name):
+    """Mark a plan's MTD figures dirty and make sure one refresh job is queued."""
+    if not name:
+        return
+
+    frappe.cache.hset(MTD_REFRESH_PENDING_KEY, name, now_datetime())
+    enqueue_mtd_refresh(name)
+
+
+def enqueue_mtd_refresh(name):
+    frappe.enqueue(
+        "is_production.production.doctype.monthly_production_planning."
+        "monthly_production_planning.run_mtd_refresh",
+        queue="default",
+        job_id=f"mtd_refresh::{name}",
+        deduplicate=True,
+        enqueue_after_commit=True,
+        name=name,
+    )
+
+
+def _mtd_refresh_due(name):
+    last_refreshed = frappe.cache.hget(MTD_REFRESH_LAST_KEY, name)
+
+    return (
+        not last_refreshed
+        or (now_datetime() - last_refreshed).total_seconds() >= MTD_REFRESH_INTERVAL_SECONDS
+    )
+
+
+def run_mtd_refresh(name):
+    """
+    Worker for request_mtd_refresh: one rebuild of a dirty plan. A plan
+    rebuilt less than MTD_REFRESH_INTERVAL_SECONDS ago is left dirty for the
+    sweep instead of holding the worker, so a burst of saves collapses into
+    one or two full computations.
+    """
+    if not frappe.cache.hget(MTD_REFRESH_PENDING_KEY, name) or not _mtd_refresh_due(name):
+        return
+
+    # Clear before computing so saves made during the rebuild mark it dirty again.
+    frappe.cache.hdel(MTD_REFRESH_PENDING_KEY, name)
+
+    try:
+        frappe.get_doc("Monthly Production Planning", name).update_mtd_production()
+        frappe.db.commit()
+    except Exception:
+        frappe.db.rollback()
+        frappe.log_error(
+            message=frappe.get_traceback(),
+            title=f"MTD Background Refresh Failed: {name}"
+        )
+
+    frappe.cache.hset(MTD_REFRESH_LAST_KEY, name, now_datetime())
+
+    # A save during the rebuild could not queue a job (this one still counts
+    # as running), so its flag is checked again by process_pending_mtd_refreshes
+    # once the interval has passed.
+
+
+def process_pending_mtd_refreshes():
+    """Scheduler: queue a refresh for every dirty plan whose interval has elapsed."""
+    for name in frappe.cache.hkeys(MTD_REFRESH_PENDING_KEY) or []:
+        name = frappe.safe_decode(name)
+
+        if _mtd_refresh_due(name):
+            enqueue_mtd_refresh(name)
+
+
+@frappe.whitelist()
+def get_mtd_refresh_status(name):
+    """Pending flag and last background rebuild time, for the form indicator."""
+    frappe.has_permission("Monthly Production Planning", "read", name, throw=True)
+
+    last_refreshed = frappe.cache.hget(MTD_REFRESH_LAST_KEY, name)
+
+    return {
+        "pending": bool(frappe.cache.hget(MTD_REFRESH_PENDING_KEY, name)),
+        "last_refreshed": str(last_refreshed) if last_refreshed else None,
+    }
+
+
+def reconcile_mtd_production():
+    """
+    Scheduled full rebuild of Month-to-Date figures.
+
+    Hourly saves only apply deltas; this recomputes open plans (and those
+    closed in the last few days) from Hourly Production and Survey so survey
+    variance, coal and completed day/hour counts stay exact.
+    """
+    cutoff = add_days(getdate(), -MTD_RECONCILE_LOOKBACK_DAYS)
+
+    names = frappe.get_all(
+        "Monthly Production Planning",
+        filters={
+            "prod_month_start_date": ["<=", getdate()],
+            "prod_month_end_date": [">=", cutoff],
+        },
+        pluck="name",
+    )
+
+    for name in names:
+        # This rebuild covers any pending background refresh.
+        frappe.cache.hdel(MTD_REFRESH_PENDING_KEY, name)
+
+        try:
+            frappe.get_doc("Monthly Production Planning", name).update_mtd_production()
+            frappe.db.commit()
+        except Exception:
+            frappe.db.rollback()
+            frappe.log_error(
+                message=frappe.get_traceback(),
+                title=f"MTD Reconciliation Failed: {name}"
+            )
+            continue
+
+        frappe.cache.hset(MTD_REFRESH_LAST_KEY, name, now_datetime())
+
+
 @frappe.whitelist()
 def dashboard_monthly_production_query(doctype, txt, searchfield, start, page_len, filters):
     """
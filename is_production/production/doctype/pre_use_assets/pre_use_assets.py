@@ -1,9 +1,14 @@
 # Copyright (c) 2025, Isambane Mining (Pty) Ltd and contributors
 # For license information, please see license.txt
 
-# import frappe
+import frappe
 from frappe.model.document import Document
 
 
 class PreuseAssets(Document):
 	pass
+
+
+def on_doctype_update():
+	# Per-asset meter chain: previous-shift lookups in Pre-Use Hours
+	frappe.db.add_index("Pre-use Assets", ["asset_name", "shift_date", "shift_order"])
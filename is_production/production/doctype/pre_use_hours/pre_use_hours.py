@@ -9,6 +9,16 @@ from frappe.utils import flt
 from frappe.utils.data import getdate
 
 
+# Order of shifts within a day for the per-asset meter chain
+# (Pre-use Assets.shift_date / shift_order). Unknown shifts sort first.
+SHIFT_ORDER = {
+    "Morning": 1,
+    "Day": 1,
+    "Afternoon": 2,
+    "Night": 3,
+}
+
+
 class PreUseHours(Document):
     def before_validate(self):
         """
@@ -17,6 +27,32 @@ class PreUseHours(Document):
         convert them to Asset.name BEFORE Frappe link validation runs.
         """
         self._normalize_asset_links()
+        self._set_meter_chain_keys()
+
+    def _set_meter_chain_keys(self):
+        """Copy shift_date / shift order onto the child rows for the asset meter chain index."""
+        shift_date = getdate(self.shift_date) if self.shift_date else None
+        shift_order = SHIFT_ORDER.get(self.shift, 0)
+
+        for r in self.get("pre_use_assets") or []:
+            r.shift_date = shift_date
+            r.shift_order = shift_order
+
+        self.flags.previous_asset_rows = None
+
+    def get_previous_asset_rows(self):
+        """
+        Previous Pre-use Assets row per asset on this sheet, looked up once per
+        save (see get_previous_asset_rows below).
+        """
+        if self.flags.previous_asset_rows is None:
+            self.flags.previous_asset_rows = get_previous_asset_rows(
+                [cr.asset_name for cr in self.pre_use_assets if cr.asset_name],
+                self.shift_date,
+                self.shift,
+            )
+
+        return self.flags.previous_asset_rows
 
     def _normalize_asset_links(self):
         rows = self.get("pre_use_assets") or []
@@ -112,13 +148,14 @@ class PreUseHours(Document):
         regardless of location.
         """
         bad_assets = []
+        previous_rows = self.get_previous_asset_rows()
 
         for cr in self.pre_use_assets:
             if not cr.asset_name or cr.eng_hrs_start is None:
                 continue
 
 
-            prev_row = get_previous_asset_row(cr.asset_name, self.shift_date, self.shift)
+            prev_row = previous_rows.get(cr.asset_name)
             if not prev_row or prev_row.eng_hrs_start is None:
                 continue
 
@@ -189,16 +226,18 @@ class PreUseHours(Document):
     def update_previous_eng_hrs_end(self):
         """
         Copy eng_hrs_end/working_hours into the previous row for each asset globally,
-        then re-run integrity on each affected parent document.
+        then queue an integrity re-check of the affected parent documents.
         """
         try:
             touched_parents = set()
+            updates = {}
+            previous_rows = self.get_previous_asset_rows()
 
             for cr in self.pre_use_assets:
                 if not cr.asset_name or cr.eng_hrs_start is None:
                     continue
 
-                prev_row = get_previous_asset_row(cr.asset_name, self.shift_date, self.shift)
+                prev_row = previous_rows.get(cr.asset_name)
                 if not prev_row:
                     continue
 
@@ -206,41 +245,29 @@ class PreUseHours(Document):
                 if prev_row.eng_hrs_start is not None:
                     prev_row.working_hours = round(flt(prev_row.eng_hrs_end) - flt(prev_row.eng_hrs_start), 1)
 
-                frappe.db.set_value(
-                    "Pre-use Assets",
-                    prev_row.name,
-                    {
-                        "eng_hrs_end": prev_row.eng_hrs_end,
-                        "working_hours": prev_row.working_hours
-                    },
-                    update_modified=False
-                )
+                updates[prev_row.name] = {
+                    "eng_hrs_end": prev_row.eng_hrs_end,
+                    "working_hours": prev_row.working_hours
+                }
 
                 touched_parents.add(prev_row.parent)
 
-            previous_html_parts = []
-
-            for parent_name in touched_parents:
-                prev_doc = frappe.get_doc("Pre-Use Hours", parent_name)
-                prev_doc.evaluate_data_integrity()
+            if updates:
+                frappe.db.bulk_update("Pre-use Assets", updates, update_modified=False)
 
-                frappe.db.set_value(
-                    "Pre-Use Hours",
-                    prev_doc.name,
-                    {
-                        "data_integrity_summary": prev_doc.data_integrity_summary,
-                        "data_integ_indicator": prev_doc.data_integ_indicator
-                    },
-                    update_modified=False
+            if touched_parents:
+                frappe.enqueue(
+                    "is_production.production.doctype.pre_use_hours.pre_use_hours.reevaluate_data_integrity",
+                    queue="short",
+                    enqueue_after_commit=True,
+                    parents=sorted(touched_parents),
                 )
 
-                frappe.publish_realtime("preuse:reload_doc", {
-                    "doctype": "Pre-Use Hours", "name": prev_doc.name
-                })
-
-                previous_html_parts.append(
-                    f"<h4>Previous Shift Integrity: {prev_doc.name}</h4>{prev_doc.data_integrity_summary or '<p><b>No issues in previous shift.</b></p>'}"
-                )
+            previous_html_parts = [
+                f"<h4>Previous Shift Integrity: {parent_name}</h4>"
+                "<p>Engine hours updated; integrity is being re-checked in the background.</p>"
+                for parent_name in sorted(touched_parents)
+            ]
 
             nav_buttons = """
                 <div style="margin-bottom:10px;">
@@ -579,58 +606,88 @@ def get_previous_document(location, creation_dt):
 
 
 
-def get_previous_asset_row(asset_name, shift_date, shift):
+def get_previous_asset_rows(asset_names, shift_date, shift):
     """
-    Get the previous Pre-use Assets row for the same asset globally,
+    Previous Pre-use Assets row for each asset globally, as {asset_name: row},
     based on shift_date + shift order, not creation time.
     Plot 22 records are included as valid previous records.
-    """
-    shift_order = {
-        "Morning": 1,
-        "Day": 1,
-        "Afternoon": 2,
-        "Night": 3,
-    }
 
-    current_order = shift_order.get(shift, 0)
+    Resolved in one query on the meter chain index
+    (asset_name, shift_date, shift_order) for all assets of a sheet.
+    """
+    asset_names = sorted(set(filter(None, asset_names or [])))
+    if not asset_names or not shift_date:
+        return {}
 
-    row = frappe.db.sql("""
+    rows = frappe.db.sql("""
         SELECT
-            pa.name,
-            pa.parent,
-            pa.asset_name,
-            pa.eng_hrs_start,
-            pa.eng_hrs_end,
-            pa.working_hours,
+            prev.name,
+            prev.parent,
+            prev.asset_name,
+            prev.eng_hrs_start,
+            prev.eng_hrs_end,
+            prev.working_hours,
             puh.location,
             puh.shift_date,
             puh.shift
-        FROM `tabPre-use Assets` pa
-        INNER JOIN `tabPre-Use Hours` puh ON puh.name = pa.parent
-        WHERE pa.asset_name = %s
-          AND (
-                puh.shift_date < %s
-                OR (
-                    puh.shift_date = %s
-                    AND CASE puh.shift
-                        WHEN 'Morning' THEN 1
-                        WHEN 'Day' THEN 1
-                        WHEN 'Afternoon' THEN 2
-                        WHEN 'Night' THEN 3
-                        ELSE 0
-                    END < %s
-                )
-          )
-        ORDER BY
-            puh.shift_date DESC,
-            CASE puh.shift
-                WHEN 'Night' THEN 3
-                WHEN 'Afternoon' THEN 2
-                WHEN 'Morning' THEN 1
-                WHEN 'Day' THEN 1
-                ELSE 0
-            END DESC
-        LIMIT 1
-    """, (asset_name, shift_date, shift_date, current_order), as_dict=True)
-
-    return frappe._dict(row[0]) if row else None
\ No newline at end of file
+        FROM (
+            SELECT
+                pa.name,
+                pa.parent,
+                pa.asset_name,
+                pa.eng_hrs_start,
+                pa.eng_hrs_end,
+                pa.working_hours,
+                ROW_NUMBER() OVER (
+                    PARTITION BY pa.asset_name
+                    ORDER BY pa.shift_date DESC, pa.shift_order DESC
+                ) AS chain_pos
+            FROM `tabPre-use Assets` pa
+            WHERE pa.parenttype = 'Pre-Use Hours'
+              AND pa.asset_name IN %(assets)s
+              AND (
+                    pa.shift_date < %(shift_date)s
+                    OR (pa.shift_date = %(shift_date)s AND pa.shift_order < %(shift_order)s)
+              )
+        ) prev
+        INNER JOIN `tabPre-Use Hours` puh ON puh.name = prev.parent
+        WHERE prev.chain_pos = 1
+    """, {
+        "assets": asset_names,
+        "shift_date": getdate(shift_date),
+        "shift_order": SHIFT_ORDER.get(shift, 0),
+    }, as_dict=True)
+
+    return {row.asset_name: row for row in rows}
+
+
+def reevaluate_data_integrity(parents):
+    """
+    Background job for update_previous_eng_hrs_end: re-run integrity on the
+    Pre-Use Hours whose rows were closed off by a later shift.
+    """
+    for parent_name in parents or []:
+        if not frappe.db.exists("Pre-Use Hours", parent_name):
+            continue
+
+        prev_doc = frappe.get_doc("Pre-Use Hours", parent_name)
+
+        try:
+            prev_doc.evaluate_data_integrity()
+        except Exception:
+            frappe.log_error(message=frappe.get_traceback(), title="Pre-Use Hours Integrity Re-check Error")
+            continue
+
+        frappe.db.set_value(
+            "Pre-Use Hours",
+            prev_doc.name,
+            {
+                "data_integrity_summary": prev_doc.data_integrity_summary,
+                "data_integ_indicator": prev_doc.data_integ_indicator
+            },
+            update_modified=False
+        )
+
+        frappe.publish_realtime("preuse:reload_doc", {
+            "doctype": "Pre-Use Hours", "name": prev_doc.name
+        })
@@ -2,7 +2,12 @@ from __future__ import annotations
 
 import frappe
 from frappe.model.document import Document
-from frappe.utils import getdate, add_days, now_datetime
+from frappe.utils import getdate, add_days, cint, flt, now_datetime
+
+from is_production.production.doctype.production_fact.production_fact import (
+    get_excavator_hour_bcms,
+    is_fact_table_enabled,
+)
 
 
 # -------------------------------------------------------------------
@@ -59,6 +64,27 @@ def _fetch_submitted_assets(site: str) -> list[dict]:
         limit_page_length=5000,
     )
 
+def _fetch_submitted_assets_for_sites(sites: list[str]) -> dict[str, list[dict]]:
+    """{site: submitted Assets} for several sites in one query, ordered as _fetch_submitted_assets."""
+    data = {site: [] for site in sites}
+    if not sites:
+        return data
+
+    for asset in frappe.get_all(
+        "Asset",
+        filters={
+            "docstatus": 1,
+            "location": ["in", sites],
+            "asset_category": ["in", AU_DB_CATEGORIES],
+        },
+        fields=["name", "asset_name", "asset_category", "location"],
+        order_by="asset_category asc, asset_name asc",
+        limit_page_length=0,
+    ):
+        data.setdefault(asset.pop("location"), []).append(asset)
+
+    return data
+
 AU_DT = "Availability and Utilisation"
 AU_DB_CATEGORIES = ["ADT", "Excavator", "Dozer"]
 
@@ -219,6 +245,46 @@ def _fetch_au_rows(site: str, start_date, end_date, asset_names: list[str] | Non
         limit_page_length=50000,
     )
 
+def _fetch_au_rows_for_sites(site_asset_names: dict[str, list[str]], start_date, end_date) -> dict[str, list[dict]]:
+    """
+    {site: A&U rows} for several sites in one query, each limited to that
+    site's asset names and ordered as _fetch_au_rows.
+    """
+    data = {site: [] for site in site_asset_names}
+    asset_names = sorted({name for names in site_asset_names.values() for name in names})
+    if not asset_names:
+        return data
+
+    site_assets = {site: set(names) for site, names in site_asset_names.items()}
+
+    for row in frappe.get_all(
+        AU_DT,
+        filters={
+            "location": ["in", list(site_asset_names)],
+            "shift_date": ["between", [start_date, end_date]],
+            "asset_category": ["in", AU_DB_CATEGORIES],
+            "asset_name": ["in", asset_names],
+        },
+        fields=[
+            "location",
+            "shift_date",
+            "shift",
+            "asset_category",
+            "asset_name",
+            "plant_shift_availability",
+            "plant_shift_utilisation",
+            "docstatus",
+        ],
+        order_by="shift_date asc, asset_category asc, asset_name asc, shift asc",
+        limit_page_length=0,
+    ):
+        site = row.pop("location")
+        if row.asset_name in site_assets.get(site, ()):
+            data[site].append(row)
+
+    return data
+
+
 def _compute_au_daily_averages(rows: list[dict]) -> dict:
     """
     Returns:
@@ -461,6 +527,94 @@ def _compute_au_asset_date_averages(rows: list[dict]) -> dict:
     return out
 
 
+def _child_key(row, key_fields: tuple[str, ...]) -> tuple:
+    return tuple("" if row.get(f) is None else str(row.get(f)) for f in key_fields)
+
+
+FLOAT_FIELDTYPES = {"Float", "Percent", "Currency"}
+INT_FIELDTYPES = {"Int", "Check"}
+
+
+def _get_value_converters(pe_doc: Document, fieldname: str) -> dict:
+    """Child field -> function giving a value as the database will store it (None -> 0 for numbers)."""
+    child_meta = frappe.get_meta(pe_doc.meta.get_field(fieldname).options)
+    converters = {}
+
+    for df in child_meta.fields:
+        if df.fieldtype in FLOAT_FIELDTYPES:
+            converters[df.fieldname] = flt
+        elif df.fieldtype in INT_FIELDTYPES:
+            converters[df.fieldname] = cint
+
+    return converters
+
+
+def _values_differ(current, new) -> bool:
+    if isinstance(current, (int, float)) and isinstance(new, (int, float)):
+        return abs(current - new) > 1e-9
+    return current != new
+
+
+def _sync_child_table(pe_doc: Document, fieldname: str, key_fields: tuple[str, ...], rows: list[dict]):
+    """
+    Make child table `fieldname` hold `rows` (field -> value dicts, in order).
+
+    Existing rows are matched on key_fields and kept, with only changed values
+    set; unmatched rows are appended and leftover rows dropped. The change set
+    is kept in pe_doc.flags.child_table_changes so that save writes only
+    those rows (see ProductionEfficiency.update_child_table).
+    """
+    converters = _get_value_converters(pe_doc, fieldname)
+
+    existing = {}
+    for row in pe_doc.get(fieldname) or []:
+        existing.setdefault(_child_key(row, key_fields), []).append(row)
+
+    ordered = []
+    changed = set()
+
+    for values in rows:
+        # Compare as stored, so an empty numeric cell (saved as 0) is not a change.
+        values = {
+            field: converters[field](value) if field in converters else value
+            for field, value in values.items()
+        }
+
+        matches = existing.get(_child_key(values, key_fields))
+        if not matches:
+            ordered.append(values)
+            continue
+
+        row = matches.pop(0)
+        for field, value in values.items():
+            current = row.get(field)
+            if field in converters:
+                current = converters[field](current)
+
+            if _values_differ(current, value):
+                row.set(field, value)
+                changed.add(row.name)
+
+        ordered.append(row)
+
+    pe_doc.set(fieldname, [])
+    for idx, row in enumerate(ordered, start=1):
+        row = pe_doc.append(fieldname, row)
+
+        if row.idx != idx:
+            row.idx = idx
+            if not row.is_new():
+                changed.add(row.name)
+
+    if pe_doc.flags.child_table_changes is None:
+        pe_doc.flags.child_table_changes = {}
+
+    pe_doc.flags.child_table_changes[fieldname] = {
+        "changed": changed,
+        "removed": [row.name for matches in existing.values() for row in matches if row.name],
+    }
+
+
 def _populate_availability_child_rows(pe_doc: Document, assets: list[dict], asset_date: dict, start_date, end_date):
     """
     per_asset_availability (Availability Child):
@@ -469,7 +623,7 @@ def _populate_availability_child_rows(pe_doc: Document, assets: list[dict], asse
     if not pe_doc.meta.has_field("per_asset_availability"):
         return
 
-    pe_doc.set("per_asset_availability", [])
+    rows = []
 
     d = _to_date(start_date)
     end_date = _to_date(end_date)
@@ -483,14 +637,17 @@ def _populate_availability_child_rows(pe_doc: Document, assets: list[dict], asse
             plant_no = a.get("asset_name") or "" # used in A&U rows
 
             v = (asset_date.get(plant_no, {}) or {}).get(day_key, {}) or {}
-            row = pe_doc.append("per_asset_availability", {})
-            row.set("date_", d)
-            row.set("weekdays_c", weekday_lbl)
-            row.set("assets_c", asset_docname)
-            row.set("availability_c", v.get("avail"))
+            rows.append({
+                "date_": d,
+                "weekdays_c": weekday_lbl,
+                "assets_c": asset_docname,
+                "availability_c": v.get("avail"),
+            })
 
         d = add_days(d, 1)
 
+    _sync_child_table(pe_doc, "per_asset_availability", ("assets_c", "date_"), rows)
+
 
 def _populate_utilisation_child_rows(pe_doc: Document, assets: list[dict], asset_date: dict, start_date, end_date):
     """
@@ -500,7 +657,7 @@ def _populate_utilisation_child_rows(pe_doc: Document, assets: list[dict], asset
     if not pe_doc.meta.has_field("per_asset_utilisation"):
         return
 
-    pe_doc.set("per_asset_utilisation", [])
+    rows = []
 
     d = _to_date(start_date)
     end_date = _to_date(end_date)
@@ -514,14 +671,17 @@ def _populate_utilisation_child_rows(pe_doc: Document, assets: list[dict], asset
             plant_no = a.get("asset_name") or "" # used in A&U rows
 
             v = (asset_date.get(plant_no, {}) or {}).get(day_key, {}) or {}
-            row = pe_doc.append("per_asset_utilisation", {})
-            row.set("date_d", d)
-            row.set("weekdays_c", weekday_lbl)
-            row.set("assets_c", asset_docname)
-            row.set("utilasazation_c", v.get("util"))
+            rows.append({
+                "date_d": d,
+                "weekdays_c": weekday_lbl,
+                "assets_c": asset_docname,
+                "utilasazation_c": v.get("util"),
+            })
 
         d = add_days(d, 1)
 
+    _sync_child_table(pe_doc, "per_asset_utilisation", ("assets_c", "date_d"), rows)
+
 
 def _populate_per_asset_tables(pe_doc: Document, assets: list[dict], au_rows: list[dict], start_date, end_date):
     asset_date = _compute_au_asset_date_averages(au_rows)
@@ -549,10 +709,8 @@ def _populate_au_tables(pe_doc: Document, au_daily: dict, start_date, end_date):
     start_date = _to_date(start_date)
     end_date = _to_date(end_date)
 
-    if pe_doc.meta.has_field("availability_b"):
-        pe_doc.set("availability_b", [])
-    if pe_doc.meta.has_field("utilisation_b"):
-        pe_doc.set("utilisation_b", [])
+    availability_rows = []
+    utilisation_rows = []
 
     d = start_date
     while d <= end_date:
@@ -560,67 +718,91 @@ def _populate_au_tables(pe_doc: Document, au_daily: dict, start_date, end_date):
         day_payload = au_daily.get(day_key, {}) or {}
 
         # Availability row
-        if pe_doc.meta.has_field("availability_b"):
-            r1 = pe_doc.append("availability_b", {})
-            r1.set("date_b", d)
-            r1.set("weekday_b", _weekday_label(d))
-            r1.set("adt_b", (day_payload.get("ADT", {}) or {}).get("avail"))
-            r1.set("excavator_b", (day_payload.get("Excavator", {}) or {}).get("avail"))
-            r1.set("dozer_b", (day_payload.get("Dozer", {}) or {}).get("avail"))
+        availability_rows.append({
+            "date_b": d,
+            "weekday_b": _weekday_label(d),
+            "adt_b": (day_payload.get("ADT", {}) or {}).get("avail"),
+            "excavator_b": (day_payload.get("Excavator", {}) or {}).get("avail"),
+            "dozer_b": (day_payload.get("Dozer", {}) or {}).get("avail"),
+        })
 
         # Utilisation row
-        if pe_doc.meta.has_field("utilisation_b"):
-            r2 = pe_doc.append("utilisation_b", {})
-            r2.set("date_b_b", d)
-            r2.set("weekday_b_b", _weekday_label(d))
-            r2.set("adt_b_b", (day_payload.get("ADT", {}) or {}).get("util"))
-            r2.set("excavator_b_b", (day_payload.get("Excavator", {}) or {}).get("util"))
-            r2.set("dozer_b_b", (day_payload.get("Dozer", {}) or {}).get("util"))
+        utilisation_rows.append({
+            "date_b_b": d,
+            "weekday_b_b": _weekday_label(d),
+            "adt_b_b": (day_payload.get("ADT", {}) or {}).get("util"),
+            "excavator_b_b": (day_payload.get("Excavator", {}) or {}).get("util"),
+            "dozer_b_b": (day_payload.get("Dozer", {}) or {}).get("util"),
+        })
 
         d = add_days(d, 1)
 
+    if pe_doc.meta.has_field("availability_b"):
+        _sync_child_table(pe_doc, "availability_b", ("date_b",), availability_rows)
+    if pe_doc.meta.has_field("utilisation_b"):
+        _sync_child_table(pe_doc, "utilisation_b", ("date_b_b",), utilisation_rows)
+
 
 
 
 def _fetch_hourly_bcms(site: str, start_date, end_date):
-    rows = frappe.db.sql(
+    return _fetch_hourly_bcms_for_sites([site], start_date, end_date).get(site, {})
+
+
+def _fetch_hourly_bcms_for_sites(sites: list[str], start_date, end_date) -> dict:
+    """{site: {prod_date: {excavator: {slot: bcm}}}} for several sites in one query."""
+    if is_fact_table_enabled():
+        rows = get_excavator_hour_bcms(sites, start_date, end_date)
+    else:
+        rows = _fetch_hourly_bcms_from_truck_loads(sites, start_date, end_date)
+
+    data = {site: {} for site in sites}
+    for r in rows:
+        d = _to_date(r.prod_date)
+        ex = r.excavator
+        slot_key = _normalise_hour_slot(r.hour_slot)
+        slot = HOUR_SLOT_MAP.get(slot_key) if slot_key else None
+        if not slot:
+            continue
+        data.setdefault(r.location, {}).setdefault(d, {}).setdefault(ex, {})[slot] = int(r.bcm or 0)
+
+    return data
+
+
+def _fetch_hourly_bcms_from_truck_loads(sites: list[str], start_date, end_date):
+    if not sites:
+        return []
+
+    return frappe.db.sql(
         """
         SELECT
+            hp.location AS location,
             hp.prod_date AS prod_date,
             tl.asset_name_shoval AS excavator,
             hp.hour_slot AS hour_slot,
             SUM(tl.bcms) AS bcm
         FROM `tabHourly Production` hp
         JOIN `tabTruck Loads` tl ON tl.parent = hp.name
-        WHERE hp.location = %s
-          AND hp.prod_date BETWEEN %s AND %s
+        WHERE hp.location IN %(sites)s
+          AND hp.prod_date BETWEEN %(start_date)s AND %(end_date)s
           AND tl.asset_name_shoval IS NOT NULL
         GROUP BY
+            hp.location,
             hp.prod_date,
             tl.asset_name_shoval,
             hp.hour_slot
         """,
-        (site, start_date, end_date),
+        {"sites": list(sites), "start_date": start_date, "end_date": end_date},
         as_dict=True,
     )
 
-    data = {}
-    for r in rows:
-        d = _to_date(r.prod_date)
-        ex = r.excavator
-        slot_key = _normalise_hour_slot(r.hour_slot)
-        slot = HOUR_SLOT_MAP.get(slot_key) if slot_key else None
-        if not slot:
-            continue
-        data.setdefault(d, {}).setdefault(ex, {})[slot] = int(r.bcm or 0)
-
-    return data
-
 
 def _populate_child_tables(pe_doc: Document, day_data: dict):
-    for _, day_field in DAY_TABLE_FIELDS.items():
-        if pe_doc.meta.has_field(day_field):
-            pe_doc.set(day_field, [])
+    day_rows = {
+        day_field: []
+        for day_field in DAY_TABLE_FIELDS.values()
+        if pe_doc.meta.has_field(day_field)
+    }
 
     for prod_date, excavators_map in day_data.items():
         weekday = prod_date.weekday()
@@ -637,12 +819,16 @@ def _populate_child_tables(pe_doc: Document, day_data: dict):
             continue
 
         for excavator_name in sorted(excavators_map.keys()):
-            row = pe_doc.append(day_field, {})
-            row.set("excavators", excavator_name)
+            row = {"excavators": excavator_name}
 
             ex_slot_data = excavators_map.get(excavator_name, {})
             for slot in range(1, 25):
-                row.set(slot_fields[slot - 1], int(ex_slot_data.get(slot, 0) or 0))
+                row[slot_fields[slot - 1]] = int(ex_slot_data.get(slot, 0) or 0)
+
+            day_rows[day_field].append(row)
+
+    for day_field, rows in day_rows.items():
+        _sync_child_table(pe_doc, day_field, ("excavators",), rows)
 
 
 def _get_hsc_production_excavators(site: str) -> int:
@@ -670,12 +856,37 @@ def _get_hsc_production_excavators(site: str) -> int:
     return 0
 
 
-def _update_single_pe_doc(doc: Document):
+def _get_prefetched(prefetched: dict | None, site: str | None, start_date=None, end_date=None) -> dict | None:
+    """The prefetched data for a site, when it was fetched for the same dates."""
+    data = (prefetched or {}).get((site or "").strip())
+    if not data:
+        return None
+
+    if start_date is not None and (
+        _to_date(start_date) != data["start_date"] or _to_date(end_date) != data["end_date"]
+    ):
+        return None
+
+    return data
+
+
+def _update_single_pe_doc(doc: Document, prefetched: dict | None = None):
+    """
+    Refresh a Production Efficiency document and save it.
+
+    prefetched: optional {site: data} from _prefetch_weekly_data. Data is used
+    only when its site and dates match the document; anything else is fetched
+    here.
+    """
     # -----------------------------
     # Hourly Production -> day child tables
     # -----------------------------
     if doc.site and doc.start_date and doc.end_date:
-        hourly = _fetch_hourly_bcms(doc.site, doc.start_date, doc.end_date)
+        site_data = _get_prefetched(prefetched, doc.site, doc.start_date, doc.end_date)
+        if site_data:
+            hourly = site_data["hourly"]
+        else:
+            hourly = _fetch_hourly_bcms(doc.site, doc.start_date, doc.end_date)
         _populate_child_tables(doc, hourly)
 
     # -----------------------------
@@ -718,12 +929,18 @@ def _update_single_pe_doc(doc: Document):
             doc.set("end_date_b", au_end)
 
         if au_site:
-            # Y-axis: submitted assets only
-            assets = _fetch_submitted_assets(au_site)
-            asset_names = [a.get("asset_name") for a in (assets or []) if a.get("asset_name")]
+            site_data = _get_prefetched(prefetched, au_site, au_start, au_end)
+
+            if site_data:
+                assets = site_data["assets"]
+                au_rows = site_data["au_rows"]
+            else:
+                # Y-axis: submitted assets only
+                assets = _fetch_submitted_assets(au_site)
+                asset_names = [a.get("asset_name") for a in (assets or []) if a.get("asset_name")]
 
-            # Pull A&U values for those assets within the filtered range
-            au_rows = _fetch_au_rows(au_site, au_start, au_end, asset_names=asset_names) if asset_names else []
+                # Pull A&U values for those assets within the filtered range
+                au_rows = _fetch_au_rows(au_site, au_start, au_end, asset_names=asset_names) if asset_names else []
 
             # Existing daily category tables
             au_daily = _compute_au_daily_averages(au_rows)
@@ -748,7 +965,13 @@ def _update_single_pe_doc(doc: Document):
     elif doc.get("site"):
         wc_site = doc.get("site")
 
-    _populate_wearcheck_snapshot(doc, wc_site, days_back=10)
+    site_data = _get_prefetched(prefetched, wc_site)
+    _populate_wearcheck_snapshot(
+        doc,
+        wc_site,
+        days_back=10,
+        rows=site_data["wearcheck"] if site_data else None,
+    )
 
 
     doc.save(ignore_permissions=True)
@@ -894,6 +1117,34 @@ def _fetch_wearcheck_flagged_window(site: str | None, days_back: int = 10) -> li
           then creation desc
     """
     site = (site or "").strip() or None
+    rows, has_component = _query_wearcheck_flagged_rows([site] if site else None, days_back)
+
+    return _pick_wearcheck_rows(rows, has_component)
+
+
+def _fetch_wearcheck_flagged_windows(sites: list[str], days_back: int = 10) -> dict[str, list[dict]]:
+    """{site: rows} as _fetch_wearcheck_flagged_window for several sites, in one query."""
+    data = {site: [] for site in sites}
+    if not sites:
+        return data
+
+    rows, has_component = _query_wearcheck_flagged_rows(sites, days_back)
+
+    site_rows = {}
+    for r in rows:
+        site_rows.setdefault(r.get("location"), []).append(r)
+
+    for site in sites:
+        data[site] = _pick_wearcheck_rows(site_rows.get(site, []), has_component)
+
+    return data
+
+
+def _query_wearcheck_flagged_rows(sites: list[str] | None, days_back: int = 10):
+    """
+    Status 3/4 WearCheck rows registered in the last N days (every site when
+    sites is None), and whether WearCheck Results has a component field.
+    """
     meta = frappe.get_meta("WearCheck Results")
 
     asset_field = "asset"
@@ -902,7 +1153,7 @@ def _fetch_wearcheck_flagged_window(site: str | None, days_back: int = 10) -> li
 
     register_field = _detect_wearcheck_register_field(meta)
     if not register_field:
-        return []
+        return [], False
 
     # optional fields
     sample_field = None
@@ -931,9 +1182,9 @@ def _fetch_wearcheck_flagged_window(site: str | None, days_back: int = 10) -> li
 
     where_site = ""
     params = [start_date, end_date]
-    if site:
-        where_site = f" AND wc.`{location_field}` = %s "
-        params.append(site)
+    if sites:
+        where_site = f" AND wc.`{location_field}` IN %s "
+        params.append(tuple(sites))
 
     rows = frappe.db.sql(
         f"""
@@ -965,13 +1216,18 @@ def _fetch_wearcheck_flagged_window(site: str | None, days_back: int = 10) -> li
         as_dict=True,
     ) or []
 
+    return rows, bool(component_field)
+
+
+def _pick_wearcheck_rows(rows: list[dict], has_component: bool) -> list[dict]:
+    """One row per (asset + component), picked and sorted as described in _fetch_wearcheck_flagged_window."""
     best: dict[tuple[str, str], dict] = {}
     for r in rows:
         a = (r.get("asset") or "").strip()
         if not a:
             continue
 
-        c = (r.get("component") or "").strip() if component_field else ""
+        c = (r.get("component") or "").strip() if has_component else ""
         key = (a, c)
 
         if key not in best:
@@ -1009,10 +1265,11 @@ def _fetch_wearcheck_flagged_window(site: str | None, days_back: int = 10) -> li
     return out
 
 
-def _populate_wearcheck_snapshot(pe_doc: Document, site: str | None, days_back: int = 10):
+def _populate_wearcheck_snapshot(pe_doc: Document, site: str | None, days_back: int = 10, rows: list[dict] | None = None):
     """
     Writes snapshot rows into the PE Table field that points to 'Sample Efficiency Child'.
     Child fields: asset,status,register_date,sample_date,component,wearcheck_result,action_text,feedback_text
+    rows: already fetched window for the site (fetched here when None).
     """
 
     # 1) find the PE table fieldname (don't assume it)
@@ -1031,7 +1288,8 @@ def _populate_wearcheck_snapshot(pe_doc: Document, site: str | None, days_back:
     # 2) populate
     pe_doc.set(table_field, [])
 
-    rows = _fetch_wearcheck_flagged_window(site, days_back=days_back)
+    if rows is None:
+        rows = _fetch_wearcheck_flagged_window(site, days_back=days_back)
 
     for r in (rows or []):
         row = pe_doc.append(table_field, {})
@@ -1265,7 +1523,47 @@ def create_weekly_records():
             frappe.log_error(frappe.get_traceback(), f"PE create failed ({site})")
 
 
+def _prefetch_weekly_data(sites: list[str], start_date, end_date) -> dict:
+    """
+    Everything _update_single_pe_doc reads for the given sites and week, in a
+    handful of grouped queries: {site: {start_date, end_date, hourly, assets,
+    au_rows, wearcheck}}.
+    """
+    start_date = _to_date(start_date)
+    end_date = _to_date(end_date)
+
+    hourly = _fetch_hourly_bcms_for_sites(sites, start_date, end_date)
+    assets = _fetch_submitted_assets_for_sites(sites)
+    au_rows = _fetch_au_rows_for_sites(
+        {
+            site: [a.get("asset_name") for a in assets.get(site, []) if a.get("asset_name")]
+            for site in sites
+        },
+        start_date,
+        end_date,
+    )
+    wearcheck = _fetch_wearcheck_flagged_windows(sites, days_back=10)
+
+    return {
+        site: {
+            "start_date": start_date,
+            "end_date": end_date,
+            "hourly": hourly.get(site, {}),
+            "assets": assets.get(site, []),
+            "au_rows": au_rows.get(site, []),
+            "wearcheck": wearcheck.get(site, []),
+        }
+        for site in sites
+    }
+
+
 def update_weekly_records():
+    """
+    Refresh this week's Production Efficiency records.
+
+    Source data for every site is prefetched once, then each record is
+    rebuilt and saved in its own background job (one transaction per site).
+    """
     start_date, end_date = _current_week_range_auto()
 
     try:
@@ -1273,22 +1571,73 @@ def update_weekly_records():
     except Exception:
         frappe.log_error(frappe.get_traceback(), "PE update_weekly_records: create_weekly_records failed")
 
+    # Workers only see committed records.
+    frappe.db.commit()
+
+    fields = ["name", "site"]
+    if frappe.get_meta("Production Efficiency").has_field("site_b"):
+        fields.append("site_b")
+
     pe_rows = frappe.get_all(
         "Production Efficiency",
         filters={"start_date": start_date, "end_date": end_date},
-        fields=["name"],
+        fields=fields,
         limit_page_length=500,
     )
 
+    sites = sorted({
+        site.strip()
+        for r in pe_rows
+        for site in (r.get("site"), r.get("site_b"))
+        if site and site.strip()
+    })
+
+    try:
+        prefetched = _prefetch_weekly_data(sites, start_date, end_date)
+    except Exception:
+        frappe.log_error(frappe.get_traceback(), "PE update_weekly_records: prefetch failed")
+        prefetched = {}
+
     for r in pe_rows:
-        try:
-            doc = frappe.get_doc("Production Efficiency", r.name)
-            _update_single_pe_doc(doc)
-        except Exception:
-            frappe.log_error(frappe.get_traceback(), f"PE scheduled update failed ({r.get('name')})")
+        doc_sites = {(site or "").strip() for site in (r.get("site"), r.get("site_b"))}
+
+        frappe.enqueue(
+            "is_production.production.doctype.production_efficiency.production_efficiency._run_weekly_update_job",
+            queue="default",
+            timeout=1800,
+            job_id=f"pe_weekly_update::{r.name}",
+            deduplicate=True,
+            docname=r.name,
+            prefetched={site: prefetched[site] for site in doc_sites if site in prefetched},
+        )
 
-    frappe.db.commit()
+
+def _run_weekly_update_job(docname: str, prefetched: dict | None = None):
+    try:
+        doc = frappe.get_doc("Production Efficiency", docname)
+        _update_single_pe_doc(doc, prefetched)
+        frappe.db.commit()
+    except Exception:
+        frappe.db.rollback()
+        frappe.log_error(frappe.get_traceback(), f"PE scheduled update failed ({docname})")
 
 
 class ProductionEfficiency(Document):
-    pass
+    def update_child_table(self, fieldname, df=None):
+        """
+        Tables filled by _sync_child_table write only their new, changed and
+        removed rows; every other table is saved the standard way.
+        """
+        changes = (self.flags.child_table_changes or {}).pop(fieldname, None)
+        if changes is None:
+            return super().update_child_table(fieldname, df)
+
+        for row in self.get(fieldname):
+            if row.is_new() or row.name in changes["changed"]:
+                row.db_update()
+
+        if changes["removed"]:
+            frappe.db.delete(
+                (df or self.meta.get_field(fieldname)).options,
+                {"name": ("in", changes["removed"])},
+            )
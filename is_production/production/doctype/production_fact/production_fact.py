@@ -0,0 +1,299 @@
+# Copyright (c) 2026, Isambane Mining (Pty) Ltd and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+from frappe.utils import add_days, date_diff, getdate, now_datetime
+
+
+FACT_DOCTYPE = "Production Fact"
+
+FACT_FIELDS = [
+	"hourly_production",
+	"source",
+	"month_prod_planning",
+	"location",
+	"prod_date",
+	"shift",
+	"shift_num_hour",
+	"hour_slot",
+	"hour_sort_key",
+	"excavator",
+	"truck",
+	"dozer",
+	"dozer_service",
+	"mat_type",
+	"geo_mat_layer",
+	"mining_area",
+	"loads",
+	"tub_factor",
+	"bcm",
+]
+
+# Days per chunk when rebuilding a date range; each chunk commits.
+REBUILD_CHUNK_DAYS = 7
+
+
+class ProductionFact(Document):
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_index(FACT_DOCTYPE, ["location", "prod_date"])
+
+
+def is_fact_table_enabled():
+	"""Reports read from Production Fact only when switched on in Production Dashboard Setup."""
+	return bool(frappe.db.get_single_value("Production Dashboard Setup", "use_production_fact_table"))
+
+
+def _fact_row(header, source, child):
+	"""One fact as a dict of FACT_FIELDS from an Hourly Production header and a child row."""
+	fact = {
+		"hourly_production": header.get("name"),
+		"source": source,
+		"month_prod_planning": header.get("month_prod_planning"),
+		"location": header.get("location"),
+		"prod_date": header.get("prod_date"),
+		"shift": header.get("shift"),
+		"shift_num_hour": header.get("shift_num_hour"),
+		"hour_slot": header.get("hour_slot"),
+		"hour_sort_key": header.get("hour_sort_key"),
+	}
+
+	if source == "Truck Loads":
+		fact.update({
+			"excavator": child.get("asset_name_shoval"),
+			"truck": child.get("asset_name_truck"),
+			"mat_type": child.get("mat_type"),
+			"geo_mat_layer": child.get("geo_mat_layer_truck"),
+			"mining_area": child.get("mining_areas_trucks"),
+			"loads": child.get("loads") or 0,
+			"tub_factor": child.get("tub_factor") or 0,
+			"bcm": child.get("bcms") or 0,
+		})
+	else:
+		fact.update({
+			"dozer": child.get("asset_name"),
+			"dozer_service": child.get("dozer_service"),
+			"geo_mat_layer": child.get("dozer_geo_mat_layer"),
+			"mining_area": child.get("mining_areas_dozer_child"),
+			"bcm": child.get("bcm_hour") or 0,
+		})
+
+	return fact
+
+
+def _insert_facts(facts):
+	if not facts:
+		return
+
+	now = now_datetime()
+	user = frappe.session.user
+
+	frappe.db.bulk_insert(
+		FACT_DOCTYPE,
+		["name", "creation", "modified", "owner", "modified_by", *FACT_FIELDS],
+		(
+			[frappe.generate_hash(length=20), now, now, user, user, *(fact.get(field) for field in FACT_FIELDS)]
+			for fact in facts
+		),
+	)
+
+
+def sync_hourly_production(doc):
+	"""Replace the facts of one Hourly Production with its current child rows."""
+	remove_hourly_production(doc.name)
+
+	facts = [
+		_fact_row(doc, "Truck Loads", row)
+		for row in doc.get("truck_loads") or []
+	]
+	facts.extend(
+		_fact_row(doc, "Dozer Production", row)
+		for row in doc.get("dozer_production") or []
+	)
+
+	_insert_facts(facts)
+
+
+def remove_hourly_production(name):
+	frappe.db.delete(FACT_DOCTYPE, {"hourly_production": name})
+
+
+def refresh_hour_columns(names):
+	"""Copy hour_slot / hour_sort_key to the facts of records updated without a save."""
+	if not names:
+		return
+
+	frappe.db.sql(
+		"""
+		UPDATE `tabProduction Fact` f
+		JOIN `tabHourly Production` hp ON hp.name = f.hourly_production
+		SET f.hour_slot = hp.hour_slot, f.hour_sort_key = hp.hour_sort_key
+		WHERE f.hourly_production IN %(names)s
+		""",
+		{"names": list(names)},
+	)
+
+
+def rebuild_facts(start_date, end_date, location=None):
+	"""
+	Rebuild facts for a date range (optionally one site) straight from the
+	Hourly Production tables, one chunk of days per transaction.
+	"""
+	start_date = getdate(start_date)
+	end_date = getdate(end_date)
+	rebuilt = 0
+
+	while start_date <= end_date:
+		chunk_end = min(add_days(start_date, REBUILD_CHUNK_DAYS - 1), end_date)
+		rebuilt += _rebuild_chunk(start_date, chunk_end, location)
+		frappe.db.commit()
+		start_date = add_days(chunk_end, 1)
+
+	return rebuilt
+
+
+def _rebuild_chunk(start_date, end_date, location=None):
+	filters = {"prod_date": ["between", [start_date, end_date]]}
+	if location:
+		filters["location"] = location
+
+	frappe.db.delete(FACT_DOCTYPE, filters)
+
+	location_condition = "AND hp.location = %(location)s" if location else ""
+	params = {"start_date": start_date, "end_date": end_date, "location": location}
+	header_columns = """
+		hp.name, hp.month_prod_planning, hp.location, hp.prod_date, hp.shift,
+		hp.shift_num_hour, hp.hour_slot, hp.hour_sort_key
+	"""
+
+	truck_rows = frappe.db.sql(
+		f"""
+		SELECT {header_columns},
+			tl.asset_name_shoval, tl.asset_name_truck, tl.mat_type, tl.geo_mat_layer_truck,
+			tl.mining_areas_trucks, tl.loads, tl.tub_factor, tl.bcms
+		FROM `tabHourly Production` hp
+		JOIN `tabTruck Loads` tl
+			ON tl.parent = hp.name
+			AND tl.parenttype = 'Hourly Production'
+			AND tl.parentfield = 'truck_loads'
+		WHERE hp.prod_date BETWEEN %(start_date)s AND %(end_date)s
+			AND hp.docstatus < 2
+			{location_condition}
+		ORDER BY hp.name, tl.idx
+		""",
+		params,
+		as_dict=True,
+	)
+
+	dozer_rows = frappe.db.sql(
+		f"""
+		SELECT {header_columns},
+			dp.asset_name, dp.dozer_service, dp.dozer_geo_mat_layer,
+			dp.mining_areas_dozer_child, dp.bcm_hour
+		FROM `tabHourly Production` hp
+		JOIN `tabDozer Production` dp
+			ON dp.parent = hp.name
+			AND dp.parenttype = 'Hourly Production'
+			AND dp.parentfield = 'dozer_production'
+		WHERE hp.prod_date BETWEEN %(start_date)s AND %(end_date)s
+			AND hp.docstatus < 2
+			{location_condition}
+		ORDER BY hp.name, dp.idx
+		""",
+		params,
+		as_dict=True,
+	)
+
+	facts = [_fact_row(row, "Truck Loads", row) for row in truck_rows]
+	facts.extend(_fact_row(row, "Dozer Production", row) for row in dozer_rows)
+
+	_insert_facts(facts)
+
+	return len(facts)
+
+
+@frappe.whitelist()
+def rebuild_production_facts(start_date, end_date, location=None):
+	"""Queue a rebuild of Production Fact for a date range (System Manager only)."""
+	frappe.only_for("System Manager")
+
+	if date_diff(end_date, start_date) < 0:
+		frappe.throw(_("Start Date cannot be after End Date."))
+
+	frappe.enqueue(
+		"is_production.production.doctype.production_fact.production_fact.rebuild_facts",
+		queue="long",
+		timeout=3600,
+		job_id=f"production_fact_rebuild::{location or 'all'}::{start_date}::{end_date}",
+		deduplicate=True,
+		start_date=start_date,
+		end_date=end_date,
+		location=location,
+	)
+
+	return {"queued": True}
+
+
+# -----------------------------------------------------------------------------
+# Report queries
+# -----------------------------------------------------------------------------
+
+def get_excavator_hour_bcms(locations, start_date, end_date):
+	"""Truck BCM per (location, prod_date, excavator, hour_slot) for one site or a list of sites."""
+	if isinstance(locations, str):
+		locations = [locations]
+
+	if not locations:
+		return []
+
+	return frappe.db.sql(
+		"""
+		SELECT
+			location,
+			prod_date,
+			excavator,
+			hour_slot,
+			SUM(bcm) AS bcm
+		FROM `tabProduction Fact`
+		WHERE location IN %(locations)s
+			AND prod_date BETWEEN %(start_date)s AND %(end_date)s
+			AND source = 'Truck Loads'
+			AND excavator IS NOT NULL
+		GROUP BY location, prod_date, excavator, hour_slot
+		""",
+		{"locations": list(locations), "start_date": start_date, "end_date": end_date},
+		as_dict=True,
+	)
+
+
+def get_coal_bcm(locations, start_date, end_date, group_by_date=False):
+	"""
+	Truck coal BCM between two dates (inclusive) for the given sites, as
+	[{location, bcm}] or [{location, prod_date, bcm}] when group_by_date.
+	"""
+	if not locations:
+		return []
+
+	date_column = ", prod_date" if group_by_date else ""
+
+	return frappe.db.sql(
+		f"""
+		SELECT location{date_column}, COALESCE(SUM(bcm), 0) AS bcm
+		FROM `tabProduction Fact`
+		WHERE location IN %(locations)s
+			AND prod_date BETWEEN %(start_date)s AND %(end_date)s
+			AND source = 'Truck Loads'
+			AND LOWER(mat_type) LIKE '%%coal%%'
+		GROUP BY location{date_column}
+		""",
+		{
+			"locations": list(locations),
+			"start_date": start_date,
+			"end_date": end_date,
+		},
+		as_dict=True,
+	)
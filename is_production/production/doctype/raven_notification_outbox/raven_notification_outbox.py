@@ -0,0 +1,222 @@
+# Copyright (c) 2026, Isambane Mining (Pty) Ltd and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+from frappe.utils import add_to_date, now_datetime
+
+
+OUTBOX_DOCTYPE = "Raven Notification Outbox"
+
+# Button choice -> outbox report types, same mapping send_raven_notification used.
+REPORT_TYPES = {
+	"hour": ["Hour Report"],
+	"shift": ["Shift Summary"],
+	"both": ["Hour Report", "End of Day Production Report"],
+}
+
+MAX_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 60
+
+# A Sending row older than this is assumed to belong to a dead worker.
+STALE_SENDING_MINUTES = 15
+
+
+class RavenNotificationOutbox(Document):
+	pass
+
+
+def get_idempotency_key(hourly_production, report_type):
+	return f"{hourly_production}::{report_type}"
+
+
+def queue_raven_reports(hourly_production, report_type="both"):
+	"""
+	Add one outbox entry per report and enqueue delivery.
+
+	Entries are keyed by (record, report type). A report that is already
+	queued or sending is left alone; a sent one is sent again, since summary
+	reports cover the whole site/day and not just this record.
+	"""
+	report_types = REPORT_TYPES.get((report_type or "both").lower())
+
+	if not report_types:
+		frappe.throw(_("Please select a valid Raven report type."))
+
+	source_modified = frappe.db.get_value("Hourly Production", hourly_production, "modified")
+	queued = []
+	skipped = []
+
+	for outbox_report_type in report_types:
+		key = get_idempotency_key(hourly_production, outbox_report_type)
+		values = {
+			"status": "Queued",
+			"attempts": 0,
+			"next_attempt_at": now_datetime(),
+			"requested_by": frappe.session.user,
+			"requested_at": now_datetime(),
+			"source_modified": source_modified,
+			"last_error": None,
+		}
+
+		existing = frappe.db.get_value(
+			OUTBOX_DOCTYPE,
+			key,
+			["status"],
+			as_dict=True,
+			for_update=True,
+		)
+
+		if existing:
+			if existing.status in ("Queued", "Sending"):
+				skipped.append(outbox_report_type)
+				continue
+
+			frappe.db.set_value(OUTBOX_DOCTYPE, key, values)
+		else:
+			frappe.get_doc({
+				"doctype": OUTBOX_DOCTYPE,
+				"idempotency_key": key,
+				"hourly_production": hourly_production,
+				"report_type": outbox_report_type,
+				**values,
+			}).insert(ignore_permissions=True)
+
+		queued.append(outbox_report_type)
+
+	if queued:
+		enqueue_delivery([get_idempotency_key(hourly_production, t) for t in queued])
+
+	return {"queued": queued, "skipped": skipped}
+
+
+def enqueue_delivery(names):
+	if isinstance(names, str):
+		names = [names]
+
+	frappe.enqueue(
+		"is_production.production.doctype.raven_notification_outbox."
+		"raven_notification_outbox.deliver",
+		queue="short",
+		job_id=f"raven_outbox::{'|'.join(names)}",
+		deduplicate=True,
+		enqueue_after_commit=True,
+		names=names,
+	)
+
+
+def deliver(name=None, names=None):
+	"""
+	Deliver outbox entries (one name, or the names queued by one request).
+	Monthly statistics are refreshed once per record for the whole call.
+	"""
+	refreshed_docs = {}
+
+	for entry_name in ([name] if name else []) + list(names or []):
+		deliver_entry(entry_name, refreshed_docs)
+
+
+def deliver_entry(name, refreshed_docs=None):
+	"""Render one report and post it to Raven, scheduling a retry on failure."""
+	if refreshed_docs is None:
+		refreshed_docs = {}
+
+	entry = frappe.db.get_value(
+		OUTBOX_DOCTYPE,
+		name,
+		["name", "status", "hourly_production", "report_type", "attempts"],
+		as_dict=True,
+		for_update=True,
+	)
+
+	if not entry or entry.status != "Queued":
+		return
+
+	attempts = (entry.attempts or 0) + 1
+	frappe.db.set_value(OUTBOX_DOCTYPE, name, {"status": "Sending", "attempts": attempts})
+	frappe.db.commit()
+
+	try:
+		doc = refreshed_docs.get(entry.hourly_production)
+		if doc is None:
+			doc = frappe.get_doc("Hourly Production", entry.hourly_production)
+			doc.refresh_raven_monthly_statistics()
+			refreshed_docs[entry.hourly_production] = doc
+
+		channel = doc.get_raven_channel_for_production()
+
+		if entry.report_type == "Hour Report":
+			html = doc.get_raven_hour_report_html()
+		elif entry.report_type == "Shift Summary":
+			html = doc.get_raven_shift_summary_html()
+		else:
+			html = doc.get_raven_end_of_day_report_html()
+
+		# The message and the Sent status commit together, so a retry can
+		# never post the same report twice.
+		message = doc.insert_raven_message(channel, html)
+
+		frappe.db.set_value(OUTBOX_DOCTYPE, name, {
+			"status": "Sent",
+			"channel": channel,
+			"raven_message": message.name,
+			"sent_at": now_datetime(),
+			"next_attempt_at": None,
+			"last_error": None,
+		})
+		frappe.db.commit()
+
+	except Exception:
+		error = frappe.get_traceback()
+		frappe.db.rollback()
+
+		if attempts >= MAX_ATTEMPTS:
+			values = {"status": "Failed", "next_attempt_at": None}
+			frappe.log_error(error, "Hourly Production Raven Report Error")
+		else:
+			values = {
+				"status": "Queued",
+				"next_attempt_at": add_to_date(
+					now_datetime(),
+					seconds=RETRY_BASE_SECONDS * (2 ** (attempts - 1)),
+				),
+			}
+
+		values["last_error"] = error
+		frappe.db.set_value(OUTBOX_DOCTYPE, name, values)
+		frappe.db.commit()
+
+
+def retry_due_notifications():
+	"""Scheduler: enqueue entries whose backoff has elapsed and recover dead sends."""
+	stale_before = add_to_date(now_datetime(), minutes=-STALE_SENDING_MINUTES)
+
+	for name in frappe.get_all(
+		OUTBOX_DOCTYPE,
+		filters={"status": "Sending", "modified": ["<", stale_before]},
+		pluck="name",
+	):
+		frappe.db.set_value(OUTBOX_DOCTYPE, name, {"status": "Queued", "next_attempt_at": now_datetime()})
+
+	for name in frappe.get_all(
+		OUTBOX_DOCTYPE,
+		filters={"status": "Queued", "next_attempt_at": ["<=", now_datetime()]},
+		pluck="name",
+		limit_page_length=200,
+	):
+		enqueue_delivery(name)
+
+	frappe.db.commit()
+
+
+@frappe.whitelist()
+def get_notification_status(hourly_production):
+	frappe.has_permission("Hourly Production", "read", hourly_production, throw=True)
+
+	return frappe.get_all(
+		OUTBOX_DOCTYPE,
+		filters={"hourly_production": hourly_production},
+		fields=["report_type", "status", "attempts", "next_attempt_at", "sent_at", "modified"],
+		order_by="report_type asc",
+	)
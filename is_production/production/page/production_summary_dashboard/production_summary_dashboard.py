@@ -2,6 +2,11 @@ import frappe
 from frappe.utils import flt, getdate
 from datetime import datetime
 
+from is_production.production.doctype.production_fact.production_fact import (
+    get_coal_bcm,
+    is_fact_table_enabled,
+)
+
 REPORT_DOCTYPE = "Monthly Production Planning"
 CHILD_DOCTYPE = "Monthly Production Days"
 COAL_CONVERSION = 1.5
@@ -48,10 +53,7 @@ def get_dashboard_data(
         if getdate(start_date) > getdate(end_date):
             frappe.throw(f"Start Date cannot be after End Date for {group['key']}")
 
-        for site in group["sites"]:
-            row = build_site_row(site, end_date)
-            if row:
-                rows.append(row)
+        rows.extend(build_group_rows(group["sites"], end_date))
 
     summary = {
         "total_monthly_target_bcm": round(sum(flt0(r["_summary_monthly_target_bcm"]) for r in rows), 0),
@@ -75,25 +77,54 @@ def get_dashboard_data(
     }
 
 
-def build_site_row(site, report_date):
-    mpp = get_monthly_plan(site, report_date)
-    if not mpp:
-        return None
-
-    month_start = getdate(mpp.prod_month_start_date) if mpp.prod_month_start_date else None
+def build_group_rows(sites, report_date):
+    """
+    Dashboard rows for every site in a planning group. Each metric is read
+    for all sites at once (plans, day totals, latest surveys, coal), so the
+    query count doesn't grow with the number of sites.
+    """
     end_date = getdate(report_date)
+    plans = get_monthly_plans(sites, end_date)
+
+    if not plans:
+        return []
+
+    day_totals = get_day_totals(plans, end_date)
+    coal = get_mtd_coal_by_site(plans, end_date)
+
+    rows = []
+
+    for site in sites:
+        mpp = plans.get(site)
+        if not mpp:
+            continue
 
+        totals = day_totals.get(mpp.name) or {}
+
+        rows.append(
+            build_site_row(
+                site,
+                mpp,
+                worked_days=cint0(totals.get("worked_days")),
+                selected_mtd_actual_bcms=flt0(totals.get("mtd_bcms")),
+                mtd_prog_actual_coal=coal.get(site, 0),
+            )
+        )
+
+    return rows
+
+
+def build_site_row(site, mpp, worked_days, selected_mtd_actual_bcms, mtd_prog_actual_coal):
     monthly_target = flt0(mpp.monthly_target_bcm)
     waste_bcms_planned = flt0(mpp.waste_bcms_planned)
     coal_tons_planned = flt0(mpp.coal_tons_planned)
     num_prod_days = flt0(mpp.num_prod_days)
 
-    worked_days = get_completed_production_days(mpp.name, month_start, end_date)
     days_left = max(num_prod_days - worked_days, 0)
 
     # MTD Actual BCM must be flexible according to the selected report date.
-    # It sums Monthly Production Days from month start up to the selected end date.
-    selected_mtd_actual_bcms = get_mtd_actual_bcms_from_days(mpp.name, month_start, end_date)
+    # selected_mtd_actual_bcms sums Monthly Production Days from month start
+    # up to the selected end date.
 
     # If the child table has no BCM values, fall back to Monthly Production Planning.
     mtd_actual_bcms = selected_mtd_actual_bcms if selected_mtd_actual_bcms else flt0(mpp.month_actual_bcm)
@@ -101,7 +132,6 @@ def build_site_row(site, report_date):
     # Daily achieved = Actual BCMs / Days Worked
     actual_daily = mtd_actual_bcms / worked_days if worked_days else 0
 
-    mtd_prog_actual_coal = get_mtd_coal_dynamic(site, end_date, month_start)
     mtd_prog_actual_waste = mtd_actual_bcms - (mtd_prog_actual_coal / COAL_CONVERSION)
 
     mtd_prog_target_waste = (
@@ -168,145 +198,174 @@ def build_site_row(site, report_date):
     }
 
 
-def get_monthly_plan(site, date):
-    if not site or not date:
-        return None
+def get_monthly_plans(sites, date):
+    """{site: plan} for the Monthly Production Planning covering date at each site."""
+    if not sites or not date:
+        return {}
 
-    plan_name = frappe.db.get_value(
-        "Monthly Production Planning",
-        {
-            "location": site,
-            "prod_month_start_date": ["<=", date],
-            "prod_month_end_date": [">=", date],
-        },
-        "name",
-    )
-
-    return frappe.get_doc("Monthly Production Planning", plan_name) if plan_name else None
-
-
-def get_completed_production_days(parent_name, month_start, end_date):
-    if not parent_name or not month_start or not end_date:
-        return 0
+    plans = {}
 
-    child_rows = frappe.get_all(
-        CHILD_DOCTYPE,
+    for plan in frappe.get_all(
+        REPORT_DOCTYPE,
         filters={
-            "parent": parent_name,
-            "shift_start_date": ["between", [month_start, end_date]],
+            "location": ["in", sites],
+            "prod_month_start_date": ["<=", date],
+            "prod_month_end_date": [">=", date],
         },
         fields=[
-            "shift_start_date",
-            "shift_day_hours",
-            "shift_night_hours",
-            "shift_morning_hours",
-            "shift_afternoon_hours",
+            "name",
+            "location",
+            "prod_month_start_date",
+            "monthly_target_bcm",
+            "waste_bcms_planned",
+            "coal_tons_planned",
+            "num_prod_days",
+            "month_actual_bcm",
+            "month_forecated_bcm",
         ],
-    )
+        order_by="modified desc",
+    ):
+        plans.setdefault(plan.location, plan)
 
-    completed_days = 0
+    return plans
 
-    for row in child_rows:
-        dt = row.get("shift_start_date")
-
-        if isinstance(dt, str):
-            dt = datetime.strptime(dt, "%Y-%m-%d").date()
-
-        # Python weekday: Monday = 0, Sunday = 6.
-        if dt and dt.weekday() != 6:
-            hours = (
-                flt0(row.get("shift_day_hours"))
-                + flt0(row.get("shift_night_hours"))
-                + flt0(row.get("shift_morning_hours"))
-                + flt0(row.get("shift_afternoon_hours"))
-            )
 
-            if hours:
-                completed_days += 1
-
-    return completed_days
-
-
-def get_mtd_actual_bcms_from_days(parent_name, month_start, end_date):
-    if not parent_name or not month_start or not end_date:
-        return 0
-
-    rows = frappe.get_all(
-        CHILD_DOCTYPE,
-        filters={
-            "parent": parent_name,
-            "shift_start_date": ["between", [month_start, end_date]],
+def get_day_totals(plans, end_date):
+    """
+    {plan name: {"worked_days", "mtd_bcms"}} over Monthly Production Days from
+    each plan's month start to end_date. A worked day is a non-Sunday with
+    shift hours captured.
+    """
+    rows = frappe.db.sql(
+        f"""
+        SELECT
+            d.parent,
+            SUM(
+                CASE
+                    WHEN DAYOFWEEK(d.shift_start_date) != 1
+                     AND (
+                            IFNULL(d.shift_day_hours, 0)
+                            + IFNULL(d.shift_night_hours, 0)
+                            + IFNULL(d.shift_morning_hours, 0)
+                            + IFNULL(d.shift_afternoon_hours, 0)
+                         ) != 0
+                    THEN 1 ELSE 0
+                END
+            ) AS worked_days,
+            SUM(IFNULL(d.total_daily_bcms, 0)) AS mtd_bcms
+        FROM `tab{CHILD_DOCTYPE}` d
+        JOIN `tab{REPORT_DOCTYPE}` p ON p.name = d.parent
+        WHERE d.parent IN %(plans)s
+          AND d.shift_start_date BETWEEN p.prod_month_start_date AND %(end_date)s
+        GROUP BY d.parent
+        """,
+        {
+            "plans": [plan.name for plan in plans.values()],
+            "end_date": end_date,
         },
-        fields=["total_daily_bcms"],
+        as_dict=True,
     )
 
-    return sum(flt0(row.get("total_daily_bcms")) for row in rows)
-
-def get_mtd_coal_dynamic(site, end_date, month_start):
-    if not site or not end_date or not month_start:
-        return 0
-
-    survey_doc = frappe.get_all(
-        "Survey",
-        filters={
-            "location": site,
-            "last_production_shift_start_date": ["<=", f"{end_date} 23:59:59"],
-        },
-        fields=["last_production_shift_start_date", "total_surveyed_coal_tons"],
-        order_by="last_production_shift_start_date desc",
-        limit_page_length=1,
-    )
+    return {row.parent: row for row in rows}
+
+
+def get_mtd_coal_by_site(plans, end_date):
+    """
+    {site: MTD coal tons}. The latest survey inside the month supplies the
+    surveyed tons, and truck coal after the survey date is added on top.
+    Without one, all truck coal since month start is converted.
+    """
+    sites = [site for site, plan in plans.items() if plan.prod_month_start_date]
+
+    if not sites:
+        return {}
+
+    surveys = {
+        row.location: row
+        for row in frappe.db.sql(
+            """
+            SELECT location, last_production_shift_start_date, total_surveyed_coal_tons
+            FROM (
+                SELECT
+                    location,
+                    last_production_shift_start_date,
+                    total_surveyed_coal_tons,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY location
+                        ORDER BY last_production_shift_start_date DESC
+                    ) AS rn
+                FROM `tabSurvey`
+                WHERE location IN %(sites)s
+                  AND last_production_shift_start_date <= %(end_datetime)s
+            ) latest
+            WHERE rn = 1
+            """,
+            {
+                "sites": sites,
+                "end_datetime": f"{end_date} 23:59:59",
+            },
+            as_dict=True,
+        )
+    }
 
-    coal_tons_actual = 0
-    end_dt = getdate(end_date)
-    start_dt = getdate(month_start)
+    from_dates = {}
+    surveyed_tons = {}
 
-    if survey_doc:
-        survey = survey_doc[0]
-        survey_date = survey.get("last_production_shift_start_date")
+    for site in sites:
+        month_start = getdate(plans[site].prod_month_start_date)
+        survey = surveys.get(site)
+        survey_date = survey.get("last_production_shift_start_date") if survey else None
 
         if isinstance(survey_date, datetime):
             survey_date = survey_date.date()
 
-        if survey_date and start_dt <= survey_date <= end_dt:
-            coal_tons_actual = survey.get("total_surveyed_coal_tons") or 0
-
-            coal_after = frappe.db.sql(
-                """
-                SELECT COALESCE(SUM(tl.bcms), 0)
-                FROM `tabHourly Production` hp
-                JOIN `tabTruck Loads` tl ON tl.parent = hp.name
-                WHERE hp.prod_date > %s
-                  AND hp.prod_date <= %s
-                  AND hp.location = %s
-                  AND LOWER(tl.mat_type) LIKE '%%coal%%'
-                """,
-                (survey_date, end_date, site),
-            )[0][0]
-
-            coal_tons_actual += (coal_after or 0) * COAL_CONVERSION
+        if survey_date and month_start <= survey_date <= end_date:
+            # Truck coal strictly after the survey date.
+            from_dates[site] = (survey_date, False)
+            surveyed_tons[site] = flt0(survey.get("total_surveyed_coal_tons"))
         else:
-            coal_tons_actual = get_coal_from_hourly(month_start, end_date, site)
+            from_dates[site] = (month_start, True)
+            surveyed_tons[site] = 0
+
+    coal_bcm = {site: 0 for site in sites}
+    coal_from_date = min(from_date for from_date, _ in from_dates.values())
+
+    if is_fact_table_enabled():
+        coal_rows = get_coal_bcm(sites, coal_from_date, end_date, group_by_date=True)
     else:
-        coal_tons_actual = get_coal_from_hourly(month_start, end_date, site)
+        coal_rows = get_coal_bcm_from_truck_loads(sites, coal_from_date, end_date)
+
+    for row in coal_rows:
+        from_date, inclusive = from_dates[row.location]
+        prod_date = getdate(row.prod_date)
+
+        if prod_date > from_date or (inclusive and prod_date == from_date):
+            coal_bcm[row.location] += flt0(row.bcm)
 
-    return coal_tons_actual
+    return {
+        site: surveyed_tons[site] + coal_bcm[site] * COAL_CONVERSION
+        for site in sites
+    }
 
 
-def get_coal_from_hourly(start_date, end_date, site):
-    coal_bcm = frappe.db.sql(
+def get_coal_bcm_from_truck_loads(sites, from_date, end_date):
+    return frappe.db.sql(
         """
-        SELECT COALESCE(SUM(tl.bcms), 0)
+        SELECT hp.location, hp.prod_date, COALESCE(SUM(tl.bcms), 0) AS bcm
         FROM `tabHourly Production` hp
         JOIN `tabTruck Loads` tl ON tl.parent = hp.name
-        WHERE hp.prod_date BETWEEN %s AND %s
-          AND hp.location = %s
+        WHERE hp.location IN %(sites)s
+          AND hp.prod_date BETWEEN %(from_date)s AND %(end_date)s
           AND LOWER(tl.mat_type) LIKE '%%coal%%'
+        GROUP BY hp.location, hp.prod_date
         """,
-        (start_date, end_date, site),
-    )[0][0]
-
-    return (coal_bcm or 0) * COAL_CONVERSION
+        {
+            "sites": sites,
+            "from_date": from_date,
+            "end_date": end_date,
+        },
+        as_dict=True,
+    )
 
 
 def get_actual_daily_bcm(site, date):
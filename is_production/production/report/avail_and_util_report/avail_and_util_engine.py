@@ -0,0 +1,466 @@
+"""
+Column-wise engine for the Avail and Util report.
+
+Same stages as the row-by-row pipeline in avail_and_util_report.py
+(prepare_records, group_records, attach_planned_and_actual_hours,
+recalculate_summary_rows) and the same output. Formulas run over NumPy
+columns, summary totals are grouped sums and planned downtime / actual
+hours come from a (site, weekday) lookup.
+
+Totals are summed in row order with np.add.at and rounding matches
+Python's round(), so every value equals the row-by-row result exactly.
+"""
+
+import datetime
+
+import numpy as np
+
+from is_production.production.report.avail_and_util_report.avail_and_util_report import (
+    SUM_FIELDS,
+    get_actual_hours_value,
+    get_planned_downtime_value,
+    prepare_utilisation_fields,
+    r1,
+)
+from is_production.utils.summary_rollup import get_parent_positions
+
+
+# Hour fields rounded on every shift row before it is shown.
+DETAIL_HOUR_FIELDS = [
+    "shift_required_hours",
+    "shift_working_hours",
+    "shift_breakdown_hours",
+    "planned_downtime",
+    "actual_hours",
+    "actual_service_time",
+    "actual_breakdown_time",
+    "actual_planned_maintenance_time",
+    "actual_inspection_time",
+    "actual_unplanned_maintenance_time",
+    "mechanical_outsourced_work",
+    "shift_available_hours",
+    "shift_available_hours_above_100",
+    "shift_other_lost_hours",
+    "captured_other_lost_hours",
+    "other_lost_hours_variance",
+]
+
+PERCENT_FIELDS = [
+    "plant_shift_availability",
+    "avail_target_percent",
+    "plant_shift_availability_above_100",
+    "true_availability_percent",
+    "plant_shift_utilisation",
+    "util_target_percent",
+    "plant_shift_utilisation_above_100",
+    "true_utilisation_percent",
+    "employee_availability",
+]
+
+INVALID_ZERO_FIELDS = [
+    "shift_available_hours_above_100",
+    "plant_shift_availability_above_100",
+    "true_availability_percent",
+    "plant_shift_utilisation",
+    "plant_shift_utilisation_above_100",
+    "true_utilisation_percent",
+    "util_target_percent",
+]
+
+UTILISATION_PERCENT_FIELDS = [
+    "plant_shift_utilisation",
+    "plant_shift_utilisation_above_100",
+    "true_utilisation_percent",
+    "util_target_percent",
+]
+
+
+def _column(rows, field):
+    return np.array([row.get(field) or 0 for row in rows], dtype=np.float64)
+
+
+def _set_column(rows, field, values):
+    for row, value in zip(rows, values):
+        row[field] = value
+
+
+def _group_codes(keys):
+    """Group number of each key, numbered in order of first appearance."""
+    index = {}
+    codes = np.fromiter((index.setdefault(key, len(index)) for key in keys), dtype=np.int64)
+
+    return codes, len(index)
+
+
+def _round1(values):
+    """
+    round(value, 1) for each value, as a list of Python floats.
+
+    np.rint(value * 10) / 10 agrees with round() except where value * 10
+    lands next to a half, so those few values go through round() itself.
+    """
+    with np.errstate(invalid="ignore"):
+        scaled = values * 10
+        rounded = (np.rint(scaled) / 10).tolist()
+        near_half = np.abs(scaled - np.floor(scaled) - 0.5) <= 1e-6 * np.maximum(1, np.abs(scaled))
+
+    for index in np.flatnonzero(near_half).tolist():
+        rounded[index] = round(float(values[index]), 1)
+
+    return rounded
+
+
+def _percent(numerator, denominator, clamp=False, default=0.0):
+    """r1((numerator / denominator) * 100) where denominator > 0, else default."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = (numerator / denominator) * 100
+
+    if clamp:
+        values = np.clip(values, 0.0, 100.0)
+
+    return [
+        value if positive else default
+        for value, positive in zip(_round1(values), (denominator > 0).tolist())
+    ]
+
+
+def _factor(values):
+    return _round1(np.array(values, dtype=np.float64) * 0.85)
+
+
+def _weekdays(dates):
+    """Monday = 0 weekday of each date, -1 where there is none."""
+    weekdays = {}
+    result = []
+
+    for value in dates:
+        if not value:
+            result.append(-1)
+            continue
+
+        if value not in weekdays:
+            day = value if isinstance(value, datetime.date) else datetime.date.fromisoformat(str(value)[:10])
+            weekdays[value] = day.weekday()
+
+        result.append(weekdays[value])
+
+    return np.array(result, dtype=np.int64)
+
+
+def apply_formula_fields(rows):
+    """apply_formula_fields for a list of rows, one column at a time."""
+    if not rows:
+        return rows
+
+    required = _column(rows, "shift_required_hours")
+    availability = _percent(_column(rows, "shift_available_hours"), required, clamp=True)
+
+    _set_column(rows, "plant_shift_availability", availability)
+    _set_column(
+        rows,
+        "employee_availability",
+        _percent(required - _column(rows, "shift_other_lost_hours"), required, clamp=True),
+    )
+    _set_column(rows, "avail_target_percent", _factor(availability))
+
+    valid_rows = []
+
+    for row in rows:
+        if row.get("invalid_pre_use_hours"):
+            row.update(dict.fromkeys(INVALID_ZERO_FIELDS, 0))
+            continue
+
+        if row.get("utilisation_valid_count") is None:
+            prepare_utilisation_fields(row)
+
+        valid_rows.append(row)
+
+    if not valid_rows:
+        return rows
+
+    computed = _percent(
+        _column(valid_rows, "shift_available_hours_above_100"),
+        _column(valid_rows, "shift_required_hours"),
+        default=0,
+    )
+    availability_above_100 = [
+        r1(row["plant_shift_availability_above_100"])
+        if row.get("plant_shift_availability_above_100") is not None
+        else value
+        for row, value in zip(valid_rows, computed)
+    ]
+
+    _set_column(valid_rows, "plant_shift_availability_above_100", availability_above_100)
+    _set_column(valid_rows, "true_availability_percent", _factor(availability_above_100))
+
+    utilised_rows = []
+
+    for row in valid_rows:
+        if float(row.get("utilisation_valid_count") or 0) <= 0:
+            row.update(dict.fromkeys(UTILISATION_PERCENT_FIELDS))
+        else:
+            utilised_rows.append(row)
+
+    if not utilised_rows:
+        return rows
+
+    working = _column(utilised_rows, "utilisation_working_hours")
+    utilisation = _percent(working, _column(utilised_rows, "utilisation_available_hours"), clamp=True)
+    utilisation_above_100 = _percent(
+        working,
+        _column(utilised_rows, "utilisation_available_hours_above_100"),
+        default=0,
+    )
+
+    _set_column(utilised_rows, "plant_shift_utilisation", utilisation)
+    _set_column(utilised_rows, "util_target_percent", _factor(utilisation))
+    _set_column(utilised_rows, "plant_shift_utilisation_above_100", utilisation_above_100)
+    _set_column(utilised_rows, "true_utilisation_percent", _factor(utilisation_above_100))
+
+    return rows
+
+
+def prepare_records(records):
+    """Drop rows with no required hours (except Sundays), flag invalid Pre-Use hours and apply the formulas."""
+    if not records:
+        return []
+
+    required = _column(records, "shift_required_hours")
+    keep = required > 0
+
+    if not keep.all():
+        keep |= _weekdays([record.get("shift_date") for record in records]) == 6
+        records = [record for record, kept in zip(records, keep.tolist()) if kept]
+
+    if not records:
+        return []
+
+    # Invalid Pre-Use hours: more than 12 on a shift, or more than 24 for the
+    # machine across the site's day.
+    working = _column(records, "shift_working_hours")
+    codes, group_count = _group_codes(
+        (record.get("location"), str(record.get("shift_date")), record.get("asset_name"))
+        for record in records
+    )
+    daily = np.zeros(group_count)
+    np.add.at(daily, codes, working)
+    daily = daily[codes]
+    invalid = (working > 12) | (daily > 24)
+
+    for record, is_invalid, daily_working_hours in zip(records, invalid.tolist(), daily.tolist()):
+        record["invalid_pre_use_hours"] = 1 if is_invalid else 0
+        record["invalid_pre_use_hours_status"] = "Invalid" if is_invalid else "Valid"
+        record["daily_working_hours"] = daily_working_hours
+
+        if is_invalid:
+            record["shift_available_hours_above_100"] = 0
+            record["plant_shift_availability_above_100"] = 0
+            record["true_availability_percent"] = 0
+            record["plant_shift_utilisation_above_100"] = 0
+            record["true_utilisation_percent"] = 0
+
+    # Full-shift breakdowns stay in availability but not in utilisation.
+    required = _column(records, "shift_required_hours")
+    full_breakdown = (required > 0) & (_column(records, "shift_breakdown_hours") >= required)
+    available = _column(records, "shift_available_hours").tolist()
+
+    for record, is_breakdown, working_hours, available_hours in zip(
+        records, full_breakdown.tolist(), working.tolist(), available
+    ):
+        if is_breakdown:
+            record["utilisation_valid_count"] = 0
+            record["utilisation_working_hours"] = 0
+            record["utilisation_available_hours"] = 0
+            record["utilisation_available_hours_above_100"] = 0
+        else:
+            record["utilisation_valid_count"] = 1
+            record["utilisation_working_hours"] = working_hours
+            record["utilisation_available_hours"] = available_hours
+            record["utilisation_available_hours_above_100"] = available_hours
+
+    return apply_formula_fields(records)
+
+
+def _summary_row(indent, availability_above_100, **extra_fields):
+    # recalculate_summary_rows fills in every total and percentage later;
+    # only availability above 100% is kept from the shift rows, as in
+    # summary_row.
+    return {
+        **extra_fields,
+        **dict.fromkeys(SUM_FIELDS, 0),
+        **dict.fromkeys(PERCENT_FIELDS, 0),
+        "plant_shift_availability_above_100": availability_above_100,
+        "indent": indent,
+    }
+
+
+def group_records(records, filters):
+    """Category > date > asset > shift rows, with a summary row above each group."""
+    grouped = {}
+    for record in records:
+        cat = record["asset_category"] or "Uncategorised"
+        date = str(record["shift_date"])
+        asset = record["asset_name"]
+
+        grouped.setdefault(cat, {}).setdefault(date, {}).setdefault(asset, []).append(record)
+
+    # Shift rows in display order, with their category, date and asset group.
+    ordered = []
+    level_codes = ([], [], [])
+
+    for cat_code, date_groups in enumerate(grouped.values()):
+        for date_groups_code, assets in enumerate(date_groups.values()):
+            date_code = (cat_code, date_groups_code)
+
+            for asset_code, rows in enumerate(assets.values()):
+                for row in rows:
+                    ordered.append(row)
+                    level_codes[0].append(cat_code)
+                    level_codes[1].append(date_code)
+                    level_codes[2].append((date_code, asset_code))
+
+    valid = np.array([not row.get("invalid_pre_use_hours") for row in ordered])
+    above_100 = _column(ordered, "shift_available_hours_above_100")[valid]
+    required = _column(ordered, "shift_required_hours")[valid]
+    availability_above_100 = []
+
+    for codes in level_codes:
+        codes, group_count = _group_codes(codes)
+        codes = codes[valid]
+        above_100_totals = np.zeros(group_count)
+        required_totals = np.zeros(group_count)
+        np.add.at(above_100_totals, codes, above_100)
+        np.add.at(required_totals, codes, required)
+        availability_above_100.append(
+            iter(_percent(above_100_totals, required_totals, default=0))
+        )
+
+    location = filters.get("location") or None
+    data = []
+
+    for cat, date_groups in grouped.items():
+        data.append(_summary_row(
+            0,
+            next(availability_above_100[0]),
+            asset_category=cat,
+            location=location,
+        ))
+
+        for date, assets in date_groups.items():
+            data.append(_summary_row(
+                1,
+                next(availability_above_100[1]),
+                asset_category=cat,
+                shift_date=date,
+                location=location,
+            ))
+
+            for asset, rows in assets.items():
+                data.append(_summary_row(
+                    2,
+                    next(availability_above_100[2]),
+                    asset_category=cat,
+                    asset_name=asset,
+                    shift_date=date,
+                    location=(rows[0].get("location") if rows else None),
+                ))
+
+                for row in rows:
+                    row["indent"] = 3
+                    data.append(row)
+
+    for field in DETAIL_HOUR_FIELDS:
+        _set_column(ordered, field, _round1(_column(ordered, field)))
+
+    apply_formula_fields(ordered)
+
+    return data
+
+
+def _site_day_hours(location, weekday):
+    # Any date with the right weekday gives the same planned / actual hours.
+    shift_date = datetime.date(2024, 1, 1) + datetime.timedelta(days=weekday)
+
+    return tuple(
+        r1(get_value(location, shift_date, indent))
+        for get_value in (get_planned_downtime_value, get_actual_hours_value)
+        for indent in (0, 3)
+    )
+
+
+def attach_planned_and_actual_hours(data):
+    weekdays = _weekdays([row.get("shift_date") for row in data]).tolist()
+    hours = {}
+
+    for row, weekday in zip(data, weekdays):
+        if weekday < 0:
+            row["planned_downtime"] = 0.0
+            row["actual_hours"] = 0.0
+            continue
+
+        key = (row.get("location"), weekday)
+
+        if key not in hours:
+            hours[key] = _site_day_hours(*key)
+
+        planned_summary, planned_shift, actual_summary, actual_shift = hours[key]
+
+        if row.get("indent") in (0, 1, 2):
+            row["planned_downtime"] = planned_summary
+            row["actual_hours"] = actual_summary
+        else:
+            row["planned_downtime"] = planned_shift
+            row["actual_hours"] = actual_shift
+
+
+def _roll_up(data, parent_positions, child_positions, parent_of):
+    """Set SUM_FIELDS on each parent row to the rounded totals of its valid children."""
+    index = {position: code for code, position in enumerate(parent_positions)}
+    members = [
+        position
+        for position in child_positions
+        if not data[position].get("invalid_pre_use_hours")
+    ]
+
+    totals = np.zeros((len(parent_positions), len(SUM_FIELDS)))
+    counts = np.zeros(len(parent_positions), dtype=np.int64)
+
+    if members:
+        codes = np.fromiter((index[parent_of[position]] for position in members), dtype=np.int64, count=len(members))
+        values = np.array(
+            [[data[position].get(field) or 0 for field in SUM_FIELDS] for position in members],
+            dtype=np.float64,
+        )
+        np.add.at(totals, codes, values)
+        counts = np.bincount(codes, minlength=len(parent_positions))
+
+    parents = [data[position] for position in parent_positions]
+
+    for row, group_totals, count in zip(parents, totals, counts.tolist()):
+        if count:
+            row.update(zip(SUM_FIELDS, _round1(group_totals)))
+        else:
+            row.update(dict.fromkeys(SUM_FIELDS, 0))
+
+    apply_formula_fields(parents)
+
+
+def recalculate_summary_rows(data):
+    """
+    Same totals as roll_up_summary_rows, a whole indent level at a time from
+    the bottom up.
+    """
+    parent_of = get_parent_positions(data)
+    children = {}
+
+    for position, parent in enumerate(parent_of):
+        if parent >= 0:
+            children.setdefault(data[parent].get("indent") or 0, []).append(position)
+
+    for level in sorted(children, reverse=True):
+        child_positions = children[level]
+        parent_positions = list(dict.fromkeys(parent_of[position] for position in child_positions))
+
+        _roll_up(data, parent_positions, child_positions, parent_of)
+
+    return data
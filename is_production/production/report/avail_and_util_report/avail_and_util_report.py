@@ -3,6 +3,8 @@ from frappe.desk.query_report import run
 import datetime
 from frappe.utils import flt, now_datetime
 
+from is_production.utils.summary_rollup import roll_up_summary_rows
+
 
 EXCLUDED_ASSET_CATEGORIES = {
     "Grader",
@@ -16,6 +18,9 @@ EXCLUDED_ASSET_CATEGORIES = {
 
 
 
+# Engine used when the filters don't name one; see get_report_engine.
+DEFAULT_ENGINE = "numpy"
+
 SPARE_SWING_PURPLE = "#e6d6ff"
 SPARE_SWING_TEXT = "#4b0082"
 
@@ -931,142 +936,13 @@ def attach_msr_actuals(data, filters):
 
 
 def recalculate_summary_rows(data):
-    asset_map = {}
-    for row in data:
-        if row.get("indent") == 3:
-            key = (
-                row.get("asset_category"),
-                str(row.get("shift_date")),
-                row.get("location"),
-                row.get("asset_name"),
-            )
-            asset_map.setdefault(key, []).append(row)
-
-    for row in data:
-        if row.get("indent") == 2:
-            key = (
-                row.get("asset_category"),
-                str(row.get("shift_date")),
-                row.get("location"),
-                row.get("asset_name"),
-            )
-            children = asset_map.get(key, [])
-
-            valid_children = [
-                child
-                for child in children
-                if not child.get(
-                    "invalid_pre_use_hours"
-                )
-            ]
-
-            if not valid_children:
-                for field in SUM_FIELDS:
-                    row[field] = 0
-
-                apply_formula_fields(row)
-                continue
-
-            for field in SUM_FIELDS:
-                row[field] = r1(
-                    sum(
-                        (
-                            child.get(field)
-                            or 0
-                        )
-                        for child in valid_children
-                    )
-                )
-
-            apply_formula_fields(row)
-
-    date_map = {}
-    for row in data:
-        if row.get("indent") == 2:
-            key = (
-                row.get("asset_category"),
-                str(row.get("shift_date")),
-                row.get("location"),
-            )
-            date_map.setdefault(key, []).append(row)
-
-    for row in data:
-        if row.get("indent") == 1:
-            key = (
-                row.get("asset_category"),
-                str(row.get("shift_date")),
-                row.get("location"),
-            )
-            children = date_map.get(key, [])
-
-            valid_children = [
-                child
-                for child in children
-                if not child.get(
-                    "invalid_pre_use_hours"
-                )
-            ]
-
-            if not valid_children:
-                for field in SUM_FIELDS:
-                    row[field] = 0
-
-                apply_formula_fields(row)
-                continue
-
-            for field in SUM_FIELDS:
-                row[field] = r1(
-                    sum(
-                        (
-                            child.get(field)
-                            or 0
-                        )
-                        for child in valid_children
-                    )
-                )
-
-            apply_formula_fields(row)
-
-    category_map = {}
-    for row in data:
-        if row.get("indent") == 1:
-            key = row.get("asset_category")
-            category_map.setdefault(key, []).append(row)
-
-    for row in data:
-        if row.get("indent") == 0:
-            children = category_map.get(
-                row.get("asset_category"),
-                [],
-            )
-
-            valid_children = [
-                child
-                for child in children
-                if not child.get(
-                    "invalid_pre_use_hours"
-                )
-            ]
-
-            if not valid_children:
-                for field in SUM_FIELDS:
-                    row[field] = 0
-
-                apply_formula_fields(row)
-                continue
-
-            for field in SUM_FIELDS:
-                row[field] = r1(
-                    sum(
-                        (
-                            child.get(field)
-                            or 0
-                        )
-                        for child in valid_children
-                    )
-                )
-
-            apply_formula_fields(row)
+    """Totals of each summary row from the valid shift rows beneath it."""
+    return roll_up_summary_rows(
+        data,
+        SUM_FIELDS,
+        apply_formula_fields,
+        include_child=lambda row: not row.get("invalid_pre_use_hours"),
+    )
 
 
 def attach_pbm_popup_times(data, filters):
@@ -1443,7 +1319,7 @@ def attach_pbm_popup_times(data, filters):
 
     return data
 
-def get_grouped_data(filters):
+def get_availability_records(filters):
     filters = filters or {}
     conditions = []
     args = []
@@ -1464,7 +1340,7 @@ def get_grouped_data(filters):
 
     condition_str = f"WHERE {' AND '.join(conditions)}" if conditions else ""
 
-    records = frappe.db.sql(f"""
+    return frappe.db.sql(f"""
         SELECT
             asset_category,
             shift_date,
@@ -1486,6 +1362,36 @@ def get_grouped_data(filters):
         ORDER BY asset_category, shift_date, asset_name, shift
     """, tuple(args), as_dict=True)
 
+
+def get_report_engine(filters=None):
+    """
+    Stages that differ between the two engines. "numpy" (the default) works
+    column by column; "python" is the original row-by-row pipeline. Both
+    return the same rows.
+    """
+    engine = (filters or {}).get("engine") or DEFAULT_ENGINE
+
+    if engine == "python":
+        return frappe._dict(
+            prepare_records=prepare_records,
+            group_records=group_records,
+            attach_planned_and_actual_hours=attach_planned_and_actual_hours,
+            recalculate_summary_rows=recalculate_summary_rows,
+        )
+
+    if engine != "numpy":
+        frappe.throw(f"Unknown report engine: {engine}")
+
+    from is_production.production.report.avail_and_util_report import avail_and_util_engine
+
+    return avail_and_util_engine
+
+
+def get_grouped_data(filters):
+    filters = filters or {}
+    engine = get_report_engine(filters)
+    records = get_availability_records(filters)
+
     if not filters.get(
         "include_excluded_asset_categories"
     ):
@@ -1497,6 +1403,31 @@ def get_grouped_data(filters):
             ) not in EXCLUDED_ASSET_CATEGORIES
         ]
 
+    records = engine.prepare_records(records)
+
+    spare_swing_asset_map = get_spare_swing_asset_map(
+        filters
+    )
+    records = apply_machine_scope_filter(records, filters, spare_swing_asset_map)
+
+    if not records:
+        frappe.msgprint("No records found for the selected filters.")
+        return []
+
+    data = engine.group_records(records, filters)
+
+    attach_reasons(data, filters)
+    attach_msr_actuals(data, filters)
+    engine.attach_planned_and_actual_hours(data)
+    engine.recalculate_summary_rows(data)
+    attach_pbm_popup_times(data, filters)
+    apply_spare_swing_flags(data, spare_swing_asset_map)
+
+    return data
+
+
+def prepare_records(records):
+    """Drop rows with no required hours (except Sundays), flag invalid Pre-Use hours and apply the formulas."""
     records = [
         record
         for record in records
@@ -1523,15 +1454,11 @@ def get_grouped_data(filters):
         prepare_utilisation_fields(record)
         apply_formula_fields(record)
 
-    spare_swing_asset_map = get_spare_swing_asset_map(
-        filters
-    )
-    records = apply_machine_scope_filter(records, filters, spare_swing_asset_map)
+    return records
 
-    if not records:
-        frappe.msgprint("No records found for the selected filters.")
-        return []
 
+def group_records(records, filters):
+    """Category > date > asset > shift rows, with a summary row above each group."""
     grouped = {}
     for record in records:
         cat = record["asset_category"] or "Uncategorised"
@@ -1695,13 +1622,6 @@ def get_grouped_data(filters):
 
                     data.append(row)
 
-    attach_reasons(data, filters)
-    attach_msr_actuals(data, filters)
-    attach_planned_and_actual_hours(data)
-    recalculate_summary_rows(data)
-    attach_pbm_popup_times(data, filters)
-    apply_spare_swing_flags(data, spare_swing_asset_map)
-
     return data
 
 
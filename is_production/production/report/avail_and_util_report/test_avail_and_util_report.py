@@ -0,0 +1,85 @@
+# Copyright (c) 2026, Isambane Mining (Pty) Ltd and contributors
+# For license information, please see license.txt
+
+import copy
+import datetime
+import random
+
+from frappe.tests import UnitTestCase
+
+from is_production.production.report.avail_and_util_report.avail_and_util_report import (
+	MSR_TIME_FIELDS,
+	get_report_engine,
+)
+
+
+def make_records(seed=7, days=10):
+	"""Shift records shaped like the report query, covering the edge cases of the formulas."""
+	rng = random.Random(seed)
+	records = []
+
+	for category in [None, "ADT", "Dozer", "Excavator"]:
+		for day in range(days):
+			shift_date = datetime.date(2026, 3, 1) + datetime.timedelta(days=day)
+
+			for location in ["Klipfontein", "Kriel"]:
+				for asset in [f"{category or 'X'}-{number}" for number in range(3)]:
+					for shift in ["Day", "Night"]:
+						required = rng.choice([0, 0, 12.0, 12.0, 11.5, 10.25])
+						working = rng.choice([0, 3.333, 8.5, 11.95, 12.0, 13.4, 14.0])
+						breakdown = rng.choice([0, 0, 1.25, required])
+						available = max(required - breakdown, 0)
+
+						records.append({
+							"asset_category": category,
+							"shift_date": shift_date,
+							"asset_name": asset,
+							"shift": shift,
+							"location": location,
+							"shift_required_hours": required,
+							"shift_working_hours": working,
+							"shift_breakdown_hours": breakdown,
+							"shift_available_hours": available,
+							"shift_available_hours_above_100": available + rng.choice([0, 0.75]),
+							"shift_other_lost_hours": rng.choice([None, 0, 0.35, 2.25]),
+							"plant_shift_availability": None,
+							"plant_shift_availability_above_100": rng.choice([None, None, 101.26]),
+							"plant_shift_utilisation": None,
+							"plant_shift_utilisation_above_100": None,
+						})
+
+	return records
+
+
+def run_engine(name, records):
+	"""The report stages that don't touch the database, with fixed MSR and captured hours."""
+	filters = {"engine": name}
+	engine = get_report_engine(filters)
+
+	records = engine.prepare_records(copy.deepcopy(records))
+	data = engine.group_records(records, filters)
+
+	for number, row in enumerate(data):
+		for field in MSR_TIME_FIELDS:
+			row[field] = round(number % 7 * 0.35, 1) if row.get("indent") == 3 else 0.0
+
+		if row.get("indent") == 3:
+			row["captured_other_lost_hours"] = round(number % 5 * 0.5, 1)
+
+	engine.attach_planned_and_actual_hours(data)
+	engine.recalculate_summary_rows(data)
+
+	return data
+
+
+class TestAvailAndUtilReport(UnitTestCase):
+	def test_engines_return_the_same_rows(self):
+		records = make_records()
+
+		expected = run_engine("python", records)
+		actual = run_engine("numpy", records)
+
+		self.assertEqual(len(actual), len(expected))
+
+		for expected_row, actual_row in zip(expected, actual):
+			self.assertEqual(actual_row, expected_row)
@@ -1,6 +1,8 @@
 import frappe
 import datetime
 
+from is_production.utils.summary_rollup import roll_up_summary_rows
+
 
 EXCLUDED_ASSET_CATEGORIES = {
     "Grader",
@@ -493,48 +495,7 @@ def attach_msr_actuals(data, filters):
 
 
 def recalculate_summary_rows(data):
-    asset_map = {}
-    for row in data:
-        if row.get("indent") == 2:
-            key = (
-                row.get("asset_category"),
-                str(row.get("shift_date")),
-                row.get("location"),
-            )
-            asset_map.setdefault(key, []).append(row)
-
-    for row in data:
-        if row.get("indent") == 1:
-            key = (
-                row.get("asset_category"),
-                str(row.get("shift_date")),
-                row.get("location"),
-            )
-            children = asset_map.get(key, [])
-            if not children:
-                continue
-
-            for field in SUM_FIELDS:
-                row[field] = r1(sum((child.get(field) or 0) for child in children))
-
-            apply_formula_fields(row)
-
-    category_map = {}
-    for row in data:
-        if row.get("indent") == 1:
-            key = row.get("asset_category")
-            category_map.setdefault(key, []).append(row)
-
-    for row in data:
-        if row.get("indent") == 0:
-            children = category_map.get(row.get("asset_category"), [])
-            if not children:
-                continue
-
-            for field in SUM_FIELDS:
-                row[field] = r1(sum((child.get(field) or 0) for child in children))
-
-            apply_formula_fields(row)
+    return roll_up_summary_rows(data, SUM_FIELDS, apply_formula_fields)
 
 
 def get_grouped_data(filters):
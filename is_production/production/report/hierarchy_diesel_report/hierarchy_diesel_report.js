@@ -21,6 +21,62 @@ frappe.query_reports["Hierarchy Diesel Report"] = {
             label: __("Daily Sheet Date"),
             fieldtype: "Date",
         },
+        {
+            fieldname: "page_length",
+            label: __("Sheets per Page"),
+            fieldtype: "Int",
+            description: __("Leave empty to show all sheets"),
+        },
+        {
+            fieldname: "page",
+            label: __("Page"),
+            fieldtype: "Int",
+            default: 1,
+            depends_on: "eval:doc.page_length",
+        },
+        {
+            fieldname: "lazy_entries",
+            label: __("Sheets Only"),
+            fieldtype: "Check",
+            description: __("Leave out diesel entries; use Load Entries on a sheet to fetch them"),
+        },
     ],
+
+    formatter(value, row, column, data, default_formatter) {
+        value = default_formatter(value, row, column, data);
+
+        if (
+            column.fieldname === "account_name" &&
+            data && data.sheet && !data.entries_loaded &&
+            frappe.query_report.get_filter_value("lazy_entries")
+        ) {
+            value += ` <a class="hierarchy-diesel-load-entries" data-sheet="${data.sheet}">${__("Load Entries")}</a>`;
+        }
+
+        return value;
+    },
 };
 
+// Lazy mode: fetch one sheet's entries and insert them under it.
+$(document).on("click", ".hierarchy-diesel-load-entries", function (e) {
+    e.preventDefault();
+    e.stopPropagation();
+
+    const report = frappe.query_report;
+    const sheet = $(this).attr("data-sheet");
+
+    frappe.call({
+        method: "is_production.production.report.hierarchy_diesel_report.hierarchy_diesel_report.get_sheet_entries",
+        args: { sheet },
+        callback(r) {
+            const data = report.data;
+            const position = data.findIndex((row) => row.sheet === sheet);
+            if (position === -1) return;
+
+            data[position].entries_loaded = 1;
+            data.splice(position + 1, 0, ...(r.message || []));
+            report.datatable.refresh(data, report.columns);
+        },
+    });
+});
+
@@ -4,6 +4,18 @@
 # File: hierarchy_diesel_report.py
 import frappe
 from frappe import _
+from frappe.utils import cint
+
+SHEET_FILTER_FIELDS = ["location", "asset_name", "daily_sheet_date"]
+
+ENTRY_FIELDS = """
+    dde.name AS entry_name,
+    dde.asset_name AS entry_asset_name,
+    dde.litres_issued,
+    dde.open_reading,
+    dde.close_reading,
+    dde.hours_km
+"""
 
 def execute(filters=None):
     columns = get_columns()
@@ -19,40 +31,109 @@ def get_columns():
         {"fieldname": "hours_km", "label": _("Hours/Km"), "fieldtype": "Data", "width": 100},
     ]
 
+def get_sheet_conditions(filters):
+    conditions = []
+    values = {}
+
+    for field in SHEET_FILTER_FIELDS:
+        if filters.get(field):
+            conditions.append(f"dds.{field} = %({field})s")
+            values[field] = filters.get(field)
+
+    return (" AND ".join(conditions) or "1=1"), values
+
 def get_data(filters):
-    data = []
+    """
+    Daily Diesel Sheets with their entries as an indent tree, from one joined
+    query ordered sheet by sheet.
 
-    # Fetch all parent records (Daily Diesel Sheets)
-    parent_records = frappe.get_all(
-        "Daily Diesel Sheet",
-        fields=["name", "location", "asset_name", "daily_sheet_date", "shift", "litres_issued_equipment"],
-        filters=filters,
-    )
+    With page_length set only that page of sheets is returned (page counts
+    from 1), and with lazy_entries the entries are left out so the tree view
+    can load them per sheet via get_sheet_entries.
+    """
+    filters = frappe._dict(filters or {})
+    conditions, values = get_sheet_conditions(filters)
 
-    for parent in parent_records:
-        # Add parent record to data
-        data.append({
-            "account_name": f"{parent.location} - {parent.asset_name} ({parent.shift})",
-            "litres_issued": parent.litres_issued_equipment,
-            "indent": 0,
+    page_length = cint(filters.get("page_length"))
+    limit = ""
+    if page_length:
+        limit = "LIMIT %(limit)s OFFSET %(offset)s"
+        values.update({
+            "limit": page_length,
+            "offset": (max(cint(filters.get("page")), 1) - 1) * page_length,
         })
 
-        # Fetch child records (Daily Diesel Entries) for this parent
-        child_records = frappe.get_all(
-            "Daily Diesel Entries",
-            fields=["asset_name", "litres_issued", "open_reading", "close_reading", "hours_km"],
-            filters={"parent": parent.name},
-        )
+    lazy_entries = cint(filters.get("lazy_entries"))
+    entry_join = "" if lazy_entries else """
+        LEFT JOIN `tabDaily Diesel Entries` dde
+            ON dde.parent = dds.name
+            AND dde.parenttype = 'Daily Diesel Sheet'
+            AND dde.parentfield = 'daily_diesel_entries'
+    """
+
+    rows = frappe.db.sql(
+        f"""
+        SELECT
+            dds.name, dds.location, dds.asset_name, dds.shift, dds.litres_issued_equipment,
+            {"NULL AS entry_name" if lazy_entries else ENTRY_FIELDS}
+        FROM (
+            SELECT name, location, asset_name, shift, litres_issued_equipment, modified
+            FROM `tabDaily Diesel Sheet` dds
+            WHERE {conditions}
+            ORDER BY modified DESC, name
+            {limit}
+        ) dds
+        {entry_join}
+        ORDER BY dds.modified DESC, dds.name{"" if lazy_entries else ", dde.idx"}
+        """,
+        values,
+        as_dict=True,
+    )
 
-        for child in child_records:
-            # Add child record to data
+    data = []
+    current_sheet = None
+
+    for row in rows:
+        if row.name != current_sheet:
+            current_sheet = row.name
             data.append({
-                "account_name": f"  {child.asset_name}",
-                "litres_issued": child.litres_issued,
-                "open_reading": child.open_reading,
-                "close_reading": child.close_reading,
-                "hours_km": child.hours_km,
-                "indent": 1,  # Child level
+                "account_name": f"{row.location} - {row.asset_name} ({row.shift})",
+                "litres_issued": row.litres_issued_equipment,
+                "sheet": row.name,
+                "indent": 0,
             })
 
+        if row.entry_name:
+            data.append(get_entry_row(row))
+
     return data
+
+def get_entry_row(entry):
+    return {
+        "account_name": f"  {entry.entry_asset_name}",
+        "litres_issued": entry.litres_issued,
+        "open_reading": entry.open_reading,
+        "close_reading": entry.close_reading,
+        "hours_km": entry.hours_km,
+        "indent": 1,  # Child level
+    }
+
+@frappe.whitelist()
+def get_sheet_entries(sheet):
+    """Entry rows of one Daily Diesel Sheet, for expanding a sheet in lazy mode."""
+    frappe.has_permission("Daily Diesel Sheet", "read", sheet, throw=True)
+
+    entries = frappe.db.sql(
+        f"""
+        SELECT {ENTRY_FIELDS}
+        FROM `tabDaily Diesel Entries` dde
+        WHERE dde.parent = %(sheet)s
+            AND dde.parenttype = 'Daily Diesel Sheet'
+            AND dde.parentfield = 'daily_diesel_entries'
+        ORDER BY dde.idx
+        """,
+        {"sheet": sheet},
+        as_dict=True,
+    )
+
+    return [get_entry_row(entry) for entry in entries]
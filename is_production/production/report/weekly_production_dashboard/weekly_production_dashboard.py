@@ -4,8 +4,12 @@
 
 import json
 import re
+from functools import partial
+
 import frappe
 
+from is_production.utils.report_cache import get_cached_report_results
+
 
 def execute(filters=None):
     filters = frappe._dict(filters or {})
@@ -30,37 +34,55 @@ def execute(filters=None):
     return columns, data
 
 
-def build_dashboard_data(filters):
-    weekly_report = run_script_report_direct(
-        "weekly_report",
-        {
-            "start_date": filters.get("start_date"),
-            "end_date": filters.get("end_date"),
-            "site": filters.get("site"),
-        },
-    )
+# Sub-reports and the doctypes their figures come from (the cache watermark).
+SUB_REPORTS = {
+    "weekly": {
+        "report": "weekly_report",
+        "site_filter": "site",
+        "doctypes": ["Hourly Production", "Monthly Production Planning", "Survey"],
+    },
+    "diesel": {
+        "report": "diesel_cap_report",
+        "site_filter": "site",
+        "doctypes": ["Hourly Production", "Daily Diesel Sheet", "Survey"],
+    },
+    "availability": {
+        "report": "avail_and_util_summary",
+        "site_filter": "location",
+        "doctypes": [
+            "Availability and Utilisation",
+            "Breakdown History",
+            "Daily Lost Hours Recon",
+            "Mechanical Service Report",
+            "Monthly Production Planning",
+            "Asset",
+        ],
+    },
+}
 
-    diesel_report = run_script_report_direct(
-        "diesel_cap_report",
-        {
-            "start_date": filters.get("start_date"),
-            "end_date": filters.get("end_date"),
-            "site": filters.get("site"),
-        },
-    )
 
-    availability_report = run_script_report_direct(
-        "avail_and_util_summary",
-        {
-            "start_date": filters.get("start_date"),
-            "end_date": filters.get("end_date"),
-            "location": filters.get("site"),
-        },
-    )
+def build_dashboard_data(filters):
+    reports = get_cached_report_results({
+        key: (
+            config["report"],
+            {
+                "start_date": filters.get("start_date"),
+                "end_date": filters.get("end_date"),
+                config["site_filter"]: filters.get("site"),
+            },
+            config["doctypes"],
+            partial(run_report_rows, config["report"]),
+        )
+        for key, config in SUB_REPORTS.items()
+    })
 
-    weekly_rows = extract_rows_from_report_result(weekly_report)
-    diesel_rows = extract_rows_from_report_result(diesel_report)
-    availability_rows = extract_rows_from_report_result(availability_report)
+    weekly_report = reports["weekly"]
+    diesel_report = reports["diesel"]
+    availability_report = reports["availability"]
+
+    weekly_rows = weekly_report["rows"]
+    diesel_rows = diesel_report["rows"]
+    availability_rows = availability_report["rows"]
 
     bcm = extract_bcm_data(weekly_rows)
     coal = extract_coal_data(weekly_rows)
@@ -84,43 +106,55 @@ def build_dashboard_data(filters):
             "weekly_rows": weekly_rows,
             "diesel_rows": diesel_rows,
             "availability_rows": availability_rows,
-            "weekly_html_found": bool(weekly_report.get("html")),
-            "diesel_html_found": bool(diesel_report.get("html")),
-            "availability_html_found": bool(availability_report.get("html")),
+            "weekly_from_cache": weekly_report.get("from_cache"),
+            "diesel_from_cache": diesel_report.get("from_cache"),
+            "availability_from_cache": availability_report.get("from_cache"),
         },
     }
 
 
-def run_script_report_direct(report_folder, filters):
+def run_report_rows(report_folder, filters):
+    """
+    Run a sub-report and return its rows as dicts. Reports with a
+    get_summary_rows() (HTML-only reports such as weekly_report) provide
+    structured rows directly; the rest are normalised from columns/data.
+    """
     try:
-        method_path = (
+        module = frappe.get_module(
             "is_production.production.report."
-            f"{report_folder}.{report_folder}.execute"
+            f"{report_folder}.{report_folder}"
         )
+        filters = frappe._dict(filters or {})
+
+        if hasattr(module, "get_summary_rows"):
+            rows = [
+                dict(
+                    row,
+                    col_0=row.get("description"),
+                    col_1=row.get("unit"),
+                    col_2=row.get("value"),
+                )
+                for row in module.get_summary_rows(filters)
+            ]
+        else:
+            result = module.execute(filters)
 
-        execute_method = frappe.get_attr(method_path)
-        result = execute_method(frappe._dict(filters or {}))
-
-        columns = []
-        data = []
-        html = ""
-
-        if isinstance(result, tuple):
-            if len(result) >= 1:
-                columns = result[0] or []
-            if len(result) >= 2:
-                data = result[1] or []
-            if len(result) >= 3 and isinstance(result[2], str):
-                html = result[2] or ""
-        elif isinstance(result, dict):
-            columns = result.get("columns") or []
-            data = result.get("data") or result.get("result") or []
-            html = result.get("html") or result.get("message") or ""
+            columns = []
+            data = []
+
+            if isinstance(result, tuple):
+                if len(result) >= 1:
+                    columns = result[0] or []
+                if len(result) >= 2:
+                    data = result[1] or []
+            elif isinstance(result, dict):
+                columns = result.get("columns") or []
+                data = result.get("data") or result.get("result") or []
+
+            rows = normalise_rows(columns, data)
 
         return {
-            "columns": columns,
-            "data": data,
-            "html": html,
+            "rows": rows,
             "error": None,
         }
 
@@ -131,72 +165,11 @@ def run_script_report_direct(report_folder, filters):
         )
 
         return {
-            "columns": [],
-            "data": [],
-            "html": "",
+            "rows": [],
             "error": frappe.get_traceback(),
         }
 
 
-def extract_rows_from_report_result(report):
-    html = report.get("html") or ""
-
-    if html:
-        html_rows = extract_rows_from_html(html)
-        if html_rows:
-            return html_rows
-
-    return normalise_rows(
-        report.get("columns", []),
-        report.get("data", []),
-    )
-
-
-def extract_rows_from_html(html):
-    rows = []
-
-    tr_matches = re.findall(
-        r"<tr[^>]*>(.*?)</tr>",
-        html,
-        flags=re.IGNORECASE | re.DOTALL,
-    )
-
-    for tr_html in tr_matches:
-        cells = re.findall(
-            r"<t[dh][^>]*>(.*?)</t[dh]>",
-            tr_html,
-            flags=re.IGNORECASE | re.DOTALL,
-        )
-
-        if len(cells) < 3:
-            continue
-
-        description = clean_html(cells[0])
-        unit = clean_html(cells[1])
-        value = clean_html(cells[2])
-
-        if not description or description.lower() == "description":
-            continue
-
-        rows.append(
-            {
-                "description": description,
-                "unit": unit,
-                "value": value,
-                "col_0": description,
-                "col_1": unit,
-                "col_2": value,
-                "_raw": {
-                    "description": description,
-                    "unit": unit,
-                    "value": value,
-                },
-            }
-        )
-
-    return rows
-
-
 def clean_html(value):
     value = str(value or "")
 
@@ -2,11 +2,65 @@
 # For license information, please see license.txt
 
 import frappe
-from frappe.utils import flt, format_date, getdate
+from frappe.utils import add_days, flt, format_date, getdate
 from datetime import datetime
 
+from is_production.production.doctype.production_fact.production_fact import (
+    get_coal_bcm,
+    is_fact_table_enabled,
+)
+
+
+# Structured form of the summary table in build_html, same rows and order:
+# (description, unit, data key, decimals). Composite dashboards read these
+# instead of parsing the HTML.
+SUMMARY_ROWS = [
+    ("Monthly Target", "BCM", "monthly_target", 0),
+    ("Monthly Waste Target", "BCM", "waste_bcms_planned", 0),
+    ("Forecast Waste", "BCM", "forecast_waste", 0),
+    ("MTD Prog Actual Waste", "BCM", "mtd_prog_actual_waste", 0),
+    ("MTD Prog Target Waste", "BCM", "mtd_prog_target_waste", 0),
+    ("SHORT / OVER", "BCM", "short_over_waste", 0),
+    ("Monthly Coal Target", "TONS", "coal_tons_planned", 0),
+    ("Forecast Coal", "TONS", "forecast_coal", 0),
+    ("MTD Prog Actual COAL", "TONS", "mtd_prog_actual_coal", 0),
+    ("MTD Prog Target COAL", "TONS", "mtd_prog_target_coal", 0),
+    ("SHORT / OVER", "TONS", "short_over_coal", 0),
+    ("MTD Prog Actual BCM’s", "BCM", "mtd_actual_bcms", 0),
+    ("Remaining Volume", "BCM", "remaining_volume", 0),
+    ("Daily required to reach Target", "BCM", "daily_required", 0),
+    ("Actual Daily Achieved", "BCM", "actual_daily", 0),
+    ("Monthly Available Days", "", "num_prod_days", 0),
+    ("Worked Days", "", "num_prod_days_completed", 0),
+    ("Days Left", "", "days_left", 0),
+    ("Forecast on Current Rate", "BCM", "forecast", 0),
+    ("SHORT / OVER", "BCM", "short_over_forecast", 0),
+    ("Strip Ratio", "", "strip_ratio", 1),
+]
+
 
 def execute(filters=None):
+    site, formatted_date, data = get_summary_data(filters)
+
+    html = build_html(site, formatted_date, data)
+    return [], None, html
+
+
+def get_summary_rows(filters=None):
+    """Summary table as [{"description", "unit", "value"}], values rounded as displayed."""
+    _, _, data = get_summary_data(filters)
+
+    return [
+        {
+            "description": description,
+            "unit": unit,
+            "value": flt(data[key], decimals),
+        }
+        for description, unit, key, decimals in SUMMARY_ROWS
+    ]
+
+
+def get_summary_data(filters=None):
     if not filters:
         filters = {}
 
@@ -141,8 +195,7 @@ def execute(filters=None):
             1
         )
 
-    html = build_html(site, formatted_date, data)
-    return [], None, html
+    return site, formatted_date, data
 
 
 def get_monthly_plan(site, date):
@@ -193,14 +246,17 @@ def get_mtd_coal_dynamic(site, end_date, month_start):
         if survey_date and start_dt <= survey_date <= end_dt:
             coal_tons_actual = survey.get("total_surveyed_coal_tons") or 0
 
-            coal_after = frappe.db.sql("""
-                SELECT COALESCE(SUM(tl.bcms),0)
-                FROM `tabHourly Production` hp
-                JOIN `tabTruck Loads` tl ON tl.parent = hp.name
-                WHERE hp.prod_date > %s AND hp.prod_date <= %s
-                  AND hp.location = %s
-                  AND LOWER(tl.mat_type) LIKE '%%coal%%'
-            """, (survey_date, end_date, site))[0][0]
+            if is_fact_table_enabled():
+                coal_after = get_fact_coal_bcm(site, add_days(survey_date, 1), end_date)
+            else:
+                coal_after = frappe.db.sql("""
+                    SELECT COALESCE(SUM(tl.bcms),0)
+                    FROM `tabHourly Production` hp
+                    JOIN `tabTruck Loads` tl ON tl.parent = hp.name
+                    WHERE hp.prod_date > %s AND hp.prod_date <= %s
+                      AND hp.location = %s
+                      AND LOWER(tl.mat_type) LIKE '%%coal%%'
+                """, (survey_date, end_date, site))[0][0]
 
             coal_tons_actual += (coal_after or 0) * COAL_CONVERSION
         else:
@@ -211,7 +267,15 @@ def get_mtd_coal_dynamic(site, end_date, month_start):
     return coal_tons_actual
 
 
+def get_fact_coal_bcm(site, start_date, end_date):
+    rows = get_coal_bcm([site], start_date, end_date)
+    return rows[0].bcm if rows else 0
+
+
 def get_coal_from_hourly(start_date, end_date, site, COAL_CONVERSION):
+    if is_fact_table_enabled():
+        return get_fact_coal_bcm(site, start_date, end_date) * COAL_CONVERSION
+
     coal_bcm = frappe.db.sql("""
         SELECT COALESCE(SUM(tl.bcms),0)
         FROM `tabHourly Production` hp
@@ -1,39 +1,130 @@
 # apps/is_production/is_production/utils/pdf.py
 
 import frappe
+from frappe.utils import nowdate
 from frappe.utils.pdf import pdf_body_html as _pdf_body_html
 
+
+MTD_SNAPSHOT_PREFIX = "is_production:mtd_snapshot"
+MTD_SNAPSHOT_SECONDS = 6 * 60 * 60
+
+MTD_FIELDS = [
+    "monthly_target_bcm",
+    "target_bcm_day",
+    "target_bcm_hour",
+    "month_act_ts_bcm_tallies",
+    "month_act_dozing_bcm_tallies",
+    "monthly_act_tally_survey_variance",
+    "month_actual_bcm",
+    "mtd_bcm_day",
+    "mtd_bcm_hour",
+    "month_forecated_bcm"
+]
+
+
+def get_mtd_watermark(plan):
+    """
+    Today's date plus the row count and latest modified of the plan's Hourly
+    Production records and its site's Surveys. MTD values change with any of
+    them (days completed count up to yesterday).
+    """
+    row = frappe.db.sql(
+        """
+        SELECT
+            (SELECT CONCAT(COUNT(*), ':', IFNULL(MAX(hp.modified), ''))
+                FROM `tabHourly Production` hp
+                WHERE hp.month_prod_planning = %(plan)s
+                    OR (hp.location = %(location)s AND hp.prod_date BETWEEN %(start)s AND %(end)s)),
+            (SELECT CONCAT(COUNT(*), ':', IFNULL(MAX(s.modified), ''))
+                FROM `tabSurvey` s
+                WHERE s.location = %(location)s)
+        """,
+        {
+            "plan": plan.name,
+            "location": plan.location,
+            "start": plan.prod_month_start_date,
+            "end": plan.prod_month_end_date,
+        },
+    )[0]
+
+    return "|".join([nowdate(), *(value or "" for value in row)])
+
+
+def get_mtd_snapshot(plan_name):
+    """
+    MtD values of a Monthly Production Planning, recalculated only when its
+    source data has changed since the last snapshot.
+
+    The recalculation saves the plan, so a snapshot also accepts the plan's
+    modified from just before and just after it (the save is rolled back on
+    GET requests such as PDF downloads). Any other edit to the plan makes it
+    stale. Within one request each plan is looked up once, so a bulk print
+    recalculates at most once per plan.
+    """
+    if not hasattr(frappe.local, "mtd_snapshots"):
+        frappe.local.mtd_snapshots = {}
+
+    local_snapshots = frappe.local.mtd_snapshots
+
+    if plan_name in local_snapshots:
+        return local_snapshots[plan_name]
+
+    plan = frappe.db.get_value(
+        "Monthly Production Planning",
+        plan_name,
+        ["name", "location", "prod_month_start_date", "prod_month_end_date", "modified"],
+        as_dict=True,
+    )
+
+    if not plan:
+        return None
+
+    cache_key = f"{MTD_SNAPSHOT_PREFIX}:{plan_name}"
+    watermark = get_mtd_watermark(plan)
+    snapshot = frappe.cache.get_value(cache_key)
+
+    if (
+        not snapshot
+        or snapshot.get("watermark") != watermark
+        or str(plan.modified) not in snapshot.get("plan_modified", [])
+    ):
+        result = frappe.get_attr(
+            "is_production.production.doctype.monthly_production_planning."
+            "monthly_production_planning.update_mtd_production"
+        )(name=plan_name)
+
+        values = frappe.db.get_value("Monthly Production Planning", plan_name, MTD_FIELDS + ["modified"], as_dict=True)
+        snapshot = {
+            "watermark": watermark,
+            "plan_modified": [str(plan.modified), str(values.pop("modified"))],
+            "values": values,
+        }
+
+        # A failed recalculation is logged by update_mtd_production; render
+        # with the stored values but try again next time.
+        if (result or {}).get("status") != "error":
+            frappe.cache.set_value(cache_key, snapshot, expires_in_sec=MTD_SNAPSHOT_SECONDS)
+
+    local_snapshots[plan_name] = snapshot["values"]
+
+    return snapshot["values"]
+
+
 def pdf_body_html(jenv, template, print_format, args):
     """
     Wrap Frappe's pdf_body_html to
-    1) recalculate MtD on the linked Monthly Production Planning,
-    2) pull those fresh values into args['doc'],
+    1) bring MtD on the linked Monthly Production Planning up to date
+       (recalculated only when stale, see get_mtd_snapshot),
+    2) pull those values into args['doc'],
     3) then render the PDF as normal.
     """
     doc = args.get("doc")
     if doc and getattr(doc, "month_prod_planning", None):
-        # 1) trigger MtD recalculation on the Monthly Production Planning
-        frappe.get_attr(
-            "is_production.production.doctype.monthly_production_planning."
-            "monthly_production_planning.update_mtd_production"
-        )(name=doc.month_prod_planning)
-
-        # 2) pull updated MtD values back into our doc
-        mpp = frappe.get_doc("Monthly Production Planning", doc.month_prod_planning)
-        for field in [
-            "monthly_target_bcm",
-            "target_bcm_day",
-            "target_bcm_hour",
-            "month_act_ts_bcm_tallies",
-            "month_act_dozing_bcm_tallies",
-            "monthly_act_tally_survey_variance",
-            "month_actual_bcm",
-            "mtd_bcm_day",
-            "mtd_bcm_hour",
-            "month_forecated_bcm"
-        ]:
+        values = get_mtd_snapshot(doc.month_prod_planning) or {}
+
+        for field, value in values.items():
             # overwrite the doc’s attribute so Jinja will pick it up
-            setattr(doc, field, getattr(mpp, field))
+            setattr(doc, field, value)
 
     # 3) render PDF as usual
     return _pdf_body_html(jenv, template, print_format, args)
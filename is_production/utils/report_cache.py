@@ -0,0 +1,120 @@
+# apps/is_production/is_production/utils/report_cache.py
+
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import frappe
+
+
+REPORT_CACHE_PREFIX = "is_production:report_result"
+
+# The watermark catches inserts and edits straight away. Deleted child rows
+# don't move it, so entries also age out.
+REPORT_CACHE_SECONDS = 10 * 60
+
+
+def normalise_filters(filters):
+    """Filters as a stable, JSON-safe dict: empty values dropped, keys sorted."""
+    return {
+        key: str(value)
+        for key, value in sorted(dict(filters or {}).items())
+        if value not in (None, "", [])
+    }
+
+
+def get_data_watermark(doctypes):
+    """
+    Row count and latest modified of each source doctype, in one query.
+    Any insert, edit or delete on a source changes it.
+    """
+    if not doctypes:
+        return ""
+
+    query = " UNION ALL ".join(
+        f"SELECT %s AS doctype, COUNT(*) AS row_count, MAX(modified) AS last_modified FROM `tab{doctype}`"
+        for doctype in doctypes
+    )
+
+    rows = frappe.db.sql(query, list(doctypes))
+
+    return "|".join(f"{doctype}:{count}:{last_modified}" for doctype, count, last_modified in rows)
+
+
+def get_report_cache_key(report, filters, doctypes):
+    signature = json.dumps(
+        [report, normalise_filters(filters), get_data_watermark(doctypes)],
+        default=str,
+    )
+
+    return f"{REPORT_CACHE_PREFIX}:{report}:{hashlib.sha1(signature.encode()).hexdigest()}"
+
+
+def get_cached_report_results(reports):
+    """
+    Results for {key: (report, filters, doctypes, compute)}, each cached by
+    (report, normalised filters, data watermark of doctypes).
+
+    Cache misses are computed concurrently with compute(filters). Results
+    that compute marks with an "error" are not cached. Every result dict gets
+    a "from_cache" flag.
+    """
+    cache_keys = {}
+    results = {}
+    misses = {}
+
+    for key, (report, filters, doctypes, compute) in reports.items():
+        cache_keys[key] = get_report_cache_key(report, filters, doctypes)
+        cached = frappe.cache.get_value(cache_keys[key])
+
+        if cached is not None:
+            results[key] = dict(cached, from_cache=True)
+        else:
+            misses[key] = (compute, (filters,))
+
+    for key, result in run_concurrently(misses).items():
+        if not result.get("error"):
+            frappe.cache.set_value(cache_keys[key], result, expires_in_sec=REPORT_CACHE_SECONDS)
+
+        results[key] = dict(result, from_cache=False)
+
+    return results
+
+
+def _run_in_site_context(site, sites_path, user, method, args):
+    frappe.init(site=site, sites_path=sites_path)
+    frappe.connect()
+
+    try:
+        frappe.set_user(user)
+        result = method(*args)
+
+        # Keep anything the call logged (Error Log entries).
+        frappe.db.commit()
+
+        return result
+    finally:
+        frappe.destroy()
+
+
+def run_concurrently(calls):
+    """
+    Run {key: (method, args)} in parallel threads and return {key: result}.
+
+    Each thread opens its own site context and database connection as the
+    current user, so the calls only see committed data.
+    """
+    if len(calls) < 2:
+        return {key: method(*args) for key, (method, args) in calls.items()}
+
+    site = frappe.local.site
+    sites_path = frappe.local.sites_path
+    user = frappe.session.user
+
+    with ThreadPoolExecutor(max_workers=len(calls)) as executor:
+        futures = {
+            key: executor.submit(_run_in_site_context, site, sites_path, user, method, args)
+            for key, (method, args) in calls.items()
+        }
+
+        return {key: future.result() for key, future in futures.items()}
@@ -0,0 +1,85 @@
+# apps/is_production/is_production/utils/summary_rollup.py
+
+
+def r1(value):
+    return round(value or 0, 1)
+
+
+def get_parent_positions(data):
+    """
+    Position of each row's summary row in data (-1 for top-level rows).
+
+    A row's parent is the closest row above it with a smaller indent, which
+    is how the report tree shows it.
+    """
+    parents = []
+    stack = []
+
+    for position, row in enumerate(data):
+        indent = row.get("indent") or 0
+
+        while stack and (data[stack[-1]].get("indent") or 0) >= indent:
+            stack.pop()
+
+        parents.append(stack[-1] if stack else -1)
+        stack.append(position)
+
+    return parents
+
+
+def roll_up_summary_rows(data, sum_fields, apply_formula_fields, include_child=None):
+    """
+    Recalculate every summary row in an indented report from the rows under it,
+    in a single pass.
+
+    Rows are walked with a stack of open summary rows. When a row closes, its
+    sum_fields become the r1 totals of its children and apply_formula_fields
+    recomputes its percentages. The closed row is then added to its own parent,
+    so totals build up from the bottom.
+
+    Children for which include_child(row) is false are left out of the totals,
+    and a summary row with none left is set to zero. Rows with nothing under
+    them are treated as detail rows and left as they are.
+    """
+    # [row, indent, child count, totals of included children or None]
+    stack = []
+
+    def close():
+        row, _, child_count, totals = stack.pop()
+
+        if child_count:
+            if totals is None:
+                row.update(dict.fromkeys(sum_fields, 0))
+            else:
+                row.update((field, r1(total)) for field, total in totals.items())
+
+            apply_formula_fields(row)
+
+        if not stack or (include_child and not include_child(row)):
+            return
+
+        parent = stack[-1]
+
+        if parent[3] is None:
+            parent[3] = dict.fromkeys(sum_fields, 0)
+
+        totals = parent[3]
+
+        for field in sum_fields:
+            totals[field] = totals[field] + (row.get(field) or 0)
+
+    for row in data:
+        indent = row.get("indent") or 0
+
+        while stack and stack[-1][1] >= indent:
+            close()
+
+        if stack:
+            stack[-1][2] += 1
+
+        stack.append([row, indent, 0, None])
+
+    while stack:
+        close()
+
+    return data